@@ -0,0 +1,129 @@
+"""Shared helpers for the hook benchmarks (stdlib only)."""
+
+import importlib.util
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+PLUGIN_ROOT = SCRIPTS_DIR.parent
+
+WORDS = (
+    "plan implement refactor safe review code quality debug test deploy api endpoint "
+    "schema migration cache index latency profile benchmark module package service "
+    "client server hook skill prompt token budget report audit upgrade dependency"
+).split()
+
+SAMPLE_PROMPTS = [
+    "Can you help me plan how to implement the new caching layer?",
+    "What's the blast radius if I change the auth middleware?",
+    "hello, can you explain what this function does",
+    "Please do a code review of the diff and look for code smells and anti-patterns",
+    "Refactor this module safely without breaking the public API",
+    "I pasted a stack trace below, what is going on?\n" + "  File \"x.py\", line 1, in <module>\n" * 40,
+]
+
+
+PATH_DIRS = (
+    "src lib app api core internal pkg services handlers models views components utils "
+    "tests docs scripts web frontend backend common shared vendor build tools ui store"
+).split()
+PATH_NAMES = (
+    "index.ts main.py routes.py helpers.py models.py views.py server.go handler.rs button.tsx "
+    "README.md user_service.py Makefile __init__.py package.json types.ts utils.go test_views.py"
+).split()
+# Sensitive names, and names the old substring patterns flagged by accident.
+SENSITIVE_NAMES = (
+    "auth settings.py token_store.py schema.sql crypto_utils.py AuthService.ts api_keys.py "
+    ".env.production server.pem migrations config security"
+).split()
+LOOKALIKE_NAMES = (
+    "monkey_patch.py KeyboardLayout.tsx hashmap.go AUTHORS.md turkey.json keynote tokenizer.py certbot"
+).split()
+
+
+def sample_paths(count: int, seed: int = 11) -> list[str]:
+    """Generate `count` repository-relative file paths.
+
+    About 1 in 40 path components is sensitive and 1 in 40 only looks it
+    (e.g. "monkey_patch.py" contains "key").
+    """
+    rng = random.Random(seed)
+
+    def component(names):
+        roll = rng.random()
+        if roll < 0.025:
+            return rng.choice(SENSITIVE_NAMES)
+        if roll < 0.05:
+            return rng.choice(LOOKALIKE_NAMES)
+        return rng.choice(names)
+
+    return [
+        "/".join(component(PATH_DIRS) for _ in range(rng.randint(1, 4))) + "/" + component(PATH_NAMES)
+        for _ in range(count)
+    ]
+
+
+def load_script(name: str):
+    """Import a hyphenated script from scripts/ as a module."""
+    path = SCRIPTS_DIR / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_rules(count: int, seed: int = 7) -> dict:
+    """Generate a skill-rules.json payload with `count` rules shaped like the real file."""
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        a, b, c = rng.sample(WORDS, 3)
+        rules.append({
+            "skill": f"synthetic-skill-{i}",
+            "triggers": [f"{a}{i} {b}", f"{b}.*{c}{i}", f"{c} {a}.?{i}", f"{a}{i}.*{c}"],
+            "description": f"Synthetic rule {i}",
+        })
+    return {"rules": rules}
+
+
+def write_rules(directory: Path, count: int) -> Path:
+    path = directory / f"skill-rules-{count}.json"
+    path.write_text(json.dumps(synthetic_rules(count)), encoding="utf-8")
+    return path
+
+
+def measure(fn, repeat: int = 50) -> list[float]:
+    """Call fn `repeat` times, return per-call latencies in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p50 = statistics.median(ordered)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {p50:8.3f} ms   p99 {p99:8.3f} ms"
+
+
+def large_prompts() -> dict[str, str]:
+    """Corpus of large pasted prompts: name -> prompt text (~1-20 MB each)."""
+    frame = (
+        '  File "/srv/app/service/handlers.py", line 214, in dispatch\n'
+        "    result = await handler(request, context=ctx)\n"
+    )
+    source_line = "    total = sum(item.price * item.quantity for item in order.items)  # noqa\n"
+    return {
+        "stack-trace-1mb": "Why does this fail?\n" + frame * 9500 + "ValueError: unexpected payload shape\n",
+        "stack-trace-5mb": "Please help me debug this.\n" + frame * 47000 + "What is the blast radius of a fix?\n",
+        "pasted-source-20mb": "Can you review this file for code smells?\n" + source_line * 270000,
+        "single-line-5mb": "plan how to implement this: " + "x" * 5_000_000,
+    }
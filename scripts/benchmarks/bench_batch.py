@@ -0,0 +1,74 @@
+"""Benchmark: --batch mode vs one hook process per event.
+
+For each hook, builds an NDJSON file of events (sensitive-file-hook: file
+paths from sample_paths(); skill-activation-hook: the sample prompts) and
+measures total wall time of:
+  per event   one `python <hook>.py` per event (timed on --spawn events,
+              extrapolated to the whole file)
+  batch       python <hook>.py --batch
+  workers     python <hook>.py --batch --workers N
+
+Checks that batch output matches the per-event output line for line.
+
+Usage:
+    python scripts/benchmarks/bench_batch.py [--events 200000] [--workers 4] [--spawn 40]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import SAMPLE_PROMPTS, SCRIPTS_DIR, sample_paths
+
+
+def events(hook, count):
+    if hook == "sensitive-file-hook":
+        return [json.dumps({"tool_input": {"file_path": p}}) for p in sample_paths(count)]
+    return [json.dumps({"prompt": SAMPLE_PROMPTS[i % len(SAMPLE_PROMPTS)]}) for i in range(count)]
+
+
+def timed(args, payload, env):
+    start = time.perf_counter()
+    out = subprocess.run(args, input=payload, capture_output=True, env=env, check=True).stdout
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--spawn", type=int, default=40)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-batch-"))
+    env = dict(os.environ, CLAUDE_LIBRARY_CACHE_DIR=str(tmp / "cache"))
+    env.pop("CLAUDE_PROJECT_DIR", None)
+    print(f"{args.events} events per hook")
+    for hook in ("sensitive-file-hook", "skill-activation-hook"):
+        script = str(SCRIPTS_DIR / f"{hook}.py")
+        lines = events(hook, args.events)
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+        per_event, spawn_total = [], 0.0
+        for line in lines[: args.spawn]:
+            out, elapsed = timed([sys.executable, script], line.encode("utf-8"), env)
+            per_event.append(out.decode("utf-8") or "{}")
+            spawn_total += elapsed
+        batch, batch_s = timed([sys.executable, script, "--batch"], payload, env)
+        pooled, pooled_s = timed([sys.executable, script, "--batch", "--workers", str(args.workers)], payload, env)
+        assert batch.decode("utf-8").splitlines()[: args.spawn] == per_event
+        assert pooled == batch
+
+        print(hook)
+        print(f"  {'per event (extrap.)':<22}{spawn_total / args.spawn * len(lines):10.2f} s")
+        print(f"  {'batch':<22}{batch_s:10.2f} s")
+        print(f"  {f'batch, {args.workers} workers':<22}{pooled_s:10.2f} s")
+
+
+if __name__ == "__main__":
+    main()
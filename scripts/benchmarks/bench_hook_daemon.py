@@ -0,0 +1,78 @@
+"""Benchmark: per-invocation hook latency, cold process vs warm daemon.
+
+For each Python hook, measures p50/p99 wall time of:
+  cold      python <hook>.py                      (what plugin.json used to run)
+  fallback  python -S hook-client.py <hook>       (daemon disabled, runs in-process)
+  warm      python -S hook-client.py <hook>       (daemon running)
+  socket    one socket round-trip to the daemon   (no client interpreter startup)
+
+Also checks that every path produces byte-identical stdout.
+
+Usage:
+    python scripts/benchmarks/bench_hook_daemon.py [--repeat 30]
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import SCRIPTS_DIR, load_script, measure, summarize
+
+EVENTS = {
+    "skill-activation-hook": b'{"prompt": "Can you help me plan how to implement the new caching layer?"}',
+    "sensitive-file-hook": b'{"tool_input": {"file_path": "src/auth/settings.py"}}',
+    "session-start-hook": b'{"source": "startup"}',
+}
+
+
+def run(args, payload, env):
+    return subprocess.run(args, input=payload, capture_output=True, env=env, check=True).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-hookd-"))
+    env = dict(os.environ, CLAUDE_LIBRARY_HOOKD_SOCKET=str(tmp / "hookd.sock"), CLAUDE_LIBRARY_CACHE_DIR=str(tmp / "cache"))
+    env.pop("CLAUDE_LIBRARY_HOOK_DAEMON", None)
+    warm_env = dict(env, CLAUDE_LIBRARY_HOOK_DAEMON="1")
+    os.environ.update(CLAUDE_LIBRARY_HOOKD_SOCKET=env["CLAUDE_LIBRARY_HOOKD_SOCKET"])
+    client = load_script("hook-client")
+    client_py = str(SCRIPTS_DIR / "hook-client.py")
+
+    daemon = subprocess.Popen([sys.executable, str(SCRIPTS_DIR / "hook-daemon.py"), "serve"], env=env)
+    try:
+        for _ in range(100):
+            if client.forward("sensitive-file-hook", io.BytesIO(b"{}"))[0] is not None:
+                break
+            time.sleep(0.05)
+
+        for hook, payload in EVENTS.items():
+            script = str(SCRIPTS_DIR / f"{hook}.py")
+            cold_args = [sys.executable, script]
+            shim_args = [sys.executable, "-S", client_py, hook]
+
+            expected = run(cold_args, payload, env)
+            assert run(shim_args, payload, env) == expected, f"{hook}: fallback output differs"
+            assert run(shim_args, payload, warm_env) == expected, f"{hook}: daemon output differs"
+            assert client.forward(hook, io.BytesIO(payload))[0] == expected, f"{hook}: socket output differs"
+
+            print(hook)
+            print(f"  {'cold':<10}{summarize(measure(lambda: run(cold_args, payload, env), args.repeat))}")
+            print(f"  {'fallback':<10}{summarize(measure(lambda: run(shim_args, payload, env), args.repeat))}")
+            print(f"  {'warm':<10}{summarize(measure(lambda: run(shim_args, payload, warm_env), args.repeat))}")
+            print(f"  {'socket':<10}{summarize(measure(lambda: client.forward(hook, io.BytesIO(payload)), args.repeat * 10))}")
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+
+if __name__ == "__main__":
+    main()
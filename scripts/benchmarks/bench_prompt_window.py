@@ -0,0 +1,102 @@
+"""Benchmark: peak RSS and latency of the prompt hook on large pastes.
+
+Runs skill-activation-hook.py as a fresh process per prompt in the large
+prompt corpus, in three modes:
+  previous   json.load the whole payload, match the whole lowercased prompt
+  full       streaming parse, CLAUDE_LIBRARY_PROMPT_FULL=1 (whole prompt)
+  window     streaming parse, default first/last window + instruction lines
+
+Peak RSS is each child's VmHWM (Linux only).
+
+Usage:
+    python scripts/benchmarks/bench_prompt_window.py
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import SCRIPTS_DIR, large_prompts
+
+HOOK = str(SCRIPTS_DIR / "skill-activation-hook.py")
+
+# Runs the hook in the child and reports the child's own peak RSS (VmHWM)
+# on stderr at exit. wait4() rusage is not used because on Linux it also
+# counts the parent's RSS inherited across fork.
+LAUNCHER = """
+import atexit, json, os, runpy, sys
+
+def report():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                sys.stderr.write(line)
+
+atexit.register(report)
+mode, hook = sys.argv[1:3]
+sys.path.insert(0, os.path.dirname(hook))  # the hooks import plugin_index from scripts/
+if mode == "previous":
+    # The pre-streaming hook: whole payload through json.load, whole prompt matched.
+    module = runpy.run_path(hook)
+    data = json.load(sys.stdin)
+    output = module["build_output"](data.get("prompt", ""))
+    if output:
+        json.dump(output, sys.stdout)
+else:
+    runpy.run_path(hook, run_name="__main__")
+"""
+
+MODES = {
+    "previous": {"CLAUDE_LIBRARY_PROMPT_FULL": "1"},
+    "full": {"CLAUDE_LIBRARY_PROMPT_FULL": "1"},
+    "window": {},
+}
+
+
+def run_child(mode, env, payload_path: Path):
+    """Run one hook process; returns (stdout, seconds, peak RSS in MB)."""
+    with open(payload_path, "rb") as stdin:
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", LAUNCHER, mode, HOOK], stdin=stdin, capture_output=True, env=env, check=True
+        )
+        elapsed = time.perf_counter() - start
+    peak_kb = int(proc.stderr.split()[-2])
+    return proc.stdout, elapsed, peak_kb / 1024
+
+
+def main():
+    if not Path("/proc/self/status").exists():
+        print("Peak RSS is read from /proc/self/status; run this benchmark on Linux.", file=sys.stderr)
+        sys.exit(1)
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-prompt-window-"))
+    base_env = dict(os.environ, CLAUDE_LIBRARY_CACHE_DIR=str(tmp / "cache"))
+    base_env.pop("CLAUDE_LIBRARY_PROMPT_FULL", None)
+    try:
+        payloads = {}
+        for name, prompt in large_prompts().items():
+            payloads[name] = tmp / f"{name}.json"
+            payloads[name].write_text(json.dumps({"session_id": "bench", "prompt": prompt}), encoding="utf-8")
+
+        print(f"{'prompt':<22}{'size':>9}  " + "  ".join(f"{mode:>22}" for mode in MODES))
+        for name, payload_path in payloads.items():
+            cells = []
+            outputs = {}
+            for mode, extra_env in MODES.items():
+                outputs[mode], elapsed, rss = run_child(mode, dict(base_env, **extra_env), payload_path)
+                cells.append(f"{elapsed * 1000:8.0f} ms {rss:7.1f} MB")
+            assert outputs["full"] == outputs["previous"], f"{name}: streaming parse changed the result"
+            size_mb = payload_path.stat().st_size / 1e6
+            print(f"{name:<22}{size_mb:7.1f}MB  " + "  ".join(f"{cell:>22}" for cell in cells))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
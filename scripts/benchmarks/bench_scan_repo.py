@@ -0,0 +1,113 @@
+"""Benchmark: scan_repo() source sampling, previous rglob walk vs pruned walker.
+
+Generates a repo with a large node_modules/ (and a .git/ full of objects)
+next to a small src/ tree, then measures the source-file sample of
+run_analysis.scan_repo() with:
+  previous   sorted(rglob("*")), filtered by substring afterwards
+  pruned     repo_walk.walk_files(): prunes before descending, stops at 10 files
+and the full scan_repo() (up to 500 ranked candidates, packed to the budget),
+and reports wall time and peak traced memory.
+
+Usage:
+    python scripts/benchmarks/bench_scan_repo.py [--node-modules 200000] [--repeat 5]
+"""
+
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from _common import SCRIPTS_DIR, measure, summarize
+
+ACTION_DIR = SCRIPTS_DIR / "quality-action"
+sys.path.insert(0, str(ACTION_DIR))
+
+
+def load_run_analysis():
+    spec = importlib.util.spec_from_file_location("run_analysis", ACTION_DIR / "run_analysis.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def previous_sample(repo_path: Path, skip_dirs) -> list[str]:
+    source_exts = {".py", ".js", ".ts", ".go", ".rs"}
+    sampled = []
+    for p in sorted(repo_path.rglob("*")):
+        if len(sampled) >= 10:
+            break
+        if p.is_file() and p.suffix in source_exts and not any(s in str(p) for s in skip_dirs):
+            p.read_text(encoding="utf-8", errors="replace").splitlines()[:80]
+            sampled.append(str(p.relative_to(repo_path)))
+    return sampled
+
+
+def pruned_sample(run_analysis, repo_path: Path) -> list[str]:
+    source_exts = {".py", ".js", ".ts", ".go", ".rs"}
+    sampled = []
+    for rel, path in run_analysis.walk_files(repo_path, run_analysis.SKIP_DIRS):
+        if len(sampled) >= 10:
+            break
+        if os.path.splitext(rel)[1] in source_exts:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                f.readline()
+            sampled.append(rel)
+    return sampled
+
+
+def make_repo(root: Path, node_modules: int) -> Path:
+    per_package = 50
+    for i in range(node_modules // per_package):
+        package = root / "node_modules" / f"pkg-{i:05}" / "lib"
+        package.mkdir(parents=True)
+        for j in range(per_package):
+            (package / f"m{j}.js").write_text("module.exports = 1;\n", encoding="utf-8")
+    objects = root / ".git" / "objects"
+    for i in range(256):
+        (objects / f"{i:02x}").mkdir(parents=True)
+        for j in range(20):
+            (objects / f"{i:02x}" / f"{j:038x}").write_bytes(b"x")
+    for i in range(200):
+        module = root / "src" / f"pkg{i // 20}" / f"mod{i}.py"
+        module.parent.mkdir(parents=True, exist_ok=True)
+        module.write_text("def f():\n    return 1\n" * 50, encoding="utf-8")
+    return root
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--node-modules", type=int, default=200_000, help="files under node_modules/")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run_analysis = load_run_analysis()
+    tmp = Path(tempfile.mkdtemp(prefix="bench-scan-repo-"))
+    try:
+        repo = make_repo(tmp / "repo", args.node_modules)
+        assert previous_sample(repo, run_analysis.SKIP_DIRS) == pruned_sample(run_analysis, repo)
+        print(f"{args.node_modules} files in node_modules/, 5,120 in .git/, 200 in src/")
+        for name, fn in (
+            ("previous", lambda: previous_sample(repo, run_analysis.SKIP_DIRS)),
+            ("pruned", lambda: pruned_sample(run_analysis, repo)),
+        ):
+            print(f"  {name:<10}{summarize(measure(fn, args.repeat))}   peak {peak_kib(fn):10.0f} KiB")
+        full = measure(lambda: run_analysis.scan_repo(repo), args.repeat)
+        print(f"  {'scan_repo':<10}{summarize(full)}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: per-path cost and precision of the sensitive-file classifier.
+
+Classifies a file list (default: 200,000 synthetic repository paths; pass
+--paths-file with e.g. `git ls-files` output from a large repo) with the
+previous substring regexes (one re.search per pattern over the lowercased
+path) and with the path-component classifier, and reports per-path cost and
+how many paths each flags. Then times a one-shot hook process (fresh module
+state, so the classifier is built again) with no verdict cache, a cold cache
+and a warm cache, and a warm process re-editing the same file.
+
+Usage:
+    python scripts/benchmarks/bench_sensitive_paths.py [--paths 200000] [--paths-file FILE] [--repeat 200]
+"""
+
+import argparse
+import json
+import random
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from _common import load_script, measure, sample_paths, summarize
+
+# The substring patterns the hook used before path-component matching.
+SUBSTRING_PATTERNS = [
+    r"auth|permission|acl|rbac",
+    r"config|settings|\.env",
+    r"migration|schema|alembic",
+    r"secret|credential|token|key|password|cert",
+    r"security|crypto|encrypt|decrypt|hash",
+]
+
+
+def timed(fn, paths):
+    start = time.perf_counter()
+    verdicts = [fn(path) for path in paths]
+    return verdicts, (time.perf_counter() - start) / len(paths) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=200_000)
+    parser.add_argument("--paths-file", type=Path, help="newline-separated file list, e.g. from git ls-files")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    hook = load_script("sensitive-file-hook")
+    if args.paths_file:
+        paths = [line for line in args.paths_file.read_text(encoding="utf-8").splitlines() if line]
+    else:
+        paths = sample_paths(args.paths)
+    compiled = [re.compile(p) for p in SUBSTRING_PATTERNS]
+    classifier = hook.build_classifier(hook.load_patterns())
+
+    def substring(path):
+        lowered = path.lower()
+        return [i for i, r in enumerate(compiled) if r.search(lowered)]
+
+    before, before_us = timed(substring, paths)
+    after, after_us = timed(lambda path: hook.classify(path, classifier), paths)
+    dropped = [p for p, b, a in zip(paths, before, after) if b and not a]
+
+    print(f"{len(paths)} paths")
+    print(f"  {'':<20}{'us/path':>10}{'flagged':>10}")
+    print(f"  {'substring regexes':<20}{before_us:>10.2f}{sum(map(bool, before)):>10}")
+    print(f"  {'path components':<20}{after_us:>10.2f}{sum(map(bool, after)):>10}")
+    print(f"  no longer flagged, e.g.: {', '.join(random.Random(3).sample(dropped, min(4, len(dropped))))}")
+
+    project = Path(tempfile.mkdtemp(prefix="bench-sensitive-"))
+    (project / ".claude").mkdir()
+    cache = project / ".claude" / "cache"
+    event = json.dumps({"cwd": str(project), "tool_input": {"file_path": "src/auth/settings.py"}})
+    no_cache = json.dumps({"tool_input": {"file_path": "src/auth/settings.py"}})
+
+    def one_shot(stdin_text, clear_cache=False):
+        def run():
+            if clear_cache:
+                shutil.rmtree(cache, ignore_errors=True)
+            re.purge()  # a new process compiles from scratch
+            hook._CLASSIFIERS.clear()
+            hook._VERDICTS.clear()
+            hook.run(stdin_text)
+        return run
+
+    try:
+        print()
+        print("hook event for one file")
+        print(f"  {'one-shot, no cache':<24}{summarize(measure(one_shot(no_cache), args.repeat))}")
+        print(f"  {'one-shot, cold cache':<24}{summarize(measure(one_shot(event, True), args.repeat))}")
+        hook.run(event)
+        print(f"  {'one-shot, warm cache':<24}{summarize(measure(one_shot(event), args.repeat))}")
+        print(f"  {'warm process, re-edit':<24}{summarize(measure(lambda: hook.run(event), args.repeat))}")
+    finally:
+        shutil.rmtree(project, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark: session-start skill scan, previous two-pass walk vs plugin index.
+
+Builds a synthetic plugin root with N skills (each SKILL.md ~8 KB, like the
+real ones) and measures build_output() with:
+  previous     the two-pass walk it replaced (iterdir twice, read_text each SKILL.md)
+  cold         single pass, no index (every frontmatter is read)
+  warm         single pass, index up to date (no file is opened)
+  1 changed    warm, with one SKILL.md rewritten before each run
+for N = 23 (the real plugin) and N = 2,000.
+
+Usage:
+    python scripts/benchmarks/bench_session_start.py [--repeat 30]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import load_script, measure, summarize
+
+SKILL_BODY = "---\nname: {name}\ndescription: Synthetic skill\n---\n\n" + "Step text for the skill.\n" * 330
+
+
+def previous_scan(plugin_root: Path):
+    skills_dir = plugin_root / "skills"
+    names = [d.name for d in sorted(skills_dir.iterdir()) if d.is_dir() and (d / "SKILL.md").exists()]
+    issues = []
+    for skill_dir in skills_dir.iterdir():
+        if not skill_dir.is_dir():
+            continue
+        skill_file = skill_dir / "SKILL.md"
+        if not skill_file.exists():
+            issues.append(f"Missing SKILL.md in {skill_dir.name}")
+            continue
+        if not skill_file.read_text(encoding="utf-8").startswith("---"):
+            issues.append(f"Missing YAML frontmatter in {skill_dir.name}")
+        if "_" in skill_dir.name:
+            issues.append(f"Underscore in directory name: {skill_dir.name} (use hyphens)")
+    return names, issues
+
+
+def make_plugin(root: Path, count: int) -> Path:
+    for i in range(count):
+        skill_dir = root / "skills" / f"synthetic-skill-{i}"
+        skill_dir.mkdir(parents=True)
+        (skill_dir / "SKILL.md").write_text(SKILL_BODY.format(name=skill_dir.name), encoding="utf-8")
+    return root
+
+
+def bench(hook, plugin_root: Path, repeat: int):
+    index = hook.plugin_index.index_path(plugin_root)
+    names, issues = hook.scan_skills(plugin_root)
+    assert (names, sorted(issues)) == tuple(map(sorted, previous_scan(plugin_root)))
+
+    def cold():
+        index.unlink(missing_ok=True)
+        hook.build_output(plugin_root)
+
+    touched = plugin_root / "skills" / names[0] / "SKILL.md"
+    counter = iter(range(1, 1 << 30))
+
+    def one_changed():
+        os.utime(touched, ns=(0, next(counter)))
+        hook.build_output(plugin_root)
+
+    print(f"  {'previous':<12}{summarize(measure(lambda: previous_scan(plugin_root), repeat))}")
+    print(f"  {'cold':<12}{summarize(measure(cold, repeat))}")
+    hook.build_output(plugin_root)
+    print(f"  {'warm':<12}{summarize(measure(lambda: hook.build_output(plugin_root), repeat))}")
+    print(f"  {'1 changed':<12}{summarize(measure(one_changed, repeat))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-session-start-"))
+    os.environ["CLAUDE_LIBRARY_CACHE_DIR"] = str(tmp / "cache")
+    try:
+        hook = load_script("session-start-hook")
+        for count in (23, 2000):
+            print(f"{count} skills")
+            bench(hook, make_plugin(tmp / f"plugin-{count}", count), args.repeat)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: per-prompt latency of the skill trigger matcher.
+
+Compares the reference loop (match_prompt: re.search on uncompiled
+triggers) against the hook's ranked matcher (rank_rules: literal index,
+precompiled triggers, top-k early exit), for the real skill-rules.json
+and a synthetic rule file (2,000 rules by default). Also reports the
+one-off cost of loading the rule table with a cold and a warm cache, and
+the total for a one-shot hook process (warm cache + index + one prompt),
+and latency on a ~500 KB pasted prompt.
+
+Usage:
+    python scripts/benchmarks/bench_skill_matcher.py [--repeat 50] [--rules 2000]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import PLUGIN_ROOT, SAMPLE_PROMPTS, load_script, measure, summarize, write_rules
+
+# A pasted stack trace followed by the actual question, ~500 KB.
+LONG_PROMPT = (
+    'Traceback (most recent call last):\n  File "/srv/app/service/handlers.py", line 214, in dispatch\n'
+    "    result = await handler(request, context=ctx)\nValueError: unexpected payload shape\n"
+) * 3300 + "Can you check the blast radius before I refactor this safely?"
+
+
+def bench(hook, rules_path: Path, repeat: int):
+    cache = hook.cache_dir()
+    shutil.rmtree(cache, ignore_errors=True)
+    print(f"  {'load (cold cache)':<22}{summarize(measure(lambda: hook.load_rule_table(rules_path), 1))}")
+    print(f"  {'load (warm cache)':<22}{summarize(measure(lambda: hook.load_rule_table(rules_path), repeat))}")
+
+    rules = hook.load_rules(rules_path)
+    table = hook.load_rule_table(rules_path)
+    index = hook.build_index(table)
+
+    for prompt in SAMPLE_PROMPTS:
+        expected = {r["skill"] for r in hook.match_prompt(prompt, rules)}
+        assert {r["skill"] for r in hook.rank_rules(prompt, index, k=None)} == expected
+
+    def run_loop():
+        for prompt in SAMPLE_PROMPTS:
+            hook.match_prompt(prompt, rules)
+
+    def run_ranked():
+        for prompt in SAMPLE_PROMPTS:
+            hook.rank_rules(prompt, index)
+
+    long_prompt = LONG_PROMPT.lower()
+    assert {r["skill"] for r in hook.rank_rules(long_prompt, index, k=None)} == {
+        r["skill"] for r in hook.match_prompt(long_prompt, rules)
+    }
+
+    n = len(SAMPLE_PROMPTS)
+    loop = [s / n for s in measure(run_loop, repeat)]
+    fast = [s / n for s in measure(run_ranked, repeat)]
+    one_shot = measure(lambda: hook.rank_rules(SAMPLE_PROMPTS[0], hook.build_index(hook.load_rule_table(rules_path))), repeat)
+    print(f"  {'one-shot process':<22}{summarize(one_shot)}")
+    print(f"  {'per prompt, loop':<22}{summarize(loop)}")
+    print(f"  {'per prompt, ranked':<22}{summarize(fast)}")
+    long_repeat = max(3, repeat // 10)
+    print(f"  {'500 KB, loop':<22}{summarize(measure(lambda: hook.match_prompt(long_prompt, rules), long_repeat))}")
+    print(f"  {'500 KB, ranked':<22}{summarize(measure(lambda: hook.rank_rules(long_prompt, index), long_repeat))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--rules", type=int, default=2000, help="rules in the synthetic file")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-skill-matcher-"))
+    os.environ["CLAUDE_LIBRARY_CACHE_DIR"] = str(tmp / "cache")
+    try:
+        hook = load_script("skill-activation-hook")
+        real = PLUGIN_ROOT / "skill-rules.json"
+        print(f"skill-rules.json ({len(hook.load_rules(real))} rules)")
+        bench(hook, real, args.repeat)
+        print()
+        print(f"synthetic ({args.rules} rules)")
+        bench(hook, write_rules(tmp, args.rules), max(5, args.repeat // 5))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
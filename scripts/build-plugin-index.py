@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Build the plugin index (see plugin_index.py) ahead of time.
+
+Run once at install time, or in CI, so that no hook pays for parsing
+skill-rules.json, validating the sensitive-file patterns or reading every
+SKILL.md on its first run. Each section is produced by the hook that uses
+it, so the index always matches what the hooks would build themselves.
+
+Usage:
+    python scripts/build-plugin-index.py
+"""
+
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+
+import plugin_index
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def load_script(name: str):
+    """Import a hyphenated script from scripts/ as a module."""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build() -> dict:
+    """Rebuild every section of the index for this plugin and return the sections."""
+    plugin_root = plugin_index.PLUGIN_ROOT
+    plugin_index.index_path(plugin_root).unlink(missing_ok=True)
+    names, issues = load_script("session-start-hook").scan_skills(plugin_root, full=True)
+    load_script("skill-activation-hook").load_rule_table(plugin_root / "skill-rules.json")
+    load_script("sensitive-file-hook").get_classifier(plugin_root / "sensitive-file-patterns.json")
+    for issue in issues:
+        print(f"warning: {issue}", file=sys.stderr)
+    return plugin_index.load_index(plugin_root)
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+    sections = build()
+    for kind, source in sorted(sections):
+        data = sections[(kind, source)]["data"]
+        size = len(data["table"]) if kind == "rules" else len(data.get("patterns", data))
+        print(f"{kind:<10} {size:>5}  {source}")
+    print(f"wrote {plugin_index.index_path()}")
+
+
+if __name__ == "__main__":
+    main()
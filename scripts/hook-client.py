@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Hook client shim: forwards a hook event to the warm hook daemon.
+
+Usage (from plugin.json):
+    python hook-client.py <hook-script-name>      e.g. skill-activation-hook
+
+Streams the raw stdin payload to hook-daemon.py over a Unix socket and
+writes the daemon's reply to stdout unchanged. If the daemon is not
+running, not supported on this platform, or fails, the hook script runs
+in-process instead, so output is identical either way.
+
+The daemon is optional: it is only started (lazily, on SessionStart) when
+CLAUDE_LIBRARY_HOOK_DAEMON=1. Kept import-light on purpose — this runs
+on every hook event, so it uses the _socket builtin (the socket module
+pulls in enum/selectors) and plugin.json runs it with `python -S`.
+"""
+
+import _socket as socket
+import os
+import stat
+import sys
+
+HOOKS = ("skill-activation-hook", "sensitive-file-hook", "session-start-hook")
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CONNECT_TIMEOUT = 0.2
+REPLY_TIMEOUT = 5.0
+# Stdin is streamed to the daemon; up to this many bytes are kept so the
+# hook can still run in-process if the daemon fails mid-event.
+REPLAY_LIMIT = 1 << 20
+
+
+def daemon_enabled() -> bool:
+    return os.environ.get("CLAUDE_LIBRARY_HOOK_DAEMON") == "1" and hasattr(socket, "AF_UNIX")
+
+
+def socket_path() -> str:
+    """Per-user socket path, overridable with CLAUDE_LIBRARY_HOOKD_SOCKET.
+
+    The socket sits in a directory of its own, which hook-daemon.py creates
+    private to the user (0700), since $TMPDIR and /tmp are shared.
+    """
+    override = os.environ.get("CLAUDE_LIBRARY_HOOKD_SOCKET")
+    if override:
+        return override
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(base, f"claude-library-hookd-{os.getuid()}", "hookd.sock")
+
+
+def owned_socket(path: str) -> bool:
+    """Whether path is a socket owned by this user, not one another user put there."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def forward(hook: str, stdin):
+    """Stream one event from the binary stream stdin to the daemon.
+
+    Returns (stdout bytes, None) on success. On failure returns (None,
+    consumed), where consumed holds the bytes already read from stdin so
+    the caller can still run the hook in-process, or None if there were
+    more than REPLAY_LIMIT of them.
+    """
+    consumed = []
+    consumed_len = 0
+    path = socket_path()
+    if not owned_socket(path):
+        return None, b""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(REPLY_TIMEOUT)
+        sock.sendall(hook.encode("ascii") + b"\n")
+        while True:
+            chunk = stdin.read(65536)
+            if not chunk:
+                break
+            if consumed is not None:
+                consumed.append(chunk)
+                consumed_len += len(chunk)
+                if consumed_len > REPLAY_LIMIT:
+                    consumed = None
+            sock.sendall(chunk)
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return None, _replay(consumed)
+    finally:
+        sock.close()
+    reply = b"".join(chunks)
+    status, _, body = reply.partition(b"\n")
+    if status != b"ok":
+        return None, _replay(consumed)
+    return body, None
+
+
+def _replay(consumed):
+    return None if consumed is None else b"".join(consumed)
+
+
+def start_daemon():
+    """Spawn hook-daemon.py in the background, detached from this session."""
+    import subprocess
+
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.join(SCRIPTS_DIR, "hook-daemon.py"), "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def run_in_process(hook: str, replay: bytes = b""):
+    """Fallback: run the hook script's main() in this interpreter.
+
+    replay is stdin that was already consumed; it is put back in front of
+    the rest of stdin.
+    """
+    import io
+    import runpy
+
+    if replay:
+        sys.stdin = io.TextIOWrapper(io.BytesIO(replay + sys.stdin.buffer.read()), encoding="utf-8")
+    runpy.run_path(os.path.join(SCRIPTS_DIR, f"{hook}.py"), run_name="__main__")
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in HOOKS:
+        print(f"usage: hook-client.py {{{','.join(HOOKS)}}}", file=sys.stderr)
+        sys.exit(0)  # never block the session on a misconfigured hook
+    hook = sys.argv[1]
+    replay = b""
+
+    if daemon_enabled():
+        body, replay = forward(hook, sys.stdin.buffer)
+        if body is not None:
+            sys.stdout.buffer.write(body)
+            return
+        if hook == "session-start-hook":
+            start_daemon()
+        if replay is None:
+            return  # too much stdin consumed to replay; pass through silently
+
+    run_in_process(hook, replay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Optional long-lived hook server for the plugin's Python hooks.
+
+Keeps the hook modules imported and their state warm (compiled skill
+triggers, compiled sensitive-file patterns), so each event costs a
+socket round-trip instead of a fresh interpreter plus rule parsing.
+hook-client.py forwards events here and falls back to running the hook
+in-process whenever the daemon is unavailable.
+
+Usage:
+    python hook-daemon.py serve     # run in the foreground
+    python hook-daemon.py start     # spawn in the background if not running
+    python hook-daemon.py stop
+    python hook-daemon.py status
+
+Protocol (one event per connection): the client sends
+"<hook-script-name>\\n<raw stdin bytes>" and half-closes; the daemon
+replies "ok\\n<stdout bytes>" or "err\\n<message>". The hook name
+"__stop__" shuts the daemon down. The stdout bytes are
+exactly what the hook script would print, because both paths call the
+same run() function.
+
+The daemon exits after CLAUDE_LIBRARY_HOOKD_IDLE seconds without events
+(default 3600), and as soon as any hook script (or plugin_index.py)
+changes on disk so it never serves stale code.
+"""
+
+import importlib.util
+import io
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STOP_COMMAND = "__stop__"
+
+
+def load_script(name: str):
+    """Import a hyphenated script from scripts/ as a module."""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+client = load_script("hook-client")
+
+
+def _script_stamps() -> dict:
+    names = client.HOOKS + ("plugin_index",)
+    return {name: (SCRIPTS_DIR / f"{name}.py").stat().st_mtime_ns for name in names}
+
+
+class HookServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, idle_timeout: float):
+        self.hooks = {name: load_script(name) for name in client.HOOKS}
+        self.stamps = _script_stamps()
+        self.idle_timeout = idle_timeout
+        self.last_event = time.monotonic()
+        # Created 0600 by bind() itself: no window where other users can connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, HookHandler)
+        finally:
+            os.umask(umask)
+
+    def is_stale(self) -> bool:
+        try:
+            return _script_stamps() != self.stamps
+        except OSError:
+            return True
+
+
+class HookHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        server.last_event = time.monotonic()
+        hook = self.rfile.readline().strip().decode("ascii", errors="replace")
+        if not hook:
+            return  # liveness probe from is_running()
+
+        if hook == STOP_COMMAND:
+            self.wfile.write(b"ok\n")
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return
+        if hook not in server.hooks:
+            self.wfile.write(b"err\nunknown hook")
+            return
+        if server.is_stale():
+            self.wfile.write(b"err\nstale")
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return
+        try:
+            stdout = self.run_hook(server.hooks[hook])
+        except Exception as e:  # the client falls back to in-process execution
+            self.wfile.write(f"err\n{type(e).__name__}: {e}".encode("utf-8"))
+            return
+        finally:
+            while self.rfile.read(65536):  # let the client finish sending
+                pass
+        self.wfile.write(b"ok\n" + stdout.encode("utf-8"))
+
+    def run_hook(self, module) -> str:
+        """Run a hook on the request body, streaming it when the hook supports that."""
+        if not hasattr(module, "run_stream"):
+            return module.run(self.rfile.read().decode("utf-8", errors="replace"))
+        stream = io.TextIOWrapper(self.rfile, encoding="utf-8", errors="replace")
+        try:
+            return module.run_stream(stream)
+        finally:
+            stream.detach()
+
+
+def is_running(path: str) -> bool:
+    if not client.owned_socket(path):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(client.CONNECT_TIMEOUT)
+            sock.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+def make_socket_dir(path: str):
+    """Create the socket's directory, private to this user; exit if another user owns it."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if os.stat(directory).st_uid != os.getuid():
+        sys.exit(f"hook-daemon: {directory} belongs to another user; not serving there")
+
+
+def serve():
+    path = client.socket_path()
+    if is_running(path):
+        return
+    make_socket_dir(path)
+    try:
+        os.unlink(path)  # stale socket from a crashed daemon
+    except FileNotFoundError:
+        pass
+
+    idle_timeout = float(os.environ.get("CLAUDE_LIBRARY_HOOKD_IDLE", "3600"))
+    server = HookServer(path, idle_timeout)
+
+    def reap_when_idle():
+        while True:
+            time.sleep(min(30.0, idle_timeout))
+            if time.monotonic() - server.last_event > server.idle_timeout:
+                server.shutdown()
+                return
+
+    threading.Thread(target=reap_when_idle, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def stop():
+    path = client.socket_path()
+    if not is_running(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(STOP_COMMAND.encode("ascii") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        sock.recv(64)
+
+
+def main():
+    if not hasattr(socket, "AF_UNIX"):
+        print("hook-daemon requires Unix domain sockets; hooks run in-process on this platform.", file=sys.stderr)
+        sys.exit(1)
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "serve":
+        serve()
+    elif command == "start":
+        if not is_running(client.socket_path()):
+            client.start_daemon()
+    elif command == "stop":
+        stop()
+    elif command == "status":
+        running = is_running(client.socket_path())
+        print(f"hook-daemon {'running' if running else 'not running'} ({client.socket_path()})")
+    else:
+        print("usage: hook-daemon.py {serve,start,stop,status}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Batch mode shared by the hook scripts: many events, one process (stdlib only).
+
+Usage:
+    python scripts/sensitive-file-hook.py --batch [--workers N] < events.ndjson
+    python scripts/skill-activation-hook.py --batch [--workers N] < events.ndjson
+
+Reads one hook event (the JSON the hook gets on stdin) per line and writes
+one result per line, in input order: the hook's stdout for that event, or
+{} where the hook would stay silent. Blank lines are skipped. Compiled state
+(the rule index, the path classifier) is built once per process and shared
+by every record.
+
+With --workers, records are handed out to a process pool in chunks once
+the input is larger than one chunk; each worker builds the compiled state
+once. At most two chunks per worker are in flight, so memory stays bounded
+for arbitrarily long inputs.
+"""
+
+import argparse
+import collections
+import functools
+import itertools
+import os
+import sys
+
+BATCH_CHUNK = 1000
+SILENT = "{}"
+
+
+def iter_records(lines):
+    """Yield the non-blank lines of an NDJSON stream."""
+    for line in lines:
+        if line.strip():
+            yield line
+
+
+def _run_chunk(handle, lines):
+    return [handle(line) or SILENT for line in lines]
+
+
+def run_batch(handle, lines, workers=1, chunk_size=BATCH_CHUNK):
+    """Yield handle(record) for every record, "" results replaced by SILENT.
+
+    handle is the hook's single-event function (raw event text in, stdout
+    text out). workers=0 means one per CPU.
+    """
+    records = iter_records(lines)
+    first = list(itertools.islice(records, chunk_size))
+    if workers == 1 or len(first) < chunk_size:
+        yield from _run_chunk(handle, first)
+        yield from _run_chunk(handle, records)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    chunks = itertools.chain([first], iter(lambda: list(itertools.islice(records, chunk_size)), []))
+    run_chunk = functools.partial(_run_chunk, handle)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(run_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def batch_main(handle, argv=None):
+    """Parse the --batch command line and stream results from stdin to stdout."""
+    parser = argparse.ArgumentParser(description="Run a hook over newline-delimited JSON events.")
+    parser.add_argument("--batch", action="store_true", required=True)
+    parser.add_argument("--workers", type=int, default=1, help="process pool size (0 = one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK, help="records per worker task")
+    args = parser.parse_args(argv)
+    write = sys.stdout.write
+    for result in run_batch(handle, sys.stdin, args.workers, max(1, args.chunk_size)):
+        write(result)
+        write("\n")
@@ -0,0 +1,170 @@
+"""Precomputed plugin index shared by the hook scripts (stdlib only).
+
+Everything the hooks derive from plugin files at startup lives in one
+per-user index file (see index_path()), in sections keyed by
+(kind, source path):
+
+  ("skills", skills dir)       name -> {"stamp", "sha256", "frontmatter"}
+                               for each skills/*/SKILL.md
+  ("rules", skill-rules.json)  {"version", "sha256", "table"}: the validated
+                               rule table (triggers, literals, weights)
+  ("sensitive", patterns file) {"patterns"}: the merged sensitive-file
+                               pattern list
+
+`python scripts/build-plugin-index.py` builds every section up front (at
+install time, or in CI); otherwise each hook fills in its own section the
+first time it runs. The file is written with marshal, the fastest format
+the stdlib can load: a hook pays one stat, and one read + loads when the
+file changed since it last looked.
+
+A section records the (mtime_ns, size) stamps of the files it was derived
+from (and the hook script, where built-in data lives there);
+fresh_section() only returns it while they all still match, so a stale
+section costs a couple of stat() calls and a rebuild, never a wrong
+answer. The skills section is checked per skill by session-start-hook.py
+instead.
+
+Each write drops sections whose source directory is gone (a deleted
+checkout or temporary project) and keeps at most MAX_SECTIONS, the most
+recently written, so the index doesn't grow with every path a hook has
+ever seen.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+
+INDEX_VERSION = 1
+MAX_SECTIONS = 64
+PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+
+# index path -> (file stamp, index); see load_index()
+_LOADED = {}
+
+
+def cache_dir() -> Path:
+    """Return the per-user cache directory for derived plugin data."""
+    override = os.environ.get("CLAUDE_LIBRARY_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "claude-library"
+
+
+def file_stamp(path) -> list:
+    """Return [mtime_ns, size] for a file; raises OSError if it is missing."""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def source_stamps(paths) -> dict:
+    """Return {path: stamp or None if missing} for the files a section derives from."""
+    stamps = {}
+    for path in paths:
+        try:
+            stamps[str(path)] = file_stamp(path)
+        except OSError:
+            stamps[str(path)] = None
+    return stamps
+
+
+def index_path(plugin_root=None) -> Path:
+    """Return the index file for a plugin root, under cache_dir()."""
+    root = str(Path(plugin_root).resolve()) if plugin_root else str(PLUGIN_ROOT)
+    key = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+    return cache_dir() / f"plugin-index-{key}.marshal"
+
+
+def _header() -> list:
+    # marshal's format is only stable within one Python version.
+    return [INDEX_VERSION, list(sys.version_info[:2]), marshal.version]
+
+
+def load_index(plugin_root=None) -> dict:
+    """Return the sections of the index, {} if it is missing or unreadable.
+
+    Memoized on the file's stamp, so a long-lived process (see
+    hook-daemon.py) only reloads it after a write.
+    """
+    path = index_path(plugin_root)
+    try:
+        stamp = file_stamp(path)
+    except OSError:
+        return {}
+    cached = _LOADED.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    try:
+        with open(path, "rb") as f:
+            header, sections = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if header != _header() or not isinstance(sections, dict):
+        return {}
+    _LOADED[path] = (stamp, sections)
+    return sections
+
+
+def section(kind, source, plugin_root=None):
+    """Return section (kind, source) as {"sources": stamps, "data": ...}, or None."""
+    return load_index(plugin_root).get((kind, str(source)))
+
+
+def fresh_section(kind, source, stamps, plugin_root=None):
+    """Return the data of section (kind, source) if it was derived from files with these stamps.
+
+    stamps is source_stamps() of the files the section depends on, taken
+    before deriving anything from them.
+    """
+    found = section(kind, source, plugin_root)
+    if not found or found["sources"] != stamps:
+        return None
+    return found["data"]
+
+
+def update_sections(updates, plugin_root=None):
+    """Write {(kind, source): (stamps, data)} into the index, keeping the other sections.
+
+    Other sections are dropped when their source's directory no longer
+    exists, and the oldest ones beyond MAX_SECTIONS. The file is replaced
+    atomically; a concurrent writer may win, which only leaves one side's
+    sections to be rebuilt next time. Write failures are ignored: the
+    index is an optimization.
+    """
+    path = index_path(plugin_root)
+    updates = {(kind, str(source)): value for (kind, source), value in updates.items()}
+    # Oldest first: updated sections move to the end
+    sections = {
+        key: value for key, value in load_index(plugin_root).items()
+        if key not in updates and os.path.isdir(os.path.dirname(key[1]))
+    }
+    for key, (stamps, data) in updates.items():
+        sections[key] = {"sources": stamps, "data": data}
+    for key in list(sections)[:-MAX_SECTIONS]:
+        del sections[key]
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(marshal.dumps([_header(), sections]))
+        os.replace(tmp_path, path)
+        _LOADED[path] = (file_stamp(path), sections)
+    except OSError:
+        pass
+
+
+def parse_frontmatter(text: str):
+    """Return the "key: value" fields of a leading --- block, or None if there is none."""
+    if not text.startswith("---"):
+        return None
+    end = text.find("---", 3)
+    if end == -1:
+        return None
+    fields = {}
+    for line in text[3:end].strip().split("\n"):
+        if ":" in line:
+            key, value = line.split(":", 1)
+            fields[key.strip()] = value.strip()
+    return fields
@@ -0,0 +1,294 @@
+"""Token-budgeted packing of scanned repo content into the LLM prompt (stdlib only).
+
+run_analysis.py gathers candidate blocks (dependency manifests, context
+files, the directory listing, outlines of source files), each a dict:
+
+    {"section": one of SECTIONS, "path": str or None, "text": str,
+     "priority": float, "reasons": [str]}
+
+pack_context() fills a token budget greedily in priority order, truncating
+a block that doesn't fit when enough budget is left for it to be useful,
+and renders the chosen blocks in section order. It also returns the layout
+(what went in, at what cost, and why) as metadata.
+
+For repos too big for one prompt, split_packages() groups the blocks into
+per-package chunks plus the blocks every package shares, each packed to
+its own budget (see run_analysis.py's map-reduce strategy).
+
+Tokens are estimated locally by estimate_tokens(), a tokenizer-free count
+that never goes below a quarter of the characters, so long identifiers
+and random letter runs aren't packed as if they were short words.
+pack_context() only fills ESTIMATE_MARGIN of the budget by that count.
+"""
+
+import math
+import os
+import posixpath
+import re
+
+# Rendering order; the value is the section heading ("" = none)
+SECTIONS = {
+    "dependencies": "## Dependency Files\n",
+    "context": "",
+    "structure": "",
+    "sources": "## Source Outlines (ranked)\n",
+}
+
+# Budget for the repo context, by model name prefix (first match wins). Well
+# under each model's context window: past this, extra files add cost faster
+# than signal.
+MODEL_TOKEN_BUDGETS = [
+    ("gpt-5", 10_000),
+    ("gpt-4.1", 10_000),
+    ("o3", 10_000),
+    ("o1", 10_000),
+    ("gpt-4o", 8_000),
+    ("gpt-4", 4_000),
+]
+DEFAULT_TOKEN_BUDGET = 8_000
+
+# No single block may take more than its section's share of the budget (so
+# one long README or module can't crowd out everything else), and a block
+# is only truncated to fit when at least MIN_BLOCK_TOKENS are left.
+MAX_BLOCK_SHARE = {"dependencies": 0.25, "context": 0.2, "structure": 0.1, "sources": 0.08}
+MIN_BLOCK_TOKENS = 120
+# Share of the budget packed by estimate; the rest absorbs estimation error
+ESTIMATE_MARGIN = 0.8
+TRUNCATED = "... (truncated)"
+
+# Top-level directories that hold several packages: each child is a package
+PACKAGE_CONTAINERS = {"packages", "apps", "services", "libs", "modules", "plugins", "crates", "cmd", "internal", "src"}
+ROOT_PACKAGE = "(root)"
+SHARED = "(shared)"  # layout key of the shared blocks
+
+_PIECE = re.compile(r"[A-Za-z]+|[0-9]+|\n\s*|[ \t]{2,}|[^\sA-Za-z0-9]")
+
+ENTRY_POINTS = {
+    "main.py", "__main__.py", "app.py", "cli.py", "manage.py", "wsgi.py", "asgi.py", "server.py",
+    "index.js", "index.ts", "main.js", "main.ts", "app.js", "app.ts", "server.js", "server.ts",
+    "main.go", "main.rs", "lib.rs",
+}
+_PY_IMPORT = re.compile(r"^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w.]+(?:\s*,\s*[\w.]+)*))", re.M)
+_JS_IMPORT = re.compile(r"""(?:from\s+|require\(\s*|import\(\s*|import\s+)['"](\.{1,2}/[^'"]+)['"]""")
+_TEST_FILE = re.compile(r"(?:^|/)(?:tests?|__tests__)/|(?:^|/)test_[^/]*$|_test\.\w+$|\.(?:spec|test)\.\w+$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text without a tokenizer.
+
+    Letter runs cost one token per 8 letters (rounded up), digit runs one
+    per 3 digits, every other symbol one, and each newline (with the
+    indentation after it) or run of spaces one; the total is at least a
+    quarter of the characters (rounded up). Text joined at whitespace never
+    costs more than its parts, which pack_context() relies on. An
+    approximation, not a bound: see ESTIMATE_MARGIN.
+    """
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        first = piece[0]
+        if first.isalpha():
+            tokens += math.ceil(len(piece) / 8)
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return max(tokens, math.ceil(len(text) / 4))
+
+
+def token_budget(model: str) -> int:
+    """Return the repo-context token budget for a model."""
+    for name, budget in MODEL_TOKEN_BUDGETS:
+        if model.startswith(name):
+            return budget
+    return DEFAULT_TOKEN_BUDGET
+
+
+def render_block(block: dict, text: str | None = None) -> str:
+    """Render one block as it appears in the prompt."""
+    text = block["text"] if text is None else text
+    if block["section"] == "dependencies":
+        return f"### {block['path']}\n```\n{text}\n```\n"
+    if block["section"] == "context":
+        return f"## {block['path']}\n```\n{text}\n```\n"
+    if block["section"] == "structure":
+        return f"## Directory Structure\n```\n{text}\n```\n"
+    return f"### {block['path']}\n```\n{text}\n```\n"
+
+
+def _cost(rendered: str) -> int:
+    """Tokens a rendered block or heading adds to the packed text, with the newline it's joined by."""
+    return estimate_tokens(rendered + "\n")
+
+
+def _truncate(block: dict, budget: int):
+    """Return the longest head of block's lines that renders within budget, or None."""
+    overhead = _cost(render_block(block, TRUNCATED))
+    if overhead >= budget:
+        return None
+    kept, used = [], overhead
+    for line in block["text"].split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    if not kept:
+        return None
+    return "\n".join(kept + [TRUNCATED])
+
+
+def pack_context(blocks: list[dict], budget: int, recent=frozenset()) -> tuple[str, dict]:
+    """Pack blocks into budget tokens; return (text, layout).
+
+    The text is at most ESTIMATE_MARGIN of budget by estimate_tokens().
+    Paths in recent (recently changed files) get a priority boost. Blocks
+    are taken in priority order; one that doesn't fit is truncated when at
+    least MIN_BLOCK_TOKENS remain, else skipped in favour of smaller ones.
+    """
+    ranked = []
+    for block in blocks:
+        if block["path"] in recent:
+            block = {**block, "priority": block["priority"] + 20, "reasons": block["reasons"] + ["recently changed"]}
+        ranked.append(block)
+    ranked.sort(key=lambda b: -b["priority"])
+
+    limit = int(budget * ESTIMATE_MARGIN)
+    remaining = limit
+    chosen, skipped = [], []
+    opened = set()
+    for block in ranked:
+        heading = SECTIONS[block["section"]]
+        heading_cost = _cost(heading) if heading and block["section"] not in opened else 0
+        cap = max(MIN_BLOCK_TOKENS, int(limit * MAX_BLOCK_SHARE[block["section"]]))
+        available = min(remaining - heading_cost, cap)
+        rendered = render_block(block)
+        cost = _cost(rendered)
+        truncated = False
+        if cost > available:
+            text = _truncate(block, available) if available >= MIN_BLOCK_TOKENS else None
+            if text is None:
+                skipped.append(block["path"] or block["section"])
+                continue
+            rendered, truncated = render_block(block, text), True
+            cost = _cost(rendered)
+        opened.add(block["section"])
+        remaining -= cost + heading_cost
+        chosen.append((block, rendered, cost, truncated))
+
+    parts = []
+    entries = []
+    for section, heading in SECTIONS.items():
+        in_section = [c for c in chosen if c[0]["section"] == section]
+        if not in_section:
+            continue
+        if heading:
+            parts.append(heading)
+        if section == "sources":
+            in_section.sort(key=lambda c: -c[0]["priority"])
+        for block, rendered, cost, truncated in in_section:
+            parts.append(rendered)
+            entries.append({
+                "section": section,
+                "path": block["path"],
+                "tokens": cost,
+                "priority": block["priority"],
+                "reasons": block["reasons"],
+                "truncated": truncated,
+            })
+    text = "\n".join(parts)
+    layout = {"budget": budget, "used": estimate_tokens(text), "blocks": entries, "skipped": skipped}
+    return text, layout
+
+
+def package_of(path: str) -> str:
+    """Return the package a repo-relative path belongs to: its top-level directory,
+    or the first two levels under a PACKAGE_CONTAINERS directory."""
+    parts = path.split("/")
+    if len(parts) == 1:
+        return ROOT_PACKAGE
+    if parts[0] in PACKAGE_CONTAINERS and len(parts) > 2:
+        return "/".join(parts[:2])
+    return parts[0]
+
+
+def split_packages(blocks: list[dict]) -> tuple[list[dict], dict[str, list[dict]]]:
+    """Return (shared blocks, per-package chunks keyed by package_of() and sorted by name).
+
+    Source files and nested dependency manifests go to their package; root
+    manifests, context files and the directory listing are shared. They are
+    kept out of the chunks, so editing them doesn't change every chunk. A
+    repo with no packages is one ROOT_PACKAGE chunk of its shared blocks.
+    """
+    shared, packages = [], {}
+    for block in blocks:
+        path = block["path"]
+        if block["section"] in ("context", "structure") or package_of(path) == ROOT_PACKAGE and block["section"] != "sources":
+            shared.append(block)
+        else:
+            packages.setdefault(package_of(path), []).append(block)
+    if not packages:
+        return [], {ROOT_PACKAGE: shared}
+    return shared, {name: packages[name] for name in sorted(packages)}
+
+
+def _module_names(rel: str) -> list[str]:
+    """Return the dotted names a Python file can be imported as (every suffix of its path)."""
+    parts = os.path.splitext(rel)[0].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return [".".join(parts[i:]) for i in range(len(parts)) if parts[i:]]
+
+
+def score_sources(sources: list[dict]):
+    """Set priority and reasons on source-file blocks, in place.
+
+    Entry points and modules imported by many other files rank first (import
+    counts come from the import lines in the outlines: Python imports and relative
+    JS/TS imports); tests and deeply nested files rank lower.
+    """
+    by_module, by_stem = {}, {}
+    for block in sources:
+        rel = block["path"]
+        if rel.endswith(".py"):
+            for name in _module_names(rel):
+                by_module.setdefault(name, set()).add(rel)
+        by_stem[os.path.splitext(rel)[0]] = rel
+        if posixpath.basename(os.path.splitext(rel)[0]) == "index":
+            by_stem[posixpath.dirname(rel)] = rel
+
+    importers = {}
+    for block in sources:
+        rel, text = block["path"], block["text"]
+        targets = set()
+        if rel.endswith(".py"):
+            for match in _PY_IMPORT.finditer(text):
+                for name in (match.group(1) or match.group(2)).split(","):
+                    name = name.strip()
+                    while name and name not in by_module:
+                        name = name.rpartition(".")[0]
+                    targets |= by_module.get(name, set())
+        elif rel.endswith((".js", ".ts")):
+            for spec in _JS_IMPORT.findall(text):
+                target = posixpath.normpath(posixpath.join(posixpath.dirname(rel), spec))
+                target = by_stem.get(os.path.splitext(target)[0]) or by_stem.get(target)
+                if target:
+                    targets.add(target)
+        for target in targets - {rel}:
+            importers[target] = importers.get(target, 0) + 1
+
+    for block in sources:
+        rel = block["path"]
+        priority, reasons = 20.0, []
+        if posixpath.basename(rel) in ENTRY_POINTS:
+            priority += 40
+            reasons.append("entry point")
+        count = importers.get(rel, 0)
+        if count:
+            priority += min(30, 5 * count)
+            reasons.append(f"imported by {count} file(s)")
+        if _TEST_FILE.search(rel):
+            priority -= 15
+            reasons.append("test")
+        priority -= 2 * rel.count("/")
+        block["priority"] = priority
+        block["reasons"] = reasons or ["source file"]
@@ -0,0 +1,280 @@
+"""Offline dependency parsing for the upgrade analysis (stdlib only).
+
+parse_manifest() turns a pip requirements file, a pyproject.toml (PEP 621
+or Poetry) or a package.json into rows:
+
+    {"name": normalized name, "spec": version constraint as written ("" =
+     any), "pinned": exact version or None, "group": "main", "dev" or an
+     extra/group name, "ecosystem": "pypi" or "npm", "source": file path}
+
+assess() compares rows with a package-metadata snapshot, a JSON file made
+ahead of time so the scan itself never goes online:
+
+    {"pypi": {"requests": {"latest": "2.32.3", "note": "optional text"}},
+     "npm": {"react": {"latest": "18.3.1"}}}
+
+and says which rows need the model's judgment: outdated pins, ranges that
+hold back the latest version, packages with a note (deprecation,
+advisory...) and packages the snapshot doesn't know. A row whose
+constraint already admits the latest version is left out of the prompt.
+render_table() renders the rows that remain as a compact table.
+
+Usage (to inspect what the prompt gets):
+    python dependency_table.py requirements.txt package.json [--snapshot snapshot.json]
+"""
+
+import argparse
+import json
+import re
+import tomllib
+
+MANIFESTS = {"requirements.txt": "requirements", "pyproject.toml": "pyproject", "package.json": "npm"}
+
+_REQUIREMENT = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(.*)$")
+_CLAUSE = re.compile(r"^\s*(===|==|!=|~=|>=|<=|>|<)\s*(\S+)\s*$")
+_NPM_EXACT = re.compile(r"^=?v?(\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.-]+)?)$")
+_POETRY_EXACT = re.compile(r"^=*\s*(\d+(?:\.\d+)*)$")
+
+
+def normalize(name: str) -> str:
+    """Normalize a PyPI project name (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _row(name, spec, pinned, group, ecosystem, source) -> dict:
+    return {
+        "name": name, "spec": spec, "pinned": pinned, "group": group, "ecosystem": ecosystem, "source": source,
+    }
+
+
+def _expect(value, kind: type, where: str):
+    """Return value if it is a kind; raise ValueError naming the field if not."""
+    if not isinstance(value, kind):
+        raise ValueError(f"{where} should be a {kind.__name__}, not {type(value).__name__}")
+    return value
+
+
+def _pep508(requirement: str, group: str, source: str):
+    """Return a row for one PEP 508 requirement string, or None if it names no package."""
+    requirement = _expect(requirement, str, f"requirement in {group}").split(";", 1)[0].strip()  # drop environment markers
+    match = _REQUIREMENT.match(requirement)
+    if not match:
+        return None
+    name, spec = match.group(1), match.group(2).strip()
+    if spec.startswith("@"):
+        return _row(normalize(name), spec, None, group, "pypi", source)
+    spec = spec.strip("()").replace(" ", "")
+    pinned = None
+    for clause in filter(None, spec.split(",")):
+        op_version = _CLAUSE.match(clause)
+        if op_version and op_version.group(1) in ("==", "===") and "*" not in op_version.group(2):
+            pinned = op_version.group(2)
+    return _row(normalize(name), spec, pinned, group, "pypi", source)
+
+
+def parse_requirements(text: str, source: str) -> list[dict]:
+    """Parse a pip requirements file. Options (-r, -e, --index-url...) and bare URLs are skipped."""
+    rows = []
+    for line in text.replace("\\\n", " ").splitlines():
+        line = re.sub(r"(^|\s)#.*", "", line).strip()
+        if not line or line.startswith("-") or "://" in line.split("@", 1)[0]:
+            continue
+        row = _pep508(line, "main", source)
+        if row:
+            rows.append(row)
+    return rows
+
+
+def _poetry(name: str, value, group: str, source: str):
+    if normalize(name) == "python":
+        return None
+    if isinstance(value, list):  # multiple constraints, by marker
+        value = value[0] if value else ""
+    if isinstance(value, dict):
+        if "version" not in value:  # git, path or url dependency
+            where = next((f"{key} {value[key]}" for key in ("git", "path", "url") if key in value), "")
+            return _row(normalize(name), where, None, group, "pypi", source)
+        value = value["version"]
+    spec = _expect(value, str, f"poetry dependency {name}").replace(" ", "")
+    exact = _POETRY_EXACT.match(spec)
+    return _row(normalize(name), spec, exact.group(1) if exact else None, group, "pypi", source)
+
+
+def parse_pyproject(text: str, source: str) -> list[dict]:
+    """Parse PEP 621 [project] and Poetry [tool.poetry] dependencies from pyproject.toml."""
+    data = tomllib.loads(text)
+    rows = []
+    project = _expect(data.get("project", {}), dict, "[project]")
+    for requirement in _expect(project.get("dependencies", []), list, "project.dependencies"):
+        rows.append(_pep508(requirement, "main", source))
+    extras = _expect(project.get("optional-dependencies", {}), dict, "project.optional-dependencies")
+    for extra, requirements in extras.items():
+        requirements = _expect(requirements, list, f"project.optional-dependencies.{extra}")
+        rows.extend(_pep508(requirement, extra, source) for requirement in requirements)
+    for group, requirements in _expect(data.get("dependency-groups", {}), dict, "[dependency-groups]").items():
+        requirements = _expect(requirements, list, f"dependency-groups.{group}")
+        rows.extend(_pep508(r, group, source) for r in requirements if not isinstance(r, dict))  # skip include-group
+
+    poetry = _expect(_expect(data.get("tool", {}), dict, "[tool]").get("poetry", {}), dict, "[tool.poetry]")
+    tables = [("main", poetry.get("dependencies", {})), ("dev", poetry.get("dev-dependencies", {}))]
+    for group, table in _expect(poetry.get("group", {}), dict, "[tool.poetry.group]").items():
+        tables.append((group, _expect(table, dict, f"[tool.poetry.group.{group}]").get("dependencies", {})))
+    for group, table in tables:
+        table = _expect(table, dict, f"poetry {group} dependencies")
+        rows.extend(_poetry(name, value, group, source) for name, value in table.items())
+    return [row for row in rows if row]
+
+
+def parse_package_json(text: str, source: str) -> list[dict]:
+    """Parse npm dependencies, devDependencies, peerDependencies and optionalDependencies."""
+    data = _expect(json.loads(text), dict, "package.json")
+    rows = []
+    for key, group in (
+        ("dependencies", "main"), ("devDependencies", "dev"),
+        ("peerDependencies", "peer"), ("optionalDependencies", "optional"),
+    ):
+        for name, spec in _expect(data.get(key) or {}, dict, key).items():
+            spec = _expect(spec, str, f"{key}.{name}").strip()
+            exact = _NPM_EXACT.match(spec)
+            rows.append(_row(name, spec, exact.group(1) if exact else None, group, "npm", source))
+    return rows
+
+
+def parse_manifest(path: str, text: str):
+    """Return the rows of a supported manifest, or None if its format isn't supported.
+
+    Raises ValueError (tomllib and json errors included) for a malformed one.
+    """
+    kind = MANIFESTS.get(path.rsplit("/", 1)[-1])
+    if kind == "requirements":
+        return parse_requirements(text, path)
+    if kind == "pyproject":
+        return parse_pyproject(text, path)
+    if kind == "npm":
+        return parse_package_json(text, path)
+    return None
+
+
+def release(version: str) -> tuple:
+    """Return the leading numeric release of a version ("v1.2.3rc1" -> (1, 2, 3)); () if none."""
+    match = re.match(r"v?(\d+(?:\.\d+)*)", version.strip())
+    return tuple(int(part) for part in match.group(1).split(".")) if match else ()
+
+
+def _pad(version: tuple, length: int) -> tuple:
+    return version + (0,) * (length - len(version))
+
+
+def _below(a: tuple, b: tuple) -> bool:
+    length = max(len(a), len(b))
+    return _pad(a, length) < _pad(b, length)
+
+
+def upper_bound(spec: str, ecosystem: str):
+    """Return (exclusive upper bound, clause) a constraint puts on upgrades, or None if open-ended.
+
+    Understands the operators people use to cap versions: <, <=, ~=, ==X.*
+    for PyPI (and Poetry's ^ and ~), and ^, ~, <, <=, x-ranges for npm.
+    """
+    bounds = []
+    for clause in re.split(r"[,\s]+", spec.strip()):
+        if not clause:
+            continue
+        version = release(clause.lstrip("<>=!~^"))
+        if not version:
+            continue
+        if clause.startswith("<="):
+            bounds.append((version + (0, 1), clause))
+        elif clause.startswith("<"):
+            bounds.append((version, clause))
+        elif clause.startswith("~=") and len(version) > 1:
+            bounds.append((version[:-2] + (version[-2] + 1,), clause))
+        elif clause.startswith("^"):
+            index = next((i for i, part in enumerate(version) if part), len(version) - 1)
+            bounds.append((version[:index] + (version[index] + 1,), clause))
+        elif clause.startswith("~") and not clause.startswith("~="):
+            index = 1 if len(version) > 1 or ecosystem == "npm" else 0
+            bounds.append((version[:index] + (version[index] + 1,) if index < len(version) else (version[0] + 1,), clause))
+        elif clause.startswith("==") and clause.endswith(".*") or re.match(r"^\d+(\.\d+)*\.[x*]$", clause):
+            bounds.append((version[:-1] + (version[-1] + 1,), clause))
+    return min(bounds, key=lambda bound: _pad(bound[0], 8)) if bounds else None
+
+
+def assess(row: dict, snapshot: dict) -> tuple[str, str | None]:
+    """Return (status, latest version) for a row against a snapshot.
+
+    Statuses needing judgment: "outdated (major|minor|patch)", "held back
+    by <clause>", "note: ..." and "unknown". "current" (pinned to the latest)
+    and "ok" (the constraint admits the latest) don't.
+    """
+    info = snapshot.get(row["ecosystem"], {}).get(row["name"])
+    if not info or not info.get("latest"):
+        return "unknown", None
+    latest = info["latest"]
+    if info.get("note"):
+        return f"note: {info['note']}", latest
+    target = release(latest)
+    if row["pinned"]:
+        pinned = release(row["pinned"])
+        if not _below(pinned, target):
+            return "current", latest
+        length = max(len(pinned), len(target))
+        level = next(i for i, (a, b) in enumerate(zip(_pad(pinned, length), _pad(target, length))) if a != b)
+        return f"outdated ({('major', 'minor', 'patch')[min(level, 2)]})", latest
+    bound = upper_bound(row["spec"], row["ecosystem"])
+    if bound and not _below(target, bound[0]):
+        return f"held back by {bound[1]}", latest
+    return "ok", latest
+
+
+def needs_judgment(status: str) -> bool:
+    return status not in ("current", "ok")
+
+
+def render_table(rows: list[dict], snapshot: dict | None = None) -> str:
+    """Render rows as a compact table for the prompt.
+
+    With a snapshot, only rows needing judgment are listed, with their
+    latest version and status, and a first line counts the rest.
+    """
+    if snapshot is None:
+        lines = [f"{len(rows)} dependencies", "name | spec | pinned | group"]
+        lines += [f"{r['name']} | {r['spec'] or '(any)'} | {r['pinned'] or '-'} | {r['group']}" for r in rows]
+        return "\n".join(lines)
+    assessed = [(row, *assess(row, snapshot)) for row in rows]
+    flagged = [(row, status, latest) for row, status, latest in assessed if needs_judgment(status)]
+    lines = [
+        f"{len(rows)} dependencies, {len(rows) - len(flagged)} up to date or within range (omitted)",
+        "name | spec | pinned | group | latest | status",
+    ]
+    lines += [
+        f"{r['name']} | {r['spec'] or '(any)'} | {r['pinned'] or '-'} | {r['group']} | {latest or '?'} | {status}"
+        for r, status, latest in flagged
+    ]
+    return "\n".join(lines)
+
+
+def load_snapshot(path) -> dict:
+    """Load a package-metadata snapshot, normalizing PyPI names."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        "pypi": {normalize(name): info for name, info in (data.get("pypi") or {}).items()},
+        "npm": dict(data.get("npm") or {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the dependency table the upgrade analysis gets.")
+    parser.add_argument("manifests", nargs="+")
+    parser.add_argument("--snapshot", default=None, help="Package-metadata snapshot (JSON)")
+    args = parser.parse_args()
+    snapshot = load_snapshot(args.snapshot) if args.snapshot else None
+    for path in args.manifests:
+        with open(path, encoding="utf-8") as f:
+            rows = parse_manifest(path.replace("\\", "/"), f.read())
+        print(f"### {path}\n{render_table(rows, snapshot) if rows is not None else '(unsupported format)'}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Git-based change detection for incremental repo scans (stdlib only).
+
+A snapshot records the git object id of every entry in the top two levels
+of HEAD (a tree id changes whenever anything below it changes), the HEAD
+commit, and the working-tree changes git status reports on top of it.
+Comparing two snapshots tells run_analysis.scan_repo_incremental() which
+of those entries changed without reading any file: the cost is one
+`git ls-tree` of the top two levels plus a `git status`, and works on
+shallow clones, where last week's commit is not available to diff against.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+from pathlib import Path
+
+SNAPSHOT_DEPTH = 2
+LS_TREE_BATCH = 500
+RECENT_COMMITS = 20
+
+
+def _git(repo_path, *args) -> str:
+    result = subprocess.run(
+        ["git", "--literal-pathspecs", "-C", str(repo_path), *args],
+        capture_output=True, text=True, encoding="utf-8", errors="surrogateescape", check=True,
+    )
+    return result.stdout
+
+
+def _ls_tree(repo_path, pathspecs=()) -> dict:
+    entries = {}
+    output = _git(repo_path, "ls-tree", "-z", "HEAD", "--", *pathspecs)
+    for record in output.split("\0"):
+        if record:
+            meta, path = record.split("\t", 1)
+            mode, kind, oid = meta.split(" ")
+            entries[path] = [kind, oid]
+    return entries
+
+
+def prefix(path: str, depth: int = SNAPSHOT_DEPTH) -> str:
+    """Return the first depth components of a "/"-separated path."""
+    return "/".join(path.rstrip("/").split("/")[:depth])
+
+
+def _in_skipped_dir(path: str, skip_dirs) -> bool:
+    """Whether a git status path is in (or, ending in "/", is) a directory named in skip_dirs."""
+    parts = path.split("/")
+    return any(part in skip_dirs for part in parts[:-1])
+
+
+def git_snapshot(repo_path, skip_dirs=frozenset()):
+    """Return {"head", "entries", "dirty"} for a git work tree, or None if git can't tell.
+
+    Only the top of a work tree qualifies (status paths are relative to it).
+    entries maps each path in the top SNAPSHOT_DEPTH levels of HEAD to
+    [type, object id]. dirty maps each working-tree change (staged,
+    unstaged or untracked, as git status reports it) to its status code,
+    leaving out changes in directories named in skip_dirs, which the scan
+    never enters (git itself already leaves out .gitignore matches).
+    """
+    try:
+        head, toplevel = _git(repo_path, "rev-parse", "HEAD", "--show-toplevel").split("\n")[:2]
+        if Path(toplevel).resolve() != Path(repo_path).resolve():
+            return None
+        entries = _ls_tree(repo_path)
+        dirs = [path + "/" for path, (kind, _) in entries.items() if kind == "tree"]
+        for i in range(0, len(dirs), LS_TREE_BATCH):
+            entries.update(_ls_tree(repo_path, dirs[i:i + LS_TREE_BATCH]))
+        status = _git(repo_path, "status", "--porcelain=v1", "-z").split("\0")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    dirty = {}
+    records = iter(status)
+    for record in records:
+        if not record:
+            continue
+        code, path = record[:2], record[3:]
+        if not _in_skipped_dir(path, skip_dirs):
+            dirty[path] = code
+        if "R" in code or "C" in code:
+            source = next(records, "")  # the rename/copy source
+            if not _in_skipped_dir(source, skip_dirs):
+                dirty[source] = "D "
+    return {"head": head, "entries": entries, "dirty": dirty}
+
+
+def diff_snapshots(old: dict, new: dict) -> tuple[set, set]:
+    """Return (changed, added_or_removed) entry paths between two snapshots.
+
+    Paths are at most SNAPSHOT_DEPTH levels deep; a working-tree change
+    deeper down marks its ancestors at each level as changed. Paths that
+    were dirty in the old snapshot count as changed too, since their state
+    then wasn't what HEAD recorded.
+    """
+    old_entries, new_entries = old["entries"], new["entries"]
+    added_removed = set(old_entries.keys() ^ new_entries.keys())
+    changed = added_removed | {p for p in old_entries.keys() & new_entries.keys() if old_entries[p] != new_entries[p]}
+    for snapshot in (old, new):
+        for path, code in snapshot["dirty"].items():
+            for depth in range(1, SNAPSHOT_DEPTH + 1):
+                changed.add(prefix(path, depth))
+            shallow = path.rstrip("/").count("/") < SNAPSHOT_DEPTH
+            if shallow and ("?" in code or "A" in code or "D" in code):
+                added_removed.add(path.rstrip("/"))
+    changed.discard("")
+    return changed, added_removed
+
+
+def recent_files(repo_path, commits: int = RECENT_COMMITS) -> set:
+    """Return the files touched by the last few commits or uncommitted, or an empty set without git.
+
+    On a shallow clone only the commits that were fetched count.
+    """
+    try:
+        log = _git(repo_path, "-c", "log.showRoot=false", "log", f"-{commits}", "--name-only", "--format=", "-z")
+        status = _git(repo_path, "status", "--porcelain=v1", "-z", "--untracked-files=all")
+    except (OSError, subprocess.CalledProcessError):
+        return set()
+    recent = {path.strip("\n") for path in log.split("\0") if path.strip("\n")}
+    recent.update(record[3:] for record in status.split("\0") if len(record) > 3 and record[2] == " ")
+    return recent
+
+
+def tree_paths(*snapshots) -> set:
+    """Return the paths known to be directories in any of the snapshots."""
+    trees = set()
+    for snapshot in snapshots:
+        trees.update(p for p, (kind, _) in snapshot["entries"].items() if kind == "tree")
+        for path in snapshot["dirty"]:
+            parts = path.rstrip("/").split("/")
+            trees.update("/".join(parts[:depth]) for depth in range(1, len(parts)))
+            if path.endswith("/"):
+                trees.add(path.rstrip("/"))
+    return trees
+
+
+def manifest_file(manifest_dir: Path, repo_path: Path) -> Path:
+    """Return the scan manifest for a repo path under manifest_dir."""
+    key = hashlib.sha1(str(Path(repo_path).resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(manifest_dir) / f"scan-{key}.json"
+
+
+def load_manifest(path: Path, version: int):
+    """Return the manifest at path, or None if it is missing, unreadable or another version."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != version:
+        return None
+    return manifest
+
+
+def save_manifest(path: Path, manifest: dict):
+    """Write the manifest atomically; failures are ignored, it is an optimization."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(manifest))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
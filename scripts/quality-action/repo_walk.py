@@ -0,0 +1,141 @@
+"""Pruned, lazy directory walker for run_analysis.py (stdlib only).
+
+walk_files() yields a repo's files depth-first in name order (the order
+sorted(rglob("*")) gave), but decides about each directory before entering
+it: skip dirs and anything matched by a .gitignore or .claudeignore are
+never listed. It is a generator, so a caller that only needs a sample stops
+the walk as soon as it has enough.
+
+Ignore files use gitignore syntax: "#" comments, "!" negation, a trailing
+"/" for directories only, a leading or inner "/" to anchor a pattern to the
+ignore file's directory, and "*", "?", "[...]" and "**" wildcards. Rules in
+deeper ignore files and later lines win, and a file inside an ignored
+directory can't be re-included, as with git.
+"""
+
+import os
+import re
+
+IGNORE_FILES = (".gitignore", ".claudeignore")
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) to a regex body."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            if body[0] in "!^":
+                body = "^" + body[1:]
+            out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def parse_ignore(text: str) -> list:
+    """Return (regex, negate, dir_only) rules for the lines of an ignore file.
+
+    Each regex matches a path relative to the ignore file's directory.
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line.strip("/"):
+            continue
+        anchored = "/" in line
+        body = _translate(line.lstrip("/"))
+        regex = re.compile(("^" if anchored else "^(?:.*/)?") + body + "$")
+        rules.append((regex, negate, dir_only))
+    return rules
+
+
+def _load_rules(directory: str, ignore_files) -> list:
+    rules = []
+    for name in ignore_files:
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                rules.extend(parse_ignore(f.read()))
+        except OSError:
+            pass
+    return rules
+
+
+def is_ignored(rel: str, is_dir: bool, rule_sets) -> bool:
+    """Apply (base, rules) sets, outermost first, to a "/"-separated repo-relative path."""
+    ignored = False
+    for base, rules in rule_sets:
+        sub = rel[len(base):]
+        for regex, negate, dir_only in rules:
+            if (is_dir or not dir_only) and regex.match(sub):
+                ignored = not negate
+    return ignored
+
+
+def walk_files(root, skip_dirs=frozenset(), ignore_files=IGNORE_FILES):
+    """Yield (relative path, absolute path) for every file under root that isn't pruned.
+
+    Directories named in skip_dirs are never entered, nor are symlinks to
+    directories. Relative paths use "/" separators.
+    """
+    root = os.fspath(root)
+    # Each frame: (entries iterator, rel prefix, rule sets in effect)
+    root_rules = _load_rules(root, ignore_files)
+    stack = [(iter(_sorted_entries(root)), "", [("", root_rules)] if root_rules else [])]
+    while stack:
+        entries, prefix, rule_sets = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        rel = prefix + entry.name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            if entry.name in skip_dirs or (rule_sets and is_ignored(rel, True, rule_sets)):
+                continue
+            rules = _load_rules(entry.path, ignore_files)
+            child_sets = rule_sets + [(rel + "/", rules)] if rules else rule_sets
+            stack.append((iter(_sorted_entries(entry.path)), rel + "/", child_sets))
+        elif not (rule_sets and is_ignored(rel, False, rule_sets)):
+            try:
+                if entry.is_file():
+                    yield rel, entry.path
+            except OSError:
+                pass
+
+
+def _sorted_entries(directory: str) -> list:
+    try:
+        with os.scandir(directory) as it:
+            return sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []
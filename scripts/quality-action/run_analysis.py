@@ -4,16 +4,69 @@ Weekly Quality Analysis — Simplified
 Authenticates to Azure Key Vault, scans the repo, calls Azure OpenAI,
 and outputs a markdown report for use as a GitHub issue body.
 
+With --mode both, the analyses run concurrently on a thread pool (see
+run_analyses()); the report keeps them in a fixed order.
+
+Completions are cached on disk (see ResponseCache), keyed by a hash of the
+model, prompts and generation parameters, so an unchanged repo gets its
+report without any API call. Key Vault secrets are cached too, encrypted
+(see secrets_provider.py).
+
+With --strategy map-reduce, the repo is split into per-package chunks
+(context_packer.split_packages()), each package is analyzed on its own and
+a final reduce call merges the findings (see run_map_reduce()). Chunk
+results are cached like any other response, so a re-run only re-maps the
+packages that changed. The context every package shares (root manifests,
+docs, the directory listing) goes to the reduce call only, so editing it
+re-runs the reduce but no map.
+
+The report is streamed (see ReportStream): each analysis's completion is
+written as it arrives, in report order, to stdout or to <output>.partial,
+which is renamed to --output once the report is complete.
+
+With --fleet, many repos are analyzed in one process (see run_fleet()):
+they are scanned on a process pool, share one client, and their LLM calls
+go through one RequestScheduler, which backs off on rate limits.
+
+Dependency manifests the scan can parse (requirements.txt, pyproject.toml,
+package.json) go into the prompt as a normalized table rather than as
+written (see dependency_table.py). With --package-snapshot, a local file of
+latest versions, packages already current are left out, so the upgrade
+analysis only gets the ones that need judgment.
+
+Source files go in as outlines (see source_outline.py): signatures,
+classes, decorators and imports rather than their first lines, so many more
+files fit the budget. Outlines are computed on a process pool and cached
+by file content.
+
 Usage:
     python run_analysis.py --repo-path /path/to/repo --mode both
     python run_analysis.py --repo-path /path/to/repo --mode upgrade --output report.md
+    python run_analysis.py --repo-path /path/to/repo --concurrency 1 --timeout 300
+    python run_analysis.py --repo-path /path/to/repo --refresh   # or --no-cache
+    python run_analysis.py --repo-path /path/to/repo --strategy map-reduce --concurrency 4
+    python run_analysis.py --repo-path /path/to/repo --mode upgrade --package-snapshot packages.json
+    python run_analysis.py --fleet repos.txt --output-dir reports/   # one path per line
 """
 
+from __future__ import annotations
+
 import argparse
+import cProfile
+import hashlib
 import io
+import itertools
+import json
+import multiprocessing
 import os
+import pstats
+import random
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Ensure UTF-8 output on Windows
 if sys.stdout.encoding != "utf-8":
@@ -27,40 +80,92 @@ try:
 except ImportError:
     pass
 
-from azure.identity import ClientSecretCredential, DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
-from openai import OpenAI
+from context_packer import DEFAULT_TOKEN_BUDGET, SHARED, pack_context, score_sources, split_packages, token_budget
+from dependency_table import load_snapshot, parse_manifest, render_table
+from repo_changes import (
+    diff_snapshots, git_snapshot, load_manifest, manifest_file, prefix, recent_files, save_manifest, tree_paths,
+)
+from repo_walk import IGNORE_FILES, walk_files
+from secrets_provider import get_secrets
+from source_outline import outline_files
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 # ---------------------------------------------------------------------------
 # Azure Auth
 # ---------------------------------------------------------------------------
 
-def get_client() -> OpenAI:
-    """Get OpenAI client via Key Vault or direct env vars."""
-    kv_url = os.environ.get("KEY_VAULT_ENDPOINT")
-    if kv_url:
-        client_id = os.environ.get("AZURE_CLIENT_ID")
-        tenant_id = os.environ.get("AZURE_TENANT_ID")
-        client_secret = os.environ.get("AZURE_CLIENT_SECRET")
+_clients = {}
+_clients_lock = threading.Lock()
 
-        if client_id and tenant_id and client_secret:
-            credential = ClientSecretCredential(tenant_id, client_id, client_secret)
-        else:
-            credential = DefaultAzureCredential()
 
-        kv = SecretClient(vault_url=kv_url, credential=credential)
-        api_key = kv.get_secret("AZURE-OPENAI-API-KEY").value
-        endpoint = kv.get_secret("AZURE-OPENAI-CHAT-ENDPOINT").value
-        return OpenAI(api_key=api_key, base_url=f"{endpoint.rstrip('/')}/openai/v1/")
+def get_client(cache_dir: Path | None = None) -> OpenAI:
+    """Get OpenAI client via Key Vault or direct env vars.
+
+    Key Vault secrets come from secrets_provider.get_secrets(): fetched
+    concurrently, kept in memory and, encrypted, under cache_dir/secrets.
+    Clients are cached per key and endpoint, so every caller in the process
+    shares one client and its HTTP connection pool.
 
-    if os.environ.get("AZURE_OPENAI_API_KEY"):
+    The Azure and OpenAI SDKs are imported lazily rather than at module
+    level: they take most of a second to import, which a fully cached run
+    skips.
+    """
+    kv_url = os.environ.get("KEY_VAULT_ENDPOINT")
+    if kv_url:
+        start = time.perf_counter()
+        key_material = os.environ.get("QUALITY_SECRETS_KEY") or os.environ.get("AZURE_CLIENT_SECRET")
+        secrets, source = get_secrets(kv_url, cache_dir and cache_dir / "secrets", key_material)
+        print(f"Credentials: from {source} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        api_key = secrets["AZURE-OPENAI-API-KEY"]
+        endpoint = secrets["AZURE-OPENAI-CHAT-ENDPOINT"]
+    elif os.environ.get("AZURE_OPENAI_API_KEY"):
         api_key = os.environ["AZURE_OPENAI_API_KEY"]
         endpoint = os.environ["AZURE_OPENAI_ENDPOINT"]
-        return OpenAI(api_key=api_key, base_url=f"{endpoint.rstrip('/')}/openai/v1/")
+    else:
+        print("Error: Set KEY_VAULT_ENDPOINT or AZURE_OPENAI_API_KEY + AZURE_OPENAI_ENDPOINT", file=sys.stderr)
+        sys.exit(1)
+
+    from openai import OpenAI
+
+    base_url = f"{endpoint.rstrip('/')}/openai/v1/"
+    with _clients_lock:
+        if (api_key, base_url) not in _clients:
+            _clients[api_key, base_url] = OpenAI(api_key=api_key, base_url=base_url)
+        return _clients[api_key, base_url]
+
+
+class LazyClient:
+    """Stands in for the OpenAI client and creates it on first use (thread-safe).
 
-    print("Error: Set KEY_VAULT_ENDPOINT or AZURE_OPENAI_API_KEY + AZURE_OPENAI_ENDPOINT", file=sys.stderr)
-    sys.exit(1)
+    A run whose every completion is cached never reaches Key Vault or the API.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        with self._lock:
+            if self._client is None:
+                self._client = self._factory()
+        return getattr(self._client, name)
+
+
+def connect(cache_dir: Path | None = None, phases: dict | None = None) -> OpenAI:
+    """Return the shared client, without retries of its own (see RequestScheduler).
+
+    The time taken (Key Vault included) is recorded as phases["auth"].
+    """
+    print("Connecting to Azure OpenAI...", file=sys.stderr)
+    start = time.perf_counter()
+    client = get_client(cache_dir).with_options(max_retries=0)
+    if phases is not None:
+        phases["auth"] = time.perf_counter() - start
+    return client
 
 
 # ---------------------------------------------------------------------------
@@ -77,70 +182,355 @@ CONTEXT_FILES = ["README.md", "CLAUDE.md", ".python-version", ".node-version"]
 SKIP_DIRS = {".git", "__pycache__", "node_modules", ".venv", "venv", "_quality-action", ".quality-reports"}
 
 
-def scan_repo(repo_path: Path) -> str:
-    """Scan repo and return a text summary for the LLM prompt."""
-    sections = []
+MAX_SOURCE_CANDIDATES = 500
+MAP_REDUCE_SOURCE_CANDIDATES = 5000  # each package gets its own budget, so read more
+MAX_FILE_CHARS = 64_000
+MAX_SOURCE_CHARS = 256_000  # source files are read whole (up to this) to be outlined
+MAX_DIR_CHILDREN = 100
+SOURCE_EXTS = {".py", ".js", ".ts", ".go", ".rs"}
+SCAN_MANIFEST_VERSION = 5
+OUTLINE_CACHE_MAX_MB = 50
+
+# Sections of the scan; see scan_repo_incremental() and context_packer.SECTIONS
+SCAN_SECTIONS = ("dependencies", "context", "structure", "sources")
 
-    # Dependency files (root + 1 level deep)
+
+# Files read by the scan in this process and their size (UTF-8), for the metrics
+SCAN_STATS = {"files": 0, "bytes": 0}
+
+
+def _read_head(path, max_lines=None, max_chars=MAX_FILE_CHARS) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        if max_lines is None:
+            text = f.read(max_chars)
+        else:
+            text = "".join(itertools.islice(f, max_lines))[:max_chars].rstrip("\n")
+    SCAN_STATS["files"] += 1
+    SCAN_STATS["bytes"] += len(text.encode("utf-8"))
+    return text
+
+
+def _block(section: str, path, text: str, priority: float, reason: str) -> dict:
+    return {"section": section, "path": path, "text": text, "priority": priority, "reasons": [reason]}
+
+
+def _dependency_text(fname: str, content: str, snapshot: dict | None) -> str:
+    """A manifest's dependency table, or its text if its format isn't parsed (or it is malformed)."""
+    try:
+        rows = parse_manifest(fname, content)
+    except ValueError:
+        rows = None
+    return content if rows is None else render_table(rows, snapshot)
+
+
+def scan_dependencies(repo_path: Path, snapshot: dict | None = None) -> list[dict]:
+    """Dependency files (root + 1 level deep), parsed into tables where possible.
+
+    With a package snapshot (see dependency_table.py), the tables only list
+    packages that need judgment.
+    """
     dep_files = {}
     for fname in DEPENDENCY_FILES:
         fpath = repo_path / fname
         if fpath.exists():
-            dep_files[fname] = fpath.read_text(encoding="utf-8", errors="replace")[:8000]
-    for subdir in repo_path.iterdir():
+            dep_files[fname] = _read_head(fpath)
+    for subdir in sorted(repo_path.iterdir()):
         if subdir.is_dir() and subdir.name not in SKIP_DIRS and not subdir.name.startswith("."):
             for fname in DEPENDENCY_FILES:
                 fpath = subdir / fname
                 if fpath.exists():
-                    dep_files[f"{subdir.name}/{fname}"] = fpath.read_text(encoding="utf-8", errors="replace")[:8000]
+                    dep_files[f"{subdir.name}/{fname}"] = _read_head(fpath)
+    return [
+        _block("dependencies", fname, _dependency_text(fname, content, snapshot), 100 - fname.count("/"), "dependency manifest")
+        for fname, content in dep_files.items()
+    ]
 
-    if dep_files:
-        sections.append("## Dependency Files\n")
-        for fname, content in dep_files.items():
-            sections.append(f"### {fname}\n```\n{content}\n```\n")
 
-    # Context files
+def scan_context_files(repo_path: Path) -> list[dict]:
+    """Context files (README, CLAUDE.md, version pins)."""
+    blocks = []
     for fname in CONTEXT_FILES:
         fpath = repo_path / fname
         if fpath.exists():
-            content = fpath.read_text(encoding="utf-8", errors="replace")[:4000]
-            sections.append(f"## {fname}\n```\n{content}\n```\n")
+            pin = fname.endswith("-version")
+            blocks.append(_block("context", fname, _read_head(fpath), 95 if pin else 90, "version pin" if pin else "project docs"))
+    return blocks
 
-    # Directory structure (top 2 levels)
-    sections.append("## Directory Structure\n```")
+
+def scan_structure(repo_path: Path) -> list[dict]:
+    """Directory structure (top 2 levels)."""
+    lines = []
     for entry in sorted(repo_path.iterdir(), key=lambda e: (not e.is_dir(), e.name)):
         if entry.name in SKIP_DIRS or entry.name.startswith("."):
             continue
         if entry.is_dir():
-            sections.append(f"{entry.name}/")
+            lines.append(f"{entry.name}/")
             try:
-                for child in sorted(entry.iterdir(), key=lambda e: e.name)[:15]:
-                    sections.append(f"  {child.name}")
+                children = sorted(child.name for child in os.scandir(entry))
             except PermissionError:
-                pass
+                children = []
+            lines.extend(f"  {name}" for name in children[:MAX_DIR_CHILDREN])
+            if len(children) > MAX_DIR_CHILDREN:
+                lines.append(f"  ... ({len(children) - MAX_DIR_CHILDREN} more)")
         else:
-            sections.append(entry.name)
-    sections.append("```\n")
-
-    # Sample source files (first 10, first 80 lines each)
-    source_exts = {".py", ".js", ".ts", ".go", ".rs"}
-    count = 0
-    source_section = ["## Source Files (sample)\n"]
-    for p in sorted(repo_path.rglob("*")):
-        if count >= 10:
+            lines.append(entry.name)
+    return [_block("structure", None, "\n".join(lines), 85, "directory structure")]
+
+
+def scan_sources(
+    repo_path: Path, max_sources: int | None = None, outlines: ResponseCache | None = None, workers: int = 1,
+) -> tuple[list[dict], list[str]]:
+    """Source-file candidates as outlines, ranked by score_sources(); also returns their paths.
+
+    The first max_sources (default MAX_SOURCE_CANDIDATES) source files in
+    walk order are read and outlined by source_outline.outline_files(), on
+    up to workers processes, reusing outlines cached in outlines. The walk
+    prunes SKIP_DIRS and .gitignore/.claudeignore matches before descending
+    and stops once enough candidates are found.
+    """
+    max_sources = max_sources or MAX_SOURCE_CANDIDATES
+    files = []
+    for rel, path in walk_files(repo_path, SKIP_DIRS):
+        if len(files) >= max_sources:
             break
-        if p.is_file() and p.suffix in source_exts and not any(s in str(p) for s in SKIP_DIRS):
+        if os.path.splitext(rel)[1] in SOURCE_EXTS:
             try:
-                lines = p.read_text(encoding="utf-8", errors="replace").splitlines()[:80]
-                rel = str(p.relative_to(repo_path))
-                source_section.append(f"### {rel}\n```\n{chr(10).join(lines)}\n```\n")
-                count += 1
+                files.append((rel, _read_head(path, max_chars=MAX_SOURCE_CHARS)))
             except Exception:
                 pass
-    if count > 0:
-        sections.extend(source_section)
+    blocks = [
+        _block("sources", rel, text, 0, "")
+        for (rel, _), text in zip(files, outline_files(files, outlines, workers))
+    ]
+    score_sources(blocks)
+    return blocks, [block["path"] for block in blocks]
+
+
+def collect_blocks(
+    repo_path: Path,
+    max_sources: int | None = None,
+    snapshot: dict | None = None,
+    outlines: ResponseCache | None = None,
+    workers: int = 1,
+) -> list[dict]:
+    """Scan every section and return the candidate blocks for pack_context()."""
+    sources, _ = scan_sources(repo_path, max_sources, outlines, workers)
+    return scan_dependencies(repo_path, snapshot) + scan_context_files(repo_path) + scan_structure(repo_path) + sources
+
+
+def scan_repo(repo_path: Path, budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """Scan repo and return a text summary for the LLM prompt, packed into budget tokens."""
+    return pack_context(collect_blocks(repo_path), budget, recent_files(repo_path))[0]
+
+
+def stale_sections(
+    changed: set, added_removed: set, trees: set, sampled: list[str], max_sources: int | None = None,
+) -> set:
+    """Return the SCAN_SECTIONS that entries changed by diff_snapshots() can affect."""
+    stale = set()
+    if any(p.rsplit("/", 1)[-1] in DEPENDENCY_FILES for p in changed):
+        stale.add("dependencies")
+    if changed & set(CONTEXT_FILES):
+        stale.add("context")
+    if added_removed:
+        stale.add("structure")
+    # The candidates are the first max_sources source files in walk
+    # order, so only a changed directory, source file or ignore file can alter
+    # them, and (once the list is full) only at or before the last candidate.
+    # A changed directory whose changed children are listed is judged by
+    # those children.
+    parents = {prefix(p, depth) for p in changed for depth in range(1, p.count("/") + 1)}
+    relevant = [
+        p for p in changed - parents
+        if p in trees or os.path.splitext(p)[1] in SOURCE_EXTS or p.rsplit("/", 1)[-1] in IGNORE_FILES
+    ]
+    last = sampled[-1].split("/") if len(sampled) >= (max_sources or MAX_SOURCE_CANDIDATES) else None
+    if any(last is None or p.split("/") <= last for p in relevant):
+        stale.add("sources")
+    return stale
+
+
+def describe_changes(old: dict, new: dict, changed: set) -> str:
+    """Summarize the top-level areas that changed between two git snapshots."""
+    trees = tree_paths(old, new)
+    areas = sorted({prefix(p, 1) for p in changed})
+    since = old["head"][:7] if old["head"] == new["head"] else f"{old['head'][:7]}..{new['head'][:7]}"
+    if not areas:
+        return f"no changes since the last scan ({since})"
+    names = ", ".join(f"`{a}/`" if a in trees else f"`{a}`" for a in areas)
+    return f"{len(areas)} area(s) changed since the last scan ({since}): {names}"
+
+
+def _snapshot_digest(package_snapshot: dict | None):
+    if package_snapshot is None:
+        return None
+    return hashlib.sha256(json.dumps(package_snapshot, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def scan_repo_incremental(
+    repo_path: Path,
+    manifest_dir: Path,
+    max_sources: int | None = None,
+    package_snapshot: dict | None = None,
+    outlines: ResponseCache | None = None,
+    workers: int = 1,
+) -> tuple[list[dict], str | None]:
+    """Return (collect_blocks() result, what changed since the previous scan or None).
+
+    The sections' blocks and a git snapshot (see repo_changes.py) are kept in a
+    per-repo manifest; only sections an entry they depend on changed are
+    rebuilt (the dependencies also when the package snapshot changed).
+    Without git or a previous manifest everything is rebuilt and there is
+    nothing to compare, so the summary is None.
+    """
+    path = manifest_file(manifest_dir, repo_path)
+    snapshot = git_snapshot(repo_path, SKIP_DIRS)
+    digest = _snapshot_digest(package_snapshot)
+    previous = load_manifest(path, SCAN_MANIFEST_VERSION) if snapshot else None
+    changes = None
+    if previous is None:
+        sections, sampled, stale = {}, [], set(SCAN_SECTIONS)
+    else:
+        sections, sampled = previous["sections"], previous["sampled"]
+        changed, added_removed = diff_snapshots(previous["snapshot"], snapshot)
+        trees = tree_paths(previous["snapshot"], snapshot)
+        stale = stale_sections(changed, added_removed, trees, sampled, max_sources)
+        if previous["max_sources"] != (max_sources or MAX_SOURCE_CANDIDATES):
+            stale.add("sources")
+        if previous["package_snapshot"] != digest:
+            stale.add("dependencies")
+        changes = describe_changes(previous["snapshot"], snapshot, changed)
+
+    builders = {"context": scan_context_files, "structure": scan_structure}
+    for name in stale:
+        if name == "sources":
+            sections[name], sampled = scan_sources(repo_path, max_sources, outlines, workers)
+        elif name == "dependencies":
+            sections[name] = scan_dependencies(repo_path, package_snapshot)
+        else:
+            sections[name] = builders[name](repo_path)
+
+    if snapshot and (previous is None or stale or snapshot != previous["snapshot"]):
+        save_manifest(path, {
+            "version": SCAN_MANIFEST_VERSION, "snapshot": snapshot, "sections": sections, "sampled": sampled,
+            "max_sources": max_sources or MAX_SOURCE_CANDIDATES, "package_snapshot": digest,
+        })
+    return [block for name in SCAN_SECTIONS for block in sections[name]], changes
+
+
+# ---------------------------------------------------------------------------
+# Response Cache
+# ---------------------------------------------------------------------------
+
+CACHE_VERSION = 1
+CACHE_TTL_DAYS = 30
+CACHE_MAX_MB = 50
+
+
+def default_cache_dir() -> Path:
+    """Return QUALITY_CACHE_DIR, else the per-user cache directory.
+
+    Responses go in llm-responses/ and scan manifests in scans/ below it.
+    """
+    override = os.environ.get("QUALITY_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "claude-library" / "quality-action"
+
+
+class ResponseCache:
+    """Disk cache of LLM completions, one JSON file per request hash.
+
+    Entries older than ttl seconds are ignored and pruned; prune() also
+    drops the least recently used entries once the cache exceeds max_bytes.
+    With read=False every request misses but the replies are still stored
+    (--refresh). Safe to share between threads.
+    """
+
+    def __init__(self, directory: Path, ttl: float, max_bytes: int, read: bool = True):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.read = read
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request: dict) -> str:
+        payload = json.dumps([CACHE_VERSION, request], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load(self, request: dict):
+        path = self._path(self.key(request))
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or time.time() - entry.get("created", 0) > self.ttl:
+            return None
+        return path, entry.get("content")
+
+    def contains(self, request: dict) -> bool:
+        """Return whether get() would hit, without counting it."""
+        return self.read and self._load(request) is not None
+
+    def get(self, request: dict):
+        """Return the cached reply for a request, or None."""
+        found = self._load(request) if self.read else None
+        with self._lock:
+            if found is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(found[0])  # LRU order for prune()
+        except OSError:
+            pass
+        return found[1]
+
+    def put(self, request: dict, content: str):
+        """Store a reply; write failures are ignored, the cache is an optimization."""
+        path = self._path(self.key(request))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "model": request.get("model"), "content": content}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def prune(self):
+        """Delete expired entries, then the least recently used ones beyond max_bytes."""
+        entries = []
+        now = time.time()
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+                if now - st.st_mtime > self.ttl:
+                    path.unlink()
+                else:
+                    entries.append((st.st_mtime, st.st_size, path))
+            except OSError:
+                pass
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
 
-    return "\n".join(sections)
+    def stats(self) -> str:
+        return f"LLM cache: {self.hits} hit(s), {self.misses} miss(es) ({self.directory})"
 
 
 # ---------------------------------------------------------------------------
@@ -160,6 +550,8 @@ Organize findings by priority:
 3. **Monitor** — minor versions behind, low impact
 4. **Accept** — intentionally pinned or no meaningful upgrade
 
+Parsed manifests are given as tables (name | spec | pinned | group, plus latest | status when known); packages the table omits are already current or within range.
+
 End with a brief summary count. Be concise — skip packages that are already current."""
 
 STRATEGIC_PROMPT = """You are a strategic technical advisor. Analyze this project's codebase and suggest improvements.
@@ -179,73 +571,840 @@ Organize findings by priority:
 Be specific — include file paths and concrete suggestions, not generic advice. Be concise."""
 
 
+# name -> (report section title, system prompt), in report order
+ANALYSES = {
+    "upgrade": ("Upgrade Analysis", UPGRADE_PROMPT),
+    "strategic": ("Strategic Analysis", STRATEGIC_PROMPT),
+}
+
+MODES = {
+    "upgrade": ["upgrade"],
+    "strategic": ["strategic"],
+    "both": ["upgrade", "strategic"],
+}
+
+# Map-reduce: appended to an analysis prompt for one package (map), then for
+# merging the per-package findings into the report (reduce)
+MAP_INSTRUCTIONS = """You are seeing one package of a larger repository: `{package}`. Report findings for this package only, as a flat markdown list of at most 10 bullets. Start each bullet with its priority in bold (**Do Now**, **Plan Soon**, **Monitor** or **Accept**) and name the files involved. No summary. If there is nothing worth reporting, reply "No findings"."""
+
+REDUCE_INSTRUCTIONS = """You are given the repository's shared context (root manifests, docs and layout) and findings from separate reviews of each package of the repository, not the package code itself. Merge them into one report in the structure above: deduplicate findings reported for several packages (naming every affected package once), keep the higher priority when reviews disagree, and leave out packages with no findings."""
+
+STRATEGIES = ("single", "map-reduce")
+MAP_CONCURRENCY = 4
+MAX_IN_FLIGHT = 64  # LLM requests in flight in a single-repo run; the thread pools bound it first
+
+
 # ---------------------------------------------------------------------------
-# Main
+# Analysis Engine
 # ---------------------------------------------------------------------------
 
-def call_llm(client: OpenAI, model: str, system_prompt: str, user_content: str) -> str:
-    """Call LLM and return markdown response."""
+def llm_request(model: str, system_prompt: str, user_content: str) -> dict:
+    """Return the chat.completions.create() arguments for one analysis."""
     is_gpt5_plus = any(tag in model for tag in ("gpt-5", "gpt-6", "o1", "o3"))
     token_param = {"max_completion_tokens": 4096} if is_gpt5_plus else {"max_tokens": 4096}
-
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
+    return {
+        "model": model,
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_content},
         ],
-        temperature=0.2,
+        "temperature": 0.2,
         **token_param,
+    }
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Return the delay a rate-limited response asked for, in seconds, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether an API error is worth retrying: 408, 409, 5xx, or a dropped connection (not a timeout)."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return "APIConnectionError" in names and "APITimeoutError" not in names
+
+
+class RequestScheduler:
+    """Runs LLM requests from any number of threads within one shared quota.
+
+    At most max_in_flight requests are sent at once. When one is rate limited
+    (HTTP 429), every caller holds off until the cooldown ends: the delay
+    the API asked for, else exponential backoff with jitter. The request is
+    then retried, up to max_retries times. Transient failures (see
+    _is_transient()) are retried too, up to TRANSIENT_RETRIES times, with
+    backoff for that request only. Use it with a client that doesn't retry
+    on its own (max_retries=0), so retries are coordinated and counted.
+
+    It also totals the token usage the API reports (record_usage()), for
+    the metrics file.
+    """
+
+    TRANSIENT_RETRIES = 2
+
+    def __init__(self, max_in_flight: int, max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def _wait_for_cooldown(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def call(self, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), retried with backoff while rate limited or failing transiently."""
+        transient = 0
+        for attempt in itertools.count():
+            self._wait_for_cooldown()
+            with self._slots:
+                self._wait_for_cooldown()
+                with self._lock:
+                    self.requests += 1
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    rate_limited = getattr(e, "status_code", None) == 429
+                    if rate_limited:
+                        retry = attempt < self.max_retries
+                    else:
+                        retry = _is_transient(e) and transient < self.TRANSIENT_RETRIES
+                        transient += 1
+                    if not retry:
+                        raise
+                    delay = _retry_after(e)
+            if delay is None:
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            with self._lock:
+                self.retries += 1
+                if rate_limited:
+                    self.rate_limited += 1
+                    self._resume_at = max(self._resume_at, time.monotonic() + delay)
+            if not rate_limited:
+                time.sleep(delay)
+
+    def record_usage(self, usage):
+        """Add a response's usage (prompt_tokens, completion_tokens) to the totals."""
+        with self._lock:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+    def stats(self) -> str:
+        return (
+            f"LLM requests: {self.requests} sent, {self.retries} retried ({self.rate_limited} rate limited), "
+            f"{self.prompt_tokens} prompt + {self.completion_tokens} completion tokens"
+        )
+
+
+def call_llm(
+    client: OpenAI,
+    model: str,
+    system_prompt: str,
+    user_content: str,
+    timeout: float | None = None,
+    cache: ResponseCache | None = None,
+    scheduler: RequestScheduler | None = None,
+    on_delta=None,
+) -> str:
+    """Call LLM and return markdown response, served from cache when possible.
+
+    timeout bounds each HTTP attempt in seconds (None = the client default);
+    when streaming, it bounds both the wait for each chunk and the whole
+    stream, which is abandoned with APITimeoutError once timeout seconds
+    have passed since the request was sent. With a scheduler, the
+    request waits for its turn, is retried on 429s and transient errors, and
+    its token usage is counted; a streamed reply holds its turn until the
+    last chunk is read. With on_delta, the completion is streamed
+    and on_delta(text) is called with each piece as it arrives (a cached
+    response is one piece); a stream that breaks off raises after the pieces
+    received so far were passed on, and is not cached.
+    """
+    request = llm_request(model, system_prompt, user_content)
+    if cache:
+        cached = cache.get(request)
+        if cached is not None:
+            if on_delta:
+                on_delta(cached)
+            return cached
+
+    options = {"timeout": timeout} if timeout is not None else {}
+    if on_delta:
+        options.update(stream=True, stream_options={"include_usage": True})
+    broken = []
+
+    def complete(**kwargs):
+        # The stream is read here so a scheduler holds its slot until the reply is complete
+        sent = time.monotonic()
+        response = client.chat.completions.create(**kwargs)
+        if not on_delta:
+            return response.choices[0].message.content, getattr(response, "usage", None)
+        pieces, usage = [], None
+        with response:
+            try:
+                for chunk in response:
+                    if timeout is not None and time.monotonic() - sent > timeout:
+                        from openai import APITimeoutError
+                        raise APITimeoutError(request=response.response.request)
+                    usage = getattr(chunk, "usage", None) or usage
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        pieces.append(text)
+                        on_delta(text)
+            except Exception as e:
+                if not pieces:
+                    raise
+                broken.append(e)  # pieces were passed on, so don't let the scheduler retry
+        return "".join(pieces), usage
+
+    content, usage = scheduler.call(complete, **request, **options) if scheduler else complete(**request, **options)
+    if broken:
+        raise broken[0]
+    if scheduler and usage:
+        scheduler.record_usage(usage)
+    if cache and content is not None:
+        cache.put(request, content)
+    return content
+
+
+def run_analyses(
+    client: OpenAI,
+    model: str,
+    names: list[str],
+    user_content: str,
+    concurrency: int | None = None,
+    timeout: float | None = None,
+    cache: ResponseCache | None = None,
+    scheduler: RequestScheduler | None = None,
+    stream: ReportStream | None = None,
+) -> list[str]:
+    """Run the named analyses and return their report sections in the order of names.
+
+    Up to concurrency analyses (default: all of them) are in flight at once;
+    the OpenAI client is thread-safe, so they share it. An analysis that
+    fails or times out becomes an "> Error:" section instead of failing
+    the report. With a stream, the completions are streamed into it.
+    """
+    sections = {name: stream.section() for name in names} if stream else {}
+
+    def run_one(name):
+        title, prompt = ANALYSES[name]
+        print(f"Running {name} analysis ({model})...", file=sys.stderr)
+        with StreamedSection(f"---\n\n### {title}\n\n", stream, sections.get(name)) as section:
+            on_delta = section.on_delta if stream else None
+            try:
+                section.end(call_llm(client, model, prompt, user_content, timeout, cache, scheduler, on_delta))
+            except Exception as e:
+                print(f"{title.split()[0]} analysis failed: {e}", file=sys.stderr)
+                section.fail(e)
+        return section.text
+
+    workers = max(1, min(concurrency or len(names), len(names)))
+    if workers == 1:
+        return [run_one(name) for name in names]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_one, names))
+
+
+def run_map_reduce(
+    client: OpenAI,
+    model: str,
+    names: list[str],
+    chunks: dict[str, str],
+    concurrency: int | None = None,
+    timeout: float | None = None,
+    cache: ResponseCache | None = None,
+    scheduler: RequestScheduler | None = None,
+    stream: ReportStream | None = None,
+    shared: str = "",
+) -> list[str]:
+    """Run the named analyses over per-package chunks and return their report sections.
+
+    chunks maps package name -> packed package context, and shared is the
+    packed context all packages share, which only the reduce calls get (so
+    a change to it doesn't invalidate any map result). Every (analysis,
+    package) pair is a map call, with up to concurrency (default
+    MAP_CONCURRENCY) in flight; then one reduce call per analysis merges
+    its packages' findings. Each call goes through the response cache on
+    its own, so an unchanged package is never re-mapped, and the reduce is
+    only repeated when some package's findings changed. A failed map call
+    is noted in the section; the analysis fails only when every one does.
+    With a stream, the reduce completions are streamed into it.
+    """
+    jobs = [(name, package) for name in names for package in chunks]
+    sections = {name: stream.section() for name in names} if stream else {}
+
+    def map_one(job):
+        name, package = job
+        title, prompt = ANALYSES[name]
+        system_prompt = f"{prompt}\n\n{MAP_INSTRUCTIONS.format(package=package)}"
+        try:
+            return call_llm(client, model, system_prompt, chunks[package], timeout, cache, scheduler), None
+        except Exception as e:
+            print(f"{title.split()[0]} analysis of {package} failed: {e}", file=sys.stderr)
+            return None, e
+
+    def reduce_one(name):
+        title, prompt = ANALYSES[name]
+        findings = [(package, mapped[name, package]) for package in chunks]
+        failed = [f"`{package}` ({error})" for package, (_, error) in findings if error is not None]
+        merged = "\n".join(
+            f"## Package `{package}`\n\n{result}\n" for package, (result, error) in findings if error is None
+        )
+        if shared:
+            merged = f"# Project Context\n\n{shared}\n# Package Findings\n\n{merged}"
+        note = f"\n> Not covered, the package review failed: {', '.join(failed)}\n" if failed else ""
+        with StreamedSection(f"---\n\n### {title}\n\n", stream, sections.get(name), note) as section:
+            if not merged:
+                section.fail("every package review failed")
+                return section.text
+            print(f"Merging {name} findings from {len(findings) - len(failed)} package(s)...", file=sys.stderr)
+            try:
+                system_prompt = f"{prompt}\n\n{REDUCE_INSTRUCTIONS}"
+                on_delta = section.on_delta if stream else None
+                section.end(call_llm(client, model, system_prompt, merged, timeout, cache, scheduler, on_delta))
+            except Exception as e:
+                print(f"{title.split()[0]} analysis failed: {e}", file=sys.stderr)
+                section.fail(e)
+        return section.text
+
+    workers = max(1, min(concurrency or MAP_CONCURRENCY, len(jobs)))
+    print(f"Mapping {len(names)} analysis(es) over {len(chunks)} package(s) ({model}, {workers} at a time)...", file=sys.stderr)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        mapped = dict(zip(jobs, pool.map(map_one, jobs)))
+        return list(pool.map(reduce_one, names))
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+class ReportStream:
+    """Writes a report as its sections arrive, in report order (thread-safe).
+
+    Sections are opened in report order with section(); text written to the
+    first unfinished one goes straight out, text for later ones is held
+    until every section before them is finished. Sections are joined with a
+    blank line, as "\\n".join() would.
+
+    With an output path, text goes to <output>.partial (flushed on every
+    write, so it can be tailed) and close() renames that to the output in
+    one step: readers of the output never see half a report. Without one,
+    text goes to stdout.
+    """
+
+    def __init__(self, output: Path | None = None):
+        self.output = Path(output) if output else None
+        self._parts = []
+        self._queue = []  # [buffered pieces, finished] per section, in report order
+        self._head = 0  # first unfinished section
+        self._lock = threading.Lock()
+        if self.output:
+            self.partial = self.output.with_name(self.output.name + ".partial")
+            self.partial.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.partial, "w", encoding="utf-8")
+        else:
+            self._file = sys.stdout
+
+    def _emit(self, text: str):
+        self._parts.append(text)
+        self._file.write(text)
+        self._file.flush()
+
+    def section(self) -> int:
+        """Open the next section and return its id, for write() and finish()."""
+        with self._lock:
+            self._queue.append([["\n"] if self._queue else [], False])
+            return len(self._queue) - 1
+
+    def write(self, text: str, section: int | None = None):
+        """Add text to a section (default: a new one, finished at once)."""
+        if section is None:
+            section = self.section()
+            self.write(text, section)
+            self.finish(section)
+            return
+        with self._lock:
+            self._queue[section][0].append(text)
+            self._drain()
+
+    def finish(self, section: int):
+        with self._lock:
+            self._queue[section][1] = True
+            self._drain()
+
+    def _drain(self):
+        while self._head < len(self._queue):
+            pieces, finished = self._queue[self._head]
+            for text in pieces:
+                self._emit(text)
+            pieces.clear()
+            if not finished:
+                return
+            self._head += 1
+
+    def close(self, incomplete: str | None = None) -> str:
+        """Flush what's left, finalize the output and return the whole report.
+
+        With incomplete (why the run stopped early), the sections received so
+        far are kept, unfinished ones included, and a note says the report is
+        incomplete.
+        """
+        with self._lock:
+            for entry in self._queue:
+                entry[1] = True
+            self._drain()
+            if incomplete:
+                self._emit(f"\n> Report incomplete: {incomplete}\n")
+            if self.output:
+                self._file.close()
+                os.replace(self.partial, self.output)
+            return "".join(self._parts)
+
+
+class StreamedSection:
+    """Builds one analysis's report section, streaming it into a ReportStream if given.
+
+    The heading is written up front and each completion piece as it comes
+    (on_delta); end() or fail() adds the rest. Leaving the with block
+    finishes the section in the stream. text is the section as a whole.
+    """
+
+    def __init__(self, heading: str, stream: ReportStream | None = None, section: int | None = None, note: str = ""):
+        self.stream, self.section, self.note = stream, section, note
+        self._pieces = []
+        self.on_delta(heading)
+
+    def on_delta(self, text: str):
+        self._pieces.append(text)
+        if self.section is not None:
+            self.stream.write(text, self.section)
+
+    def end(self, result: str):
+        self.on_delta(f"{result}\n" if len(self._pieces) == 1 else "\n")
+
+    def fail(self, error):
+        if len(self._pieces) > 1:
+            self.on_delta(f"\n\n> Error: {error} (the output above is incomplete)\n")
+        else:
+            self.on_delta(f"> Error: {error}\n")
+
+    @property
+    def text(self) -> str:
+        return "".join(self._pieces) + self.note
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.section is not None:
+            if self.note:
+                self.stream.write(self.note, self.section)
+            self.stream.finish(self.section)
+
+
+def prepare_context(
+    repo_path: Path, cache_dir: Path, args: argparse.Namespace, label: str = "", profile_path: Path | None = None,
+) -> dict:
+    """Scan a repo and pack its context: {"chunks", "shared", "layouts", "changes", "metrics"}.
+
+    chunks maps package name (None with the single strategy) to packed
+    context, and shared is the packed context the packages share (map-reduce
+    only, else None; layouts has it under SHARED); metrics has the scan's wall time, files and bytes read, blocks
+    and packed tokens. With profile_path, cProfile stats for the scan are
+    dumped there. Runs in a worker process in fleet mode, so it takes and
+    returns only picklable values.
+    """
+    start, before = time.perf_counter(), dict(SCAN_STATS)
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        context = _scan_and_pack(repo_path, cache_dir, args, f"[{label}] " if label else "")
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f"Scan profile written to: {profile_path}", file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    layouts = context["layouts"].values() if args.strategy == "map-reduce" else [context["layouts"]]
+    context["metrics"] = {
+        "seconds": round(time.perf_counter() - start, 3),
+        "files": SCAN_STATS["files"] - before["files"],
+        "bytes": SCAN_STATS["bytes"] - before["bytes"],
+        "blocks": context.pop("blocks"),
+        "context_tokens": sum(layout["used"] for layout in layouts),
+    }
+    return context
+
+
+def outline_cache(cache_dir: Path, args: argparse.Namespace) -> ResponseCache | None:
+    """The cache of source outlines (see source_outline.py), or None with --no-cache."""
+    if args.no_cache:
+        return None
+    return ResponseCache(
+        cache_dir / "outlines", ttl=args.cache_ttl_days * 86400, max_bytes=OUTLINE_CACHE_MAX_MB * 1024 * 1024,
     )
-    return response.choices[0].message.content
 
 
+def _scan_and_pack(repo_path: Path, cache_dir: Path, args: argparse.Namespace, log: str) -> dict:
+    print(f"{log}Scanning: {repo_path}", file=sys.stderr)
+    map_reduce = args.strategy == "map-reduce"
+    max_sources = MAP_REDUCE_SOURCE_CANDIDATES if map_reduce else None
+    package_snapshot = load_snapshot(args.package_snapshot) if args.package_snapshot else None
+    outlines = outline_cache(cache_dir, args)
+    # A fleet already scans repos in parallel processes; one repo's outlines use the CPUs itself
+    workers = 1 if args.fleet else args.scan_workers or os.cpu_count() or 1
+    changes = None
+    if args.no_cache or args.full_scan:
+        blocks = collect_blocks(repo_path, max_sources, package_snapshot, outlines, workers)
+    else:
+        blocks, changes = scan_repo_incremental(
+            repo_path, cache_dir / "scans", max_sources, package_snapshot, outlines, workers,
+        )
+        if changes:
+            print(f"{log}Changes: {changes}", file=sys.stderr)
+    if outlines and outlines.hits + outlines.misses:
+        print(f"{log}Outlines: {outlines.hits} cached, {outlines.misses} computed", file=sys.stderr)
+    budget = args.token_budget or token_budget(args.model)
+    recent = recent_files(repo_path)
+    chunks, layouts, shared = {}, {}, None
+    if map_reduce:
+        shared_blocks, packages = split_packages(blocks)
+        shared, layouts[SHARED] = pack_context(shared_blocks, budget, recent)
+    else:
+        packages = {None: blocks}
+    for package, package_blocks in packages.items():
+        chunks[package], layouts[package] = pack_context(package_blocks, budget, recent)
+    for package, layout in layouts.items():
+        truncated = sum(entry["truncated"] for entry in layout["blocks"])
+        print(
+            f"{log}Context{f' ({package})' if map_reduce else ''}: ~{layout['used']}/{budget} tokens, "
+            f"{len(layout['blocks'])} blocks ({truncated} truncated, {len(layout['skipped'])} left out)",
+            file=sys.stderr,
+        )
+    return {
+        "chunks": chunks, "shared": shared, "layouts": layouts if map_reduce else layouts[None], "changes": changes,
+        "blocks": len(blocks),
+    }
+
+
+def build_report(
+    client: OpenAI,
+    args: argparse.Namespace,
+    context: dict,
+    cache: ResponseCache | None = None,
+    scheduler: RequestScheduler | None = None,
+    stream: ReportStream | None = None,
+) -> str:
+    """Run the analyses for one repo's prepare_context() result and return the report.
+
+    With a stream, the report is also written into it as it is generated;
+    the caller closes the stream.
+    """
+    names = MODES[args.mode]
+    chunks = context["chunks"]
+    header = f"## Weekly Quality Report\n\n**Date**: {__import__('datetime').date.today()}\n**Model**: {args.model}\n"
+    if args.strategy == "map-reduce":
+        header += f"**Strategy**: map-reduce over {len(chunks)} package(s)\n"
+    if context["changes"]:
+        header += f"**Changes**: {context['changes']}\n"
+    if stream:
+        stream.write(header)
+    options = (args.concurrency, args.timeout, cache, scheduler, stream)
+    if args.strategy == "map-reduce":
+        sections = run_map_reduce(client, args.model, names, chunks, *options, context["shared"])
+    else:
+        sections = run_analyses(client, args.model, names, chunks[None], *options)
+    return "\n".join([header, *sections])
+
+
+METRICS_VERSION = 1
+PROFILE_TOP = 15
+
+
+def metrics_file(output) -> Path:
+    """Return the metrics file next to a report: report.md -> report.metrics.json."""
+    return Path(output).with_suffix(".metrics.json")
+
+
+def run_metrics(args: argparse.Namespace, phases: dict, scheduler: RequestScheduler, cache) -> dict:
+    """Return the metrics fields common to single-repo and fleet runs."""
+    return {
+        "version": METRICS_VERSION,
+        "date": str(__import__("datetime").date.today()),
+        "model": args.model,
+        "mode": args.mode,
+        "strategy": args.strategy,
+        "phases": {name: round(seconds, 3) for name, seconds in phases.items()},
+        "llm": {
+            **scheduler.summary(),
+            "cache_hits": cache.hits if cache else 0,
+            "cache_misses": cache.misses if cache else 0,
+        },
+    }
+
+
+def write_metrics(path: Path, metrics: dict):
+    Path(path).write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+    print(f"Metrics written to: {path}", file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# Fleet
+# ---------------------------------------------------------------------------
+
+FLEET_CONCURRENCY = 8
+FLEET_SUMMARY = "fleet-summary.md"
+FLEET_METRICS = "fleet-metrics.json"
+
+
+def read_fleet_manifest(path: Path) -> list[tuple[str, Path]]:
+    """Return (name, repo path) for each line of a fleet manifest.
+
+    One repo path per line, relative to the manifest's directory; blank
+    lines and "#" comments are skipped. Names are the directory names,
+    suffixed with -2, -3... when they repeat.
+    """
+    repos, seen = [], {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        repo_path = (Path(path).parent / line).resolve()
+        name = repo_path.name or "repo"
+        seen[name] = seen.get(name, 0) + 1
+        repos.append((name if seen[name] == 1 else f"{name}-{seen[name]}", repo_path))
+    return repos
+
+
+def _scan_fleet_repo(name: str, repo_path: Path, cache_dir: Path, args: argparse.Namespace) -> dict:
+    if not repo_path.is_dir():
+        raise FileNotFoundError(f"{repo_path} is not a directory")
+    profile_path = None
+    if args.profile:
+        Path(args.profile).mkdir(parents=True, exist_ok=True)
+        profile_path = Path(args.profile) / f"{name}.scan.prof"
+    return prepare_context(repo_path, cache_dir, args, label=name, profile_path=profile_path)
+
+
+def run_fleet(args: argparse.Namespace, cache_dir: Path, cache: ResponseCache | None) -> int:
+    """Analyze every repo in the --fleet manifest; return the exit status.
+
+    Repos are scanned on a process pool; as each scan finishes, its
+    analyses start on a thread pool, so scanning overlaps with LLM calls.
+    All repos share one client (one connection pool, one Key Vault
+    lookup), and one RequestScheduler bounds the requests in flight
+    (--concurrency) and backs off for everyone on a 429. A repo that fails
+    to scan or report is recorded in the summary without stopping the
+    others. Writes <output-dir>/<name>.md per repo, fleet-summary.md and
+    fleet-metrics.json; returns 1 if any repo failed.
+    """
+    start = time.perf_counter()
+    phases = {}
+    repos = read_fleet_manifest(args.fleet)
+    output_dir = Path(args.output_dir or ".quality-reports")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    slots = args.concurrency or FLEET_CONCURRENCY
+    scheduler = RequestScheduler(slots)
+    client = LazyClient(lambda: connect(cache_dir, phases))
+    results = {name: {"path": repo_path, "status": "pending"} for name, repo_path in repos}
+
+    def report_one(name, context):
+        report_start = time.perf_counter()
+        stream = ReportStream(output_dir / f"{name}.md")
+        try:
+            build_report(client, args, context, cache, scheduler, stream)
+            report = stream.close()
+        except Exception as e:
+            print(f"[{name}] report failed: {e}", file=sys.stderr)
+            stream.close(incomplete=str(e))
+            return {"status": f"failed: {e}", "report": f"{name}.md"}
+        errors = report.count("> Error:")
+        return {
+            "status": f"{errors} analysis error(s)" if errors else "ok",
+            "report": f"{name}.md",
+            "changes": context["changes"],
+            "report_seconds": round(time.perf_counter() - report_start, 3),
+        }
+
+    workers = max(1, min(args.scan_workers or os.cpu_count() or 1, len(repos)))
+    print(f"Fleet: {len(repos)} repo(s), {workers} scan worker(s)", file=sys.stderr)
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as scanners, \
+            ThreadPoolExecutor(max(1, min(slots, len(repos)))) as reporters:
+        scans = {scanners.submit(_scan_fleet_repo, name, path, cache_dir, args): name for name, path in repos}
+        reports = {}
+        for future in as_completed(scans):
+            name = scans[future]
+            try:
+                context = future.result()
+            except Exception as e:
+                print(f"[{name}] scan failed: {e}", file=sys.stderr)
+                results[name]["status"] = f"failed: {e}"
+                continue
+            results[name]["scan"] = context["metrics"]
+            reports[reporters.submit(report_one, name, context)] = name
+        for future in as_completed(reports):
+            results[reports[future]].update(future.result())
+
+    (output_dir / FLEET_SUMMARY).write_text(fleet_summary(args, results, scheduler), encoding="utf-8")
+    print(f"Reports written to: {output_dir}", file=sys.stderr)
+    print(scheduler.stats(), file=sys.stderr)
+    phases["total"] = time.perf_counter() - start
+    repos_metrics = {
+        name: {key: value for key, value in r.items() if key != "path"} | {"path": str(r["path"])}
+        for name, r in results.items()
+    }
+    write_metrics(output_dir / FLEET_METRICS, {**run_metrics(args, phases, scheduler, cache), "repos": repos_metrics})
+    return 1 if any(r["status"].startswith("failed") for r in results.values()) else 0
+
+
+def fleet_summary(args: argparse.Namespace, results: dict, scheduler: RequestScheduler) -> str:
+    """Render the fleet summary: one table row per repo, in manifest order."""
+    failed = sum(r["status"].startswith("failed") for r in results.values())
+    lines = [
+        "## Fleet Quality Summary\n",
+        f"**Date**: {__import__('datetime').date.today()}",
+        f"**Model**: {args.model}",
+        f"**Repos**: {len(results)} ({failed} failed)",
+        f"**Requests**: {scheduler.requests} sent, {scheduler.retries} retried ({scheduler.rate_limited} rate limited)\n",
+        "| Repo | Status | Report | Changes |",
+        "|------|--------|--------|---------|",
+    ]
+    for name, r in results.items():
+        report = f"[{r['report']}]({r['report']})" if r.get("report") else "-"
+        status = r["status"].replace("|", "\\|").replace("\n", " ")
+        lines.append(f"| `{name}` | {status} | {report} | {r.get('changes') or '-'} |")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
 def main():
     parser = argparse.ArgumentParser(description="Weekly Quality Analysis")
-    parser.add_argument("--repo-path", required=True)
-    parser.add_argument("--mode", choices=["upgrade", "strategic", "both"], default="both")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--repo-path")
+    target.add_argument("--fleet", help="File listing repo paths, one per line, to analyze in one run")
+    parser.add_argument("--mode", choices=list(MODES), default="both")
     parser.add_argument("--model", default="gpt-5.2")
     parser.add_argument("--output", default=None, help="Output file path (default: stdout)")
+    parser.add_argument("--output-dir", default=None, help="Fleet reports directory (default: .quality-reports)")
+    parser.add_argument("--scan-workers", type=int, default=None,
+                        help="Processes that outline source files, or scan repos with --fleet (default: CPU count)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="single",
+                        help="single: one prompt per analysis; map-reduce: one per package, then a merge")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"Max LLM calls in flight (default: all analyses, {MAP_CONCURRENCY} for map-reduce, "
+                             f"{FLEET_CONCURRENCY} across a fleet)")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-request LLM timeout in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the response cache or scan manifest")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached responses but store the new ones")
+    parser.add_argument("--full-scan", action="store_true", help="Rescan every section instead of only what git says changed")
+    parser.add_argument("--cache-dir", default=None, help="Cache directory (default: $QUALITY_CACHE_DIR or ~/.cache)")
+    parser.add_argument("--token-budget", type=int, default=None, help="Repo context budget in tokens (default: per model)")
+    parser.add_argument("--package-snapshot", default=None,
+                        help="Latest package versions (JSON, see dependency_table.py); current packages are left out")
+    parser.add_argument("--layout", default=None, help="Write the packed context layout (JSON) to this path")
+    parser.add_argument("--metrics", default=None,
+                        help="Write timing/token metrics (JSON) to this path (default: next to --output)")
+    parser.add_argument("--profile", default=None,
+                        help="Dump cProfile stats for the scan to this path (a directory with --fleet)")
+    parser.add_argument("--cache-ttl-days", type=float, default=CACHE_TTL_DAYS)
+    parser.add_argument("--cache-max-mb", type=float, default=CACHE_MAX_MB)
     args = parser.parse_args()
 
+    cache_dir = Path(args.cache_dir) if args.cache_dir else default_cache_dir()
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(
+            cache_dir / "llm-responses",
+            ttl=args.cache_ttl_days * 86400,
+            max_bytes=int(args.cache_max_mb * 1024 * 1024),
+            read=not args.refresh,
+        )
+
+    outlines = outline_cache(cache_dir, args)
+    if args.fleet:
+        status = run_fleet(args, cache_dir, cache)
+        if cache:
+            cache.prune()
+            outlines.prune()
+            print(cache.stats(), file=sys.stderr)
+        sys.exit(status)
+
     repo_path = Path(args.repo_path).resolve()
     if not repo_path.exists():
         print(f"Error: {repo_path} does not exist", file=sys.stderr)
         sys.exit(1)
 
-    print(f"Scanning: {repo_path}", file=sys.stderr)
-    repo_context = scan_repo(repo_path)
-
-    print("Connecting to Azure OpenAI...", file=sys.stderr)
-    client = get_client()
+    start = time.perf_counter()
+    phases = {}
+    context = prepare_context(repo_path, cache_dir, args, profile_path=args.profile)
+    phases["scan"] = context["metrics"]["seconds"]
+    if args.layout:
+        Path(args.layout).write_text(json.dumps(context["layouts"], indent=2), encoding="utf-8")
 
-    report_parts = [f"## Weekly Quality Report\n\n**Date**: {__import__('datetime').date.today()}\n**Model**: {args.model}\n"]
-
-    if args.mode in ("upgrade", "both"):
-        print(f"Running upgrade analysis ({args.model})...", file=sys.stderr)
-        try:
-            result = call_llm(client, args.model, UPGRADE_PROMPT, repo_context)
-            report_parts.append(f"---\n\n### Upgrade Analysis\n\n{result}\n")
-        except Exception as e:
-            report_parts.append(f"---\n\n### Upgrade Analysis\n\n> Error: {e}\n")
-            print(f"Upgrade analysis failed: {e}", file=sys.stderr)
-
-    if args.mode in ("strategic", "both"):
-        print(f"Running strategic analysis ({args.model})...", file=sys.stderr)
-        try:
-            result = call_llm(client, args.model, STRATEGIC_PROMPT, repo_context)
-            report_parts.append(f"---\n\n### Strategic Analysis\n\n{result}\n")
-        except Exception as e:
-            report_parts.append(f"---\n\n### Strategic Analysis\n\n> Error: {e}\n")
-            print(f"Strategic analysis failed: {e}", file=sys.stderr)
+    scheduler = RequestScheduler(args.concurrency or MAX_IN_FLIGHT)
+    client = LazyClient(lambda: connect(cache_dir, phases))
+    stream = ReportStream(args.output)
+    analysis_start = time.perf_counter()
+    try:
+        build_report(client, args, context, cache, scheduler, stream)
+    except BaseException as e:
+        stream.close(incomplete=f"{type(e).__name__}: {e}".rstrip(": "))
+        raise
+    report = stream.close()
+    phases["analysis"] = time.perf_counter() - analysis_start
+    if cache:
+        cache.prune()
+        outlines.prune()
+        print(cache.stats(), file=sys.stderr)
+    print(scheduler.stats(), file=sys.stderr)
+    phases["total"] = time.perf_counter() - start
 
-    report = "\n".join(report_parts)
+    metrics_path = args.metrics or (metrics_file(args.output) if args.output else None)
+    if metrics_path:
+        write_metrics(metrics_path, {
+            **run_metrics(args, phases, scheduler, cache),
+            "repo": str(repo_path),
+            "scan": context["metrics"],
+            "analysis_errors": report.count("> Error:"),
+        })
 
     if args.output:
-        Path(args.output).write_text(report, encoding="utf-8")
         print(f"Report written to: {args.output}", file=sys.stderr)
     else:
-        print(report)
+        print()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+"""Key Vault secrets for run_analysis.py, cached in memory and encrypted on disk.
+
+get_secrets() returns the Azure OpenAI key and endpoint. A Key Vault
+lookup costs a credential handshake plus one round trip per secret, before
+any analysis can start, so:
+
+- both secrets are fetched concurrently, on one SecretClient;
+- they are kept in this process's memory, so every repo of a fleet run
+  (and every client built in it) shares one lookup;
+- and in an encrypted file below the cache directory, valid for
+  SECRETS_TTL seconds, so back-to-back runs skip Key Vault entirely.
+
+The file is encrypted with Fernet (from `cryptography`, which azure-identity
+already requires), under a key derived from QUALITY_SECRETS_KEY or else
+AZURE_CLIENT_SECRET: whoever can decrypt it could read the vault anyway.
+Without either, nothing is written to disk.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SECRET_NAMES = ("AZURE-OPENAI-API-KEY", "AZURE-OPENAI-CHAT-ENDPOINT")
+SECRETS_TTL = 3600
+
+_memory = {}  # vault url -> (expires at, secrets)
+_memory_lock = threading.Lock()
+
+
+def secrets_file(cache_dir: Path, vault_url: str) -> Path:
+    """Return the encrypted secrets file for a vault under cache_dir."""
+    key = hashlib.sha1(vault_url.rstrip("/").encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"vault-{key}.bin"
+
+
+def _fernet(key_material: str, vault_url: str):
+    from cryptography.fernet import Fernet
+
+    digest = hashlib.sha256(b"quality-action-secrets\0" + f"{key_material}\0{vault_url}".encode("utf-8")).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+
+def _read_file(path: Path, key_material: str, vault_url: str, ttl: float):
+    from cryptography.fernet import InvalidToken
+
+    try:
+        token = path.read_bytes()
+        secrets = json.loads(_fernet(key_material, vault_url).decrypt(token, ttl=int(ttl)))
+    except (OSError, ValueError, InvalidToken):
+        return None
+    return secrets if isinstance(secrets, dict) and set(SECRET_NAMES) <= secrets.keys() else None
+
+
+def _write_file(path: Path, key_material: str, vault_url: str, secrets: dict):
+    """Write the encrypted secrets atomically, readable by the owner only; failures are ignored."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(_fernet(key_material, vault_url).encrypt(json.dumps(secrets).encode("utf-8")))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def credential_from_env():
+    """Return a service principal credential if AZURE_CLIENT_* are set, else DefaultAzureCredential."""
+    from azure.identity import ClientSecretCredential, DefaultAzureCredential
+
+    client_id = os.environ.get("AZURE_CLIENT_ID")
+    tenant_id = os.environ.get("AZURE_TENANT_ID")
+    client_secret = os.environ.get("AZURE_CLIENT_SECRET")
+    if client_id and tenant_id and client_secret:
+        return ClientSecretCredential(tenant_id, client_id, client_secret)
+    return DefaultAzureCredential()
+
+
+def fetch_secrets(vault_url: str, credential=None) -> dict:
+    """Fetch SECRET_NAMES from Key Vault concurrently and return {name: value}."""
+    from azure.keyvault.secrets import SecretClient
+
+    client = SecretClient(vault_url=vault_url, credential=credential or credential_from_env())
+    with client, ThreadPoolExecutor(len(SECRET_NAMES)) as pool:
+        values = pool.map(lambda name: client.get_secret(name).value, SECRET_NAMES)
+        return dict(zip(SECRET_NAMES, values))
+
+
+def get_secrets(
+    vault_url: str,
+    cache_dir: Path | None = None,
+    key_material: str | None = None,
+    credential=None,
+    ttl: float = SECRETS_TTL,
+) -> tuple[dict, str]:
+    """Return ({name: value} for SECRET_NAMES, where they came from).
+
+    The source is "memory", "disk" or "vault". The disk cache is used only
+    with a cache_dir and key_material (see the module docstring).
+    """
+    vault_url = vault_url.rstrip("/")
+    with _memory_lock:
+        expires, secrets = _memory.get(vault_url, (0.0, None))
+        if secrets is not None and time.monotonic() < expires:
+            return secrets, "memory"
+
+        path = secrets_file(cache_dir, vault_url) if cache_dir and key_material else None
+        source = "disk"
+        secrets = _read_file(path, key_material, vault_url, ttl) if path else None
+        if secrets is None:
+            secrets, source = fetch_secrets(vault_url, credential), "vault"
+            if path:
+                _write_file(path, key_material, vault_url, secrets)
+        _memory[vault_url] = (time.monotonic() + ttl, secrets)
+        return secrets, source
+
@@ -0,0 +1,205 @@
+"""Compact outlines of source files for the LLM prompt (stdlib only).
+
+A file's first lines are mostly imports and a docstring; its outline shows
+its structure instead, at a fraction of the tokens:
+
+    \"\"\"Item routes.\"\"\"
+    from fastapi import APIRouter, HTTPException
+    from .storage import items
+    router = APIRouter(prefix='/items')
+    @router.get('/{item_id}')
+    async def get_item(item_id: int) -> Item
+    class Item(BaseModel):
+        name: str
+        def total(self, qty: int = 1) -> float
+
+Python files are parsed with `ast`. JS/TS, Go and Rust files, and Python
+that doesn't parse, get a line-based outline: the import, declaration and
+route/attribute lines, without bodies. Import lines are kept as written, so
+context_packer.score_sources() still sees the import graph.
+
+outline_files() outlines many files, on a process pool when there are
+enough of them, and caches outlines by content hash in any cache with
+run_analysis.ResponseCache's get()/put().
+"""
+
+import ast
+import hashlib
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+OUTLINE_VERSION = 1
+MAX_LINE_CHARS = 160
+MAX_VALUE_CHARS = 60
+MAX_CLASS_MEMBERS = 30
+MAX_OUTLINE_LINES = 200
+FALLBACK_HEAD_LINES = 20  # for files with nothing to outline, e.g. scripts
+POOL_MIN_FILES = 64  # below this, starting worker processes costs more than it saves
+POOL_CHUNK = 16
+
+_DECLARATION = {
+    ".js": re.compile(
+        r"^\s*(?:import\b|export\b|(?:async\s+)?function\b|class\b|interface\b|type\s+\w+|enum\b"
+        r"|(?:const|let|var)\s+\w+\s*=\s*(?:async\b|function\b|\([^)]*\)\s*(?::[^=]+)?=>|\w+\s*=>|require\(|\w+\()"
+        r"|\w+\.(?:get|post|put|patch|delete|use|route|all)\(\s*['\"`/])"
+    ),
+    ".go": re.compile(r"^(?:package|import|func|type|var|const)\b"),
+    ".rs": re.compile(
+        r"^\s*(?:#\[|(?:pub(?:\([\w:]+\))?\s+)?(?:async\s+)?(?:unsafe\s+)?"
+        r"(?:fn|struct|enum|trait|impl|mod|use|type|const|static|macro_rules!)\b)"
+    ),
+}
+_DECLARATION[".ts"] = _DECLARATION[".js"]
+_JS_METHOD = re.compile(
+    r"^\s+(?:(?:public|private|protected|static|async|readonly|get|set)\s+)*(\w+)\s*\([^;]*\)\s*(?::\s*[^{;=]+)?\{\s*$"
+)
+_NOT_METHODS = {"if", "for", "while", "switch", "catch", "with", "return", "function"}
+
+
+def _clip(line: str, limit: int = MAX_LINE_CHARS) -> str:
+    return line if len(line) <= limit else line[:limit - 3] + "..."
+
+
+def _signature(node, indent: str) -> list[str]:
+    lines = [f"{indent}@{_clip(ast.unparse(decorator))}" for decorator in node.decorator_list]
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    lines.append(_clip(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}"))
+    return lines
+
+
+def _assignment(node, indent: str):
+    """Return the outline line of a module- or class-level assignment, or None if it isn't a simple one."""
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        value = f" = {_clip(ast.unparse(node.value), MAX_VALUE_CHARS)}" if node.value else ""
+        return _clip(f"{indent}{node.target.id}: {ast.unparse(node.annotation)}{value}")
+    if isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) for target in node.targets):
+        names = " = ".join(target.id for target in node.targets)
+        return _clip(f"{indent}{names} = {_clip(ast.unparse(node.value), MAX_VALUE_CHARS)}")
+    return None
+
+
+def _outline_body(body: list, indent: str, lines: list[str], in_class: bool = False):
+    members = 0
+    for node in body:
+        if in_class and members >= MAX_CLASS_MEMBERS:
+            lines.append(f"{indent}...")
+            return
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(_clip(indent + ast.unparse(node)))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            lines.extend(_signature(node, indent))
+            members += 1
+        elif isinstance(node, ast.ClassDef):
+            lines.extend(f"{indent}@{_clip(ast.unparse(decorator))}" for decorator in node.decorator_list)
+            bases = ", ".join(ast.unparse(base) for base in node.bases + node.keywords)
+            lines.append(_clip(f"{indent}class {node.name}({bases}):" if bases else f"{indent}class {node.name}:"))
+            _outline_body(node.body, indent + "    ", lines, in_class=True)
+            members += 1
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            line = _assignment(node, indent)
+            if line:
+                lines.append(line)
+                members += 1
+        elif isinstance(node, ast.If) and not in_class:
+            if "__name__" in ast.unparse(node.test):
+                lines.append(f"{indent}if {ast.unparse(node.test)}: ...")
+            else:  # e.g. TYPE_CHECKING or version-dependent imports and definitions
+                _outline_body(node.body + node.orelse, indent, lines)
+        elif isinstance(node, ast.Try) and not in_class:
+            _outline_body(node.body + [n for handler in node.handlers for n in handler.body], indent, lines)
+
+
+def outline_python(text: str) -> str:
+    """Outline Python source with ast; raises SyntaxError (or ValueError) if it doesn't parse."""
+    tree = ast.parse(text)
+    lines = []
+    docstring = ast.get_docstring(tree)
+    if docstring and docstring.strip():
+        lines.append(_clip(f'"""{docstring.strip().splitlines()[0]}"""'))
+    _outline_body(tree.body, "", lines)
+    return "\n".join(lines)
+
+
+def outline_lines(text: str, ext: str) -> str:
+    """Line-based outline: import, declaration and route/attribute lines, bodies left out."""
+    declaration = _DECLARATION.get(ext)
+    lines, in_block = [], False
+    for line in text.splitlines():
+        stripped = line.rstrip()
+        if in_block:  # Go's import ( ... ) and JS's multi-line import { ... } lists
+            lines.append(_clip(stripped))
+            in_block = ")" not in stripped and "}" not in stripped
+        elif ext == ".py":
+            if re.match(r"^\s*(?:from\s+\S+\s+import\b|import\b|(?:async\s+)?def\b|class\b|@)", stripped):
+                lines.append(_clip(stripped.rstrip(":")))
+        elif declaration and declaration.match(stripped):
+            in_block = stripped.lstrip().startswith(("import", "export {")) and (
+                stripped.endswith("(") or stripped.count("{") > stripped.count("}")
+            )
+            lines.append(_clip(stripped if in_block else stripped.rstrip("{").rstrip()))
+        elif ext in (".js", ".ts"):
+            method = _JS_METHOD.match(stripped)
+            if method and method.group(1) not in _NOT_METHODS:
+                lines.append(_clip(stripped.rstrip("{").rstrip()))
+    return "\n".join(lines)
+
+
+def outline(text: str, ext: str) -> str:
+    """Return the outline of a file's text; ext picks the parser (".py", ".js", ".ts", ".go", ".rs")."""
+    result = ""
+    if ext == ".py":
+        try:
+            result = outline_python(text)
+        except (SyntaxError, ValueError, RecursionError):
+            result = outline_lines(text, ext)
+    else:
+        result = outline_lines(text, ext)
+    lines = result.split("\n") if result else text.split("\n")[:FALLBACK_HEAD_LINES]
+    if len(lines) > MAX_OUTLINE_LINES:
+        lines = lines[:MAX_OUTLINE_LINES] + [f"... ({len(lines) - MAX_OUTLINE_LINES} more)"]
+    return "\n".join(lines)
+
+
+def _outline_job(job: tuple[str, str]) -> str:
+    return outline(*job)
+
+
+def outline_request(text: str, ext: str) -> dict:
+    """The cache request for a file's outline: its content hash and parser."""
+    digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+    return {"outline": OUTLINE_VERSION, "ext": ext, "sha256": digest}
+
+
+def outline_files(files: list[tuple[str, str]], cache=None, workers: int = 1) -> list[str]:
+    """Return the outlines of (path, text) pairs, in order.
+
+    Outlines found in cache are reused; the rest are computed, on a pool of
+    up to workers processes when there are at least POOL_MIN_FILES of them,
+    and stored.
+    """
+    outlines = [None] * len(files)
+    missing = []
+    for i, (path, text) in enumerate(files):
+        ext = os.path.splitext(path)[1]
+        request = outline_request(text, ext)
+        cached = cache.get(request) if cache else None
+        if cached is None:
+            missing.append((i, request, (text, ext)))
+        else:
+            outlines[i] = cached
+    jobs = [job for _, _, job in missing]
+    if workers > 1 and len(jobs) >= POOL_MIN_FILES:
+        # spawn, like the fleet's scan pool: forking a process with threads isn't safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(min(workers, len(jobs) // POOL_CHUNK + 1), mp_context=context) as pool:
+            results = list(pool.map(_outline_job, jobs, chunksize=POOL_CHUNK))
+    else:
+        results = [_outline_job(job) for job in jobs]
+    for (i, request, _), result in zip(missing, results):
+        outlines[i] = result
+        if cache:
+            cache.put(request, result)
+    return outlines
@@ -3,43 +3,77 @@
 
 Reads JSON from stdin, checks tool_input.file_path against sensitive patterns,
 and returns guidance via additionalContext so Claude behaves like a cautious colleague.
+
+Patterns match path components rather than substrings, so "monkey_patch.py"
+or "keyboard/" no longer count as key material. A path is split into tokens:
+each directory and file name, its stem, and the words inside it ("AuthService.ts"
+gives "authservice.ts", "authservice", "auth", "service", "ts"). A pattern's
+"tokens" are checked against that set: plain tokens by set lookup (their
+plurals with "s"/"es" match too), globs gitignore-style ("*.pem", ".env*",
+and "deploy/**/*.yaml" for entries with a slash). Entries with a "regex" are
+searched over the whole lowercased path, as before.
+
+Teams can extend PATTERNS with sensitive-file-patterns.json at the plugin root
+(next to skill-rules.json):
+    {"patterns": [{"tokens": [...], "regex": ..., "guidance": ...}]}
+All patterns are merged into one classifier (see build_classifier()); the
+merged list is kept in the shared plugin index (see plugin_index.py).
+Verdicts are cached per project in .claude/cache/ (see VERDICT_CACHE_SIZE),
+keyed by normalized path and invalidated when the pattern set changes.
+
+`--batch` classifies many events in one process (see hook_batch.py).
 """
 
+import fnmatch
+import hashlib
 import json
+import os
 import re
 import sys
+from pathlib import Path
+
+import plugin_index
 
 PATTERNS = [
     {
-        "regex": r"auth|permission|acl|rbac",
+        "tokens": [
+            "auth", "authn", "authz", "oauth", "authentication", "authenticate", "authenticator",
+            "authorization", "authorize", "authorizer", "permission", "acl*", "rbac",
+        ],
         "guidance": (
             "This file controls authentication or authorization. "
             "Verify no auth bypass is introduced and no permissions are widened unintentionally."
         ),
     },
     {
-        "regex": r"config|settings|\.env",
+        "tokens": ["config", "configs", "configuration", "settings", "setting", ".env*", "*.env"],
         "guidance": (
             "This may contain configuration or secrets. "
             "Verify nothing sensitive is exposed and no defaults are changed to insecure values."
         ),
     },
     {
-        "regex": r"migration|schema|alembic",
+        "tokens": ["migration", "migrations", "*schema*", "alembic"],
         "guidance": (
             "This is a database migration or schema file. "
             "Verify rollback safety, check for data loss, and ensure the migration is idempotent."
         ),
     },
     {
-        "regex": r"secret|credential|token|key|password|cert",
+        "tokens": [
+            "secret", "credential", "creds", "token", "key", "apikey", "keystore", "keyring", "keychain",
+            "vault", "keyvault", "password", "passwd", "cert", "certificate",
+            "*.pem", "*.key", "*.crt", "*.p12", "*.pfx",
+        ],
         "guidance": (
             "This file may handle secrets or credentials. "
             "Verify no plaintext secrets are introduced and rotation/expiry is preserved."
         ),
     },
     {
-        "regex": r"security|crypto|encrypt|decrypt|hash",
+        "tokens": [
+            "security", "crypto*", "encrypt*", "decrypt*", "hash", "hashing", "hasher", "hashed",
+        ],
         "guidance": (
             "This file handles security-sensitive operations. "
             "Verify cryptographic choices are sound and no security controls are weakened."
@@ -47,36 +81,472 @@ PATTERNS = [
     },
 ]
 
+PLUGIN_ROOT = Path(__file__).resolve().parent.parent
 
-def main():
+VERDICT_CACHE_VERSION = 2
+
+# Most recently used verdicts kept per project; 0 disables the on-disk cache.
+VERDICT_CACHE_SIZE = int(os.environ.get("CLAUDE_LIBRARY_VERDICT_CACHE_SIZE", "512"))
+
+# Words inside a path component: camelCase humps, acronyms and digit runs.
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_GLOB_CHARS = re.compile(r"[*?\[]")
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+_LITERAL_ALTERNATION = re.compile(r"(?:[^\\.^$*+?{}\[\]()|]|\\[^0-9A-Za-z|])+(?:\|(?:[^\\.^$*+?{}\[\]()|]|\\[^0-9A-Za-z|])+)*")
+_ESCAPED_CHAR = re.compile(r"\\(.)")
+
+# patterns path -> (file stamp, classifier); see get_classifier()
+_CLASSIFIERS = {}
+# verdict cache path -> (file stamp, cache dict); see _load_verdicts()
+_VERDICTS = {}
+
+
+def default_patterns_path() -> Path:
+    """Return the sensitive-file-patterns.json path at the plugin root."""
+    return PLUGIN_ROOT / "sensitive-file-patterns.json"
+
+
+def _valid_regex(regex):
     try:
-        data = json.load(sys.stdin)
-    except (json.JSONDecodeError, EOFError):
-        sys.exit(0)
+        # Compiled inside a group, as the classifier will: inline global
+        # flags like (?i) are only valid at the very start of a pattern.
+        compiled = re.compile(f"(?:{regex})")
+    except re.error:
+        return False
+    # Named groups and backreferences don't survive being merged (twice)
+    # into the classifier regex.
+    return not compiled.groupindex and not _BACKREFERENCE.search(regex)
+
+
+def load_patterns(patterns_path=None):
+    """Return PATTERNS followed by the valid entries of sensitive-file-patterns.json.
+
+    An entry needs a guidance string and a "tokens" list and/or a "regex".
+    Non-string tokens and regexes that don't compile are dropped (and the
+    entry with them if nothing is left), so one bad entry can't break the hook.
+    """
+    patterns_path = Path(patterns_path) if patterns_path else default_patterns_path()
+    patterns = list(PATTERNS)
+    try:
+        with open(patterns_path, encoding="utf-8") as f:
+            extra = json.load(f).get("patterns", [])
+    except (OSError, ValueError, AttributeError):
+        return patterns
+    for pattern in extra if isinstance(extra, list) else []:
+        if not isinstance(pattern, dict) or not isinstance(pattern.get("guidance"), str):
+            continue
+        entry = {}
+        tokens = pattern.get("tokens")
+        if isinstance(tokens, list):
+            tokens = [t.lower() for t in tokens if isinstance(t, str) and t.strip("/")]
+            if tokens:
+                entry["tokens"] = tokens
+        regex = pattern.get("regex")
+        if isinstance(regex, str) and _valid_regex(regex):
+            entry["regex"] = regex
+        if entry:
+            patterns.append({**entry, "guidance": pattern["guidance"]})
+    return patterns
+
+
+def path_tokens(path):
+    """Return the lowercase tokens of a "/"-separated path.
+
+    Every component, its stem (up to the first dot after a leading dot) and
+    the words inside it. Built with whole-path regex and string calls rather
+    than a Python loop per component.
+    """
+    lower = path.lower()
+    components = lower.split("/")
+    tokens = set(components)
+    tokens.update(c[:c.find(".", 1)] for c in components if c.find(".", 1) > 0)
+    tokens.update("/".join(_WORD.findall(path)).lower().split("/"))
+    tokens.difference_update(("", ".", ".."))
+    return tokens
+
+
+def _path_glob_regex(glob):
+    """Translate a gitignore-style glob with a slash into a regex over the path.
+
+    "**" spans directories, "*" and "?" stay inside one component, and the
+    match must start and end on component boundaries.
+    """
+    parts = []
+    i = 0
+    glob = glob.strip("/")
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            parts.append("(?:[^/]*/)*")
+            i += 3
+        elif glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif glob[i] == "[":
+            end = glob.find("]", i + 2)
+            if end < 0:
+                parts.append(re.escape(glob[i]))
+                i += 1
+            else:
+                body = glob[i + 1:end].replace("\\", "\\\\")
+                parts.append("[^" + body[1:] + "]" if body.startswith("!") else "[" + body + "]")
+                i = end + 1
+        else:
+            parts.append(re.escape(glob[i]))
+            i += 1
+    return "(?:^|/)" + "".join(parts) + "(?:/|$)"
+
+
+def _literal_words(regex):
+    """Return the words of a plain alternation like "auth|acl|\\.env", else None."""
+    if not _LITERAL_ALTERNATION.fullmatch(regex):
+        return None
+    return [_ESCAPED_CHAR.sub(r"\1", word) for word in regex.split("|")]
+
+
+def _trie_regex(words):
+    """Build a regex matching the longest of `words` at a position, shaped like a trie."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True  # a word ends here
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+def _regex_sources(patterns):
+    """Return the (find, at) regex sources for the patterns that have a regex, or None.
+
+    "find" locates the next position where any regex can match: plain word
+    alternations are merged into a single trie so the scan branches on one
+    character per step, other regexes are appended as alternatives. "at" is
+    anchored there and tries every category as an optional lookahead group,
+    so overlapping matches from different categories are all reported.
+    """
+    words, others, at = [], [], []
+    for i, p in enumerate(patterns):
+        if "regex" not in p:
+            continue
+        literal = _literal_words(p["regex"])
+        if literal is None:
+            others.append(f"(?:{p['regex']})")
+        else:
+            words.extend(w for w in literal if w)
+        at.append(f"(?:(?=(?P<_c{i}>{p['regex']})))?")
+    find = "|".join(([_trie_regex(words)] if words else []) + others)
+    return (find, "".join(at)) if find else None
+
+
+def build_classifier(patterns):
+    """Merge patterns into one classifier that reports every matching category.
+
+    Only the digest is computed up front; the match tables (see
+    _build_tables()) are built on first use, so a verdict cache hit never
+    pays for them.
+
+    Returns a dict with:
+      digest    short hash of the pattern set (keys the verdict cache)
+      guidance  per category, its guidance text
+      patterns  the pattern list
+      tables    the match tables (None until used)
+    """
+    digest = hashlib.sha256(
+        json.dumps([[p.get("tokens"), p.get("regex"), p["guidance"]] for p in patterns]).encode("utf-8")
+    ).hexdigest()[:16]
+    return {
+        "digest": digest,
+        "guidance": [p["guidance"] for p in patterns],
+        "patterns": patterns,
+        "tables": None,
+    }
+
+
+def _build_tables(patterns):
+    """Compile the patterns' tokens, globs and regexes into shared match tables.
 
-    file_path = data.get("tool_input", {}).get("file_path", "")
+    Plain tokens (and their plurals) go into one token -> categories table,
+    so a path costs one set intersection with its tokens. Globs of the
+    "prefix*" and "*suffix" shapes (all of the built-in ones) are merged into
+    one regex run over the newline-joined tokens; other globs are translated
+    with fnmatch and tried per token. Globs containing "/" are matched
+    against the whole path. Regexes are merged as described in
+    _regex_sources().
+
+    Returns a dict with:
+      tokens    token -> category indices
+      prefixes  prefix -> category indices
+      suffixes  suffix -> category indices
+      affixes   compiled regex finding any prefix or suffix in the tokens
+                joined and framed by newlines (or None)
+      words     compiled trie regex of every plain token, prefix and suffix; a
+                path containing none of them as a substring has no token match
+                (None when there are other globs, which need the tokens anyway)
+      globs     [(compiled component glob, category index), ...]
+      paths     [(compiled path glob, category index), ...]
+      regex     the compiled (find, at) regex pair, or None if no pattern has a regex
+      groups    [(category index, group number in the "at" regex), ...]
+    """
+    tokens, prefixes, suffixes, globs, paths, words = {}, {}, {}, [], [], set()
+    for i, p in enumerate(patterns):
+        for token in p.get("tokens", ()):
+            if "/" in token.strip("/"):
+                paths.append((re.compile(_path_glob_regex(token)), i))
+                continue
+            token = token.strip("/")
+            wild = _GLOB_CHARS.findall(token)
+            if not wild:
+                words.add(token)
+                for form in (token, token + "s", token + "es"):
+                    tokens.setdefault(form, set()).add(i)
+            elif wild == ["*"] and token.endswith("*"):
+                prefixes.setdefault(token[:-1], set()).add(i)
+            elif wild == ["*"] and token.startswith("*"):
+                suffixes.setdefault(token[1:], set()).add(i)
+            else:
+                globs.append((re.compile(fnmatch.translate(token)), i))
+    affixes = ["\n" + _trie_regex(prefixes)] if prefixes else []
+    affixes += [f"(?:{_trie_regex(suffixes)})(?=\n)"] if suffixes else []
+
+    regex, groups = None, []
+    sources = _regex_sources(patterns)
+    if sources is not None:
+        find, at = (re.compile(source) for source in sources)
+        groups = [(i, at.groupindex[f"_c{i}"]) for i in range(len(patterns)) if f"_c{i}" in at.groupindex]
+        regex = (find, at)
+    return {
+        "tokens": tokens,
+        "prefixes": prefixes,
+        "suffixes": suffixes,
+        "affixes": re.compile("|".join(affixes)) if affixes else None,
+        "words": re.compile(_trie_regex([*words, *prefixes, *suffixes])) if words and not globs else None,
+        "globs": globs,
+        "paths": paths,
+        "regex": regex,
+        "groups": groups,
+    }
+
+
+def classify(path, classifier):
+    """Return the indices of the categories matching a "/"-separated path, in pattern order."""
+    tables = classifier["tables"]
+    if tables is None:
+        tables = classifier["tables"] = _build_tables(classifier["patterns"])
+    found = set()
+    lowered = path.lower()
+    if tables["words"] is None or tables["words"].search(lowered):
+        tokens = path_tokens(path)
+        for token in tokens & tables["tokens"].keys():
+            found |= tables["tokens"][token]
+        if tables["affixes"] is not None:
+            joined = "\n" + "\n".join(tokens) + "\n"
+            for m in tables["affixes"].finditer(joined):
+                start = joined.rfind("\n", 0, m.end() - 1) + 1
+                token = joined[start:joined.index("\n", start)]
+                for affix, cats in tables["prefixes"].items():
+                    if token.startswith(affix):
+                        found |= cats
+                for affix, cats in tables["suffixes"].items():
+                    if token.endswith(affix):
+                        found |= cats
+        for glob, i in tables["globs"]:
+            if i not in found and any(glob.match(token) for token in tokens):
+                found.add(i)
+    found.update(i for glob, i in tables["paths"] if glob.search(lowered))
+    if tables["regex"] is not None:
+        find, at = tables["regex"]
+        m = find.search(lowered)
+        while m:
+            hit = at.match(lowered, m.start())
+            found.update(i for i, group in tables["groups"] if hit.group(group) is not None)
+            m = find.search(lowered, m.start() + 1)
+    return sorted(found)
+
+
+def get_classifier(patterns_path=None):
+    """Return the classifier for a patterns file, rebuilt only when the file changes.
+
+    The merged, validated pattern list is kept in the plugin index (see
+    plugin_index.py) while the patterns file and this script are unchanged.
+    """
+    patterns_path = Path(patterns_path) if patterns_path else default_patterns_path()
+    stamps = plugin_index.source_stamps([patterns_path, __file__])
+    cached = _CLASSIFIERS.get(patterns_path)
+    if cached and cached[0] == stamps:
+        return cached[1]
+    indexed = plugin_index.fresh_section("sensitive", patterns_path, stamps)
+    if indexed:
+        patterns = indexed["patterns"]
+    else:
+        patterns = load_patterns(patterns_path)
+        plugin_index.update_sections({("sensitive", patterns_path): (stamps, {"patterns": patterns})})
+    classifier = build_classifier(patterns)
+    _CLASSIFIERS[patterns_path] = (stamps, classifier)
+    return classifier
+
+
+def verdict_cache_path(project_dir):
+    """Return the verdict cache file for a project, or None if it has no .claude/ dir."""
+    if not project_dir or VERDICT_CACHE_SIZE <= 0:
+        return None
+    claude_dir = Path(project_dir) / ".claude"
+    if not claude_dir.is_dir():
+        return None
+    return claude_dir / "cache" / "sensitive-file-verdicts.json"
+
+
+def _load_verdicts(cache_path: Path, digest):
+    try:
+        stamp = plugin_index.file_stamp(cache_path)
+    except OSError:
+        stamp = None
+    held = _VERDICTS.get(cache_path)
+    if held and held[0] == stamp and held[1]["digest"] == digest:
+        return held[1]
+
+    cache = None
+    if stamp is not None:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = None
+    if (
+        not isinstance(cache, dict)
+        or cache.get("version") != VERDICT_CACHE_VERSION
+        or cache.get("digest") != digest
+        or not isinstance(cache.get("entries"), dict)
+    ):
+        cache = {"version": VERDICT_CACHE_VERSION, "digest": digest, "clock": 0, "entries": {}}
+    _VERDICTS[cache_path] = (stamp, cache)
+    return cache
+
+
+def _save_verdicts(cache_path: Path, cache):
+    entries = cache["entries"]
+    if len(entries) > VERDICT_CACHE_SIZE:
+        recent = sorted(entries.items(), key=lambda item: item[1][0])[-VERDICT_CACHE_SIZE:]
+        cache["entries"] = dict(recent)
+    stamp = None
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        ignore = cache_path.parent / ".gitignore"
+        if not ignore.exists():
+            ignore.write_text("*\n", encoding="utf-8")
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+        stamp = plugin_index.file_stamp(cache_path)
+    except OSError:
+        pass
+    _VERDICTS[cache_path] = (stamp, cache)
+
+
+def classify_path(normalized, classifier, project_dir=None):
+    """Return the matching category indices for a normalized path, via the verdict cache.
+
+    Each entry records when it was last used; a hit only refreshes that (and
+    rewrites the file) once the entry has aged into the older half of the
+    cache, so repeated edits of the same file are read-only. The least
+    recently used entries are evicted past VERDICT_CACHE_SIZE.
+    """
+    cache_path = verdict_cache_path(project_dir)
+    if cache_path is None:
+        return classify(normalized, classifier)
+    cache = _load_verdicts(cache_path, classifier["digest"])
+    entry = cache["entries"].get(normalized)
+    if entry is not None:
+        if entry[0] > cache["clock"] - VERDICT_CACHE_SIZE // 2:
+            return entry[1]
+        verdict = entry[1]
+    else:
+        verdict = classify(normalized, classifier)
+    cache["clock"] += 1
+    cache["entries"][normalized] = [cache["clock"], verdict]
+    _save_verdicts(cache_path, cache)
+    return verdict
+
+
+def build_output(file_path, project_dir=None):
+    """Return the hook output dict for a file path, or None if it isn't sensitive."""
     if not file_path:
-        sys.exit(0)
+        return None
 
-    # Normalize path separators for matching
-    normalized = file_path.replace("\\", "/").lower()
+    # Normalize path separators; case is kept so camelCase names split into words
+    normalized = file_path.replace("\\", "/")
 
-    matches = []
-    for pattern in PATTERNS:
-        if re.search(pattern["regex"], normalized):
-            matches.append(pattern["guidance"])
+    classifier = get_classifier()
+    matches = [classifier["guidance"][i] for i in classify_path(normalized, classifier, project_dir)]
 
     if not matches:
-        sys.exit(0)
+        return None
 
     context = "SENSITIVE FILE GUIDANCE: " + " | ".join(matches)
-    output = {
+    return {
         "hookSpecificOutput": {
             "hookEventName": "PreToolUse",
             "additionalContext": context,
         }
     }
-    json.dump(output, sys.stdout)
+
+
+def handle_event(data, project_dir=None) -> str:
+    """Handle one decoded hook event; returns exact stdout text ("" = silent)."""
+    if not isinstance(data, dict):
+        return ""
+
+    output = build_output(data.get("tool_input", {}).get("file_path", ""), project_dir)
+    if output is None:
+        return ""
+    return json.dumps(output)
+
+
+def run(stdin_text: str) -> str:
+    """Handle one hook event: raw stdin text in, exact stdout text out ("" = silent)."""
+    try:
+        data = json.loads(stdin_text)
+    except json.JSONDecodeError:
+        return ""
+    if not isinstance(data, dict):
+        return ""
+
+    return handle_event(data, data.get("cwd") or os.environ.get("CLAUDE_PROJECT_DIR"))
+
+
+def run_record(line: str) -> str:
+    """Handle one --batch record like run(), without the per-project verdict cache.
+
+    Batches come from CI diffs and audit logs, not an editing session:
+    classifying in memory is cheaper than a cache write per new path.
+    """
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return ""
+    return handle_event(data)
+
+
+def main():
+    if "--batch" in sys.argv[1:]:
+        from hook_batch import batch_main
+
+        batch_main(run_record, sys.argv[1:])
+        return
+    sys.stdout.write(run(sys.stdin.read()))
 
 
 if __name__ == "__main__":
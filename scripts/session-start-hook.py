@@ -3,69 +3,115 @@
 
 Runs on session startup to verify the plugin is healthy and display
 available skills organized by development phase.
+
+Skills are scanned in a single pass: one directory listing plus one stat
+of each SKILL.md. A SKILL.md is only opened (for its first few KB, to read
+the frontmatter) when its mtime or size differs from the skills section of
+the shared plugin index (see plugin_index.py), so startup reads
+O(changed skills) files.
 """
 
+import hashlib
 import json
 import os
 import sys
 from pathlib import Path
 
+import plugin_index
 
-def count_skills(plugin_root: Path) -> tuple[int, list[str]]:
-    """Count skills and collect their names."""
-    skills_dir = plugin_root / "skills"
-    if not skills_dir.exists():
-        return 0, []
+FRONTMATTER_HEAD = 4096
 
-    names = []
-    for skill_dir in sorted(skills_dir.iterdir()):
-        if skill_dir.is_dir() and (skill_dir / "SKILL.md").exists():
-            names.append(skill_dir.name)
-    return len(names), names
 
+def read_skill(skill_file: str, full: bool = False) -> dict:
+    """Return the index entry for one SKILL.md: stamp, sha256 and frontmatter fields.
 
-def validate_skills(plugin_root: Path) -> list[str]:
-    """Run lightweight validation, return list of issues."""
-    issues = []
-    skills_dir = plugin_root / "skills"
+    Only the head of the file is read unless full is set, in which case the
+    whole file is hashed too. frontmatter is None when the file doesn't start
+    with a --- block; fields past the head are not parsed.
+    """
+    with open(skill_file, "rb") as f:
+        stamp = plugin_index.file_stamp(f.fileno())
+        raw = f.read() if full else f.read(FRONTMATTER_HEAD)
+    frontmatter = None
+    if raw.startswith(b"---"):
+        frontmatter = plugin_index.parse_frontmatter(raw.decode("utf-8", "replace")) or {}
+    return {
+        "stamp": stamp,
+        "sha256": hashlib.sha256(raw).hexdigest() if full else None,
+        "frontmatter": frontmatter,
+    }
 
-    for skill_dir in skills_dir.iterdir():
-        if not skill_dir.is_dir():
-            continue
-        skill_file = skill_dir / "SKILL.md"
-        if not skill_file.exists():
-            issues.append(f"Missing SKILL.md in {skill_dir.name}")
+
+def scan_skills(plugin_root: Path, full: bool = False) -> tuple[list[str], list[str]]:
+    """Return (skill names, validation issues) from one pass over skills/.
+
+    Each skill directory costs one stat of its SKILL.md; the file itself is
+    only opened when its mtime or size differs from the plugin index (or,
+    with full, when its hash isn't indexed yet). The index is rewritten only
+    when something changed.
+    """
+    skills_dir = plugin_root / "skills"
+    try:
+        entries = sorted(
+            (entry.name, entry.path) for entry in os.scandir(skills_dir) if entry.is_dir()
+        )
+    except OSError:
+        return [], []
+
+    previous = plugin_index.fresh_section("skills", skills_dir, {}, plugin_root) or {}
+    current = {}
+    names, issues = [], []
+    for name, path in entries:
+        skill_file = os.path.join(path, "SKILL.md")
+        try:
+            stamp = plugin_index.file_stamp(skill_file)
+        except OSError:
+            issues.append(f"Missing SKILL.md in {name}")
             continue
+        names.append(name)
 
-        content = skill_file.read_text(encoding="utf-8")
-        if not content.startswith("---"):
-            issues.append(f"Missing YAML frontmatter in {skill_dir.name}")
-        if "_" in skill_dir.name:
-            issues.append(f"Underscore in directory name: {skill_dir.name} (use hyphens)")
+        skill = previous.get(name)
+        if not skill or skill["stamp"] != stamp or (full and not skill["sha256"]):
+            try:
+                skill = read_skill(skill_file, full)
+            except OSError:
+                skill = {"stamp": stamp, "sha256": None, "frontmatter": None}
+        current[name] = skill
 
-    return issues
+        if skill["frontmatter"] is None:
+            issues.append(f"Missing YAML frontmatter in {name}")
+        if "_" in name:
+            issues.append(f"Underscore in directory name: {name} (use hyphens)")
 
+    if current != previous:
+        plugin_index.update_sections({("skills", skills_dir): ({}, current)}, plugin_root)
+    return names, issues
 
-def main():
-    try:
-        data = json.load(sys.stdin)
-    except (json.JSONDecodeError, EOFError):
-        data = {}
 
-    source = data.get("source", "startup")
+def count_skills(plugin_root: Path) -> tuple[int, list[str]]:
+    """Count skills and collect their names."""
+    names, _ = scan_skills(plugin_root)
+    return len(names), names
 
-    # Only show full summary on new sessions, not resume/compact
-    if source != "startup":
-        sys.exit(0)
 
+def validate_skills(plugin_root: Path) -> list[str]:
+    """Run lightweight validation, return list of issues."""
+    _, issues = scan_skills(plugin_root)
+    return issues
+
+
+def resolve_plugin_root() -> Path:
     plugin_root = Path(os.environ.get("CLAUDE_PLUGIN_ROOT", "")).resolve()
     if not plugin_root.exists():
         plugin_root = Path(__file__).resolve().parent.parent
+    return plugin_root
+
 
-    count, names = count_skills(plugin_root)
-    issues = validate_skills(plugin_root)
+def build_output(plugin_root: Path) -> dict:
+    """Return the hook output dict with the skill summary and validation issues."""
+    names, issues = scan_skills(plugin_root)
 
-    lines = [f"claude-library plugin loaded: {count} skills available."]
+    lines = [f"claude-library plugin loaded: {len(names)} skills available."]
 
     if issues:
         lines.append(f"Validation issues ({len(issues)}):")
@@ -73,13 +119,34 @@ def main():
             lines.append(f"  - {issue}")
 
     context = "\n".join(lines)
-    output = {
+    return {
         "hookSpecificOutput": {
             "hookEventName": "SessionStart",
             "additionalContext": context,
         }
     }
-    json.dump(output, sys.stdout)
+
+
+def run(stdin_text: str) -> str:
+    """Handle one hook event: raw stdin text in, exact stdout text out ("" = silent)."""
+    try:
+        data = json.loads(stdin_text)
+    except json.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    source = data.get("source", "startup")
+
+    # Only show full summary on new sessions, not resume/compact
+    if source != "startup":
+        return ""
+
+    return json.dumps(build_output(resolve_plugin_root()))
+
+
+def main():
+    sys.stdout.write(run(sys.stdin.read()))
 
 
 if __name__ == "__main__":
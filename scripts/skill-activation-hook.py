@@ -6,20 +6,100 @@ Reads JSON from stdin (Claude Code hook input), matches the prompt
 against trigger patterns, and outputs JSON with additionalContext
 suggesting the matched skill(s).
 
+Matching ranks rules by relevance rather than file order: each rule is
+scored on how many of its triggers hit, how long the matched spans are,
+and an optional per-rule "weight" (default 1.0). The literal fragments
+every trigger requires (e.g. "plan" and "implement" in "plan.*implement")
+are extracted when the rules are loaded; only triggers whose literals all
+occur in the prompt are regex-evaluated, and evaluation stops once no
+remaining rule can beat the current top-k. Long prompts are prefiltered
+with one trie-shaped regex pass over the text instead of one substring
+search per literal.
+
+The validated rule table (triggers, literals, weights) is kept in the
+shared plugin index (see plugin_index.py and RULES_CACHE_VERSION), keyed by
+the mtime, size and SHA-256 of skill-rules.json, so later invocations skip
+parsing and validating the rules file.
+
+`--batch` matches many events in one process (see hook_batch.py).
+
 Exit 0 with no stdout = no suggestion (silent pass-through).
 Exit 0 with JSON stdout = additionalContext injected into conversation.
 """
 
+import hashlib
+import heapq
+import io
 import json
+import os
 import re
 import sys
 from pathlib import Path
 
+import plugin_index
+from plugin_index import cache_dir  # noqa: F401  (re-exported for benchmarks and tests)
+
+PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+
+RULES_CACHE_VERSION = 3
+
+# Suggest at most this many skills to avoid noise
+TOP_K = 2
+
+# Each trigger hit scores 1, plus up to SPAN_BONUS for the matched span
+# length (saturating at SPAN_CAP characters); the sum is scaled by weight.
+SPAN_BONUS = 0.5
+SPAN_CAP = 40
+
+# The single-pass literal scanner walks the prompt once at a fixed cost per
+# character; a substring check per literal costs ~literals x length but
+# runs at memchr speed. The scanner wins once there are a few hundred
+# distinct literals, and is worth compiling in a one-shot hook process
+# only for long prompts.
+SCANNER_MIN_LITERALS = 400
+SCANNER_MIN_PROMPT = 32_000
+
+# Prompt window: stdin is parsed incrementally and only the first and last
+# PROMPT_WINDOW_CHARS of the prompt (plus instruction-looking lines from the
+# middle) are matched, so huge pastes cost flat memory and time.
+# CLAUDE_LIBRARY_PROMPT_FULL=1 matches the whole prompt instead.
+PROMPT_WINDOW_CHARS = int(os.environ.get("CLAUDE_LIBRARY_PROMPT_WINDOW_KB", "16")) * 1024
+FULL_PROMPT = os.environ.get("CLAUDE_LIBRARY_PROMPT_FULL") == "1"
+MAX_INSTRUCTION_LINES = 64
+INSTRUCTION_LINE_MAX_CHARS = 400
+STDIN_CHUNK_SIZE = 64 * 1024
+
+# Matched against "\n" + lowercased text: the leading newline literal lets
+# the regex engine jump between line starts instead of testing every position.
+_INSTRUCTION_START = re.compile(
+    r"\n[ \t]*(?:please|can you|could you|would you|help me|i want|i need|i'd like|let's|"
+    r"how (?:do|should|can) (?:i|we)|what|why|where|make|add|fix|implement|refactor|"
+    r"review|explain|plan|write|create|update|check)\b"
+)
+_QUESTION_END = re.compile(r"\?[ \t]*$", re.MULTILINE)
+_JSON_STRUCTURE = re.compile(r'["{}\[\],:]')
+# Complete units of a JSON string body; stops at the closing quote or before
+# an escape that is cut off at the end of the buffer. High surrogates only
+# match as part of a pair so a pair is never split across reads.
+_JSON_STRING_BODY = re.compile(
+    r'(?:[^"\\]+|\\["\\/bfnrt]|\\u(?![dD][89abAB])[0-9a-fA-F]{4}'
+    r'|\\u[dD][89abAB][0-9a-fA-F]{2}\\u[dD][c-fC-F][0-9a-fA-F]{2})*'
+)
+_JSON_LONE_SURROGATE = re.compile(r"\\u([dD][89abAB][0-9a-fA-F]{2})")
+_LENIENT_JSON = json.JSONDecoder(strict=False)
+
+# rules path -> (file stamp, trigger index); see get_matcher()
+_MATCHERS = {}
+
 
-def load_rules():
+def default_rules_path() -> Path:
+    """Return the skill-rules.json path at the plugin root."""
+    return PLUGIN_ROOT / "skill-rules.json"
+
+
+def load_rules(rules_path=None):
     """Load skill-rules.json from the plugin root."""
-    script_dir = Path(__file__).resolve().parent
-    rules_path = script_dir.parent / "skill-rules.json"
+    rules_path = Path(rules_path) if rules_path else default_rules_path()
     if not rules_path.exists():
         return []
     with open(rules_path, encoding="utf-8") as f:
@@ -28,7 +108,12 @@ def load_rules():
 
 
 def match_prompt(prompt, rules):
-    """Return list of matching skills for the given prompt."""
+    """Return list of matching skills for the given prompt.
+
+    Reference implementation: searches every trigger uncompiled, in file
+    order. The hook itself uses rank_rules(); this is kept for benchmarks
+    and tests.
+    """
     prompt_lower = prompt.lower()
     matches = []
     for rule in rules:
@@ -39,27 +124,484 @@ def match_prompt(prompt, rules):
     return matches
 
 
-def main():
-    # Read hook input from stdin
+_HEX_ESCAPES = {"x": 2, "u": 4, "U": 8}
+# As re reads them: \0 with up to two more octal digits, or three octal digits
+_OCTAL_ESCAPE = re.compile(r"0[0-7]{0,2}|[0-7]{3}")
+
+
+def extract_literals(trigger):
+    """Return literal substrings that every match of `trigger` must contain.
+
+    Conservative: patterns with groups or alternation yield [] (always
+    evaluate), and characters made optional by a quantifier are dropped.
+    Character escapes (\\x41, \\u0041, \\101) count as the character.
+    """
+    if "(" in trigger or "|" in trigger:
+        return []
+    literals = []
+    run = []
+
+    def flush():
+        if run:
+            literals.append("".join(run))
+            run.clear()
+
+    i = 0
+    while i < len(trigger):
+        c = trigger[i]
+        if c == "\\" and i + 1 < len(trigger):
+            escaped = trigger[i + 1]
+            i += 2
+            if escaped in _HEX_ESCAPES:  # \xhh, \uhhhh, \Uhhhhhhhh
+                width = _HEX_ESCAPES[escaped]
+                run.append(chr(int(trigger[i:i + width], 16)))
+                i += width
+            elif escaped.isdigit():
+                octal = _OCTAL_ESCAPE.match(trigger, i - 1)
+                if octal:
+                    run.append(chr(int(octal.group(), 8)))
+                    i = octal.end()
+                else:  # a group reference
+                    flush()
+                    i += trigger[i:i + 1].isdigit()
+            elif escaped.isalnum():  # \b, \d, \s, \N{...} ... are not literals
+                flush()
+                if escaped == "N" and trigger[i:i + 1] == "{":
+                    i = trigger.find("}", i) + 1
+            else:
+                run.append(escaped)
+            continue
+        if c in "?*{":  # previous character is optional
+            if run:
+                run.pop()
+            flush()
+            if c == "{":
+                close = trigger.find("}", i)
+                i = close if close != -1 else i
+        elif c == "+":  # previous character required at least once
+            flush()
+        elif c == "[":  # skip the character class
+            flush()
+            i += 1
+            if trigger[i:i + 1] == "^":
+                i += 1
+            if trigger[i:i + 1] == "]":
+                i += 1
+            while i < len(trigger) and trigger[i] != "]":
+                i += 2 if trigger[i] == "\\" else 1
+        elif c in ".^$]}":
+            flush()
+        else:
+            run.append(c)
+        i += 1
+    flush()
+    return literals
+
+
+def _weight(rule):
+    weight = rule.get("weight", 1.0)
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0:
+        return 1.0
+    return float(weight)
+
+
+def validate_rules(rules):
+    """Normalize rules for matching.
+
+    Drops triggers that are not valid regexes (so one bad rule can't break
+    the hook), and records each trigger's required literals and the rule weight.
+    """
+    table = []
+    for rule in rules:
+        triggers = []
+        for trigger in rule.get("triggers", []):
+            try:
+                re.compile(trigger)
+            except re.error:
+                continue
+            triggers.append(trigger)
+        if triggers:
+            table.append({
+                **rule,
+                "triggers": triggers,
+                "literals": [extract_literals(t) for t in triggers],
+                "weight": _weight(rule),
+            })
+    return table
+
+
+def load_rule_table(rules_path=None):
+    """Return the validated rule table, served from the plugin index when fresh.
+
+    The index section is valid while skill-rules.json keeps its mtime and
+    size (and RULES_CACHE_VERSION is unchanged). If only the stamp changed
+    (e.g. a fresh checkout), the content hash is compared before validating
+    the rules again. Index read/write failures fall back to parsing
+    skill-rules.json.
+    """
+    rules_path = Path(rules_path) if rules_path else default_rules_path()
+    stamps = plugin_index.source_stamps([rules_path])
+    if stamps[str(rules_path)] is None:
+        return []
+    cached = plugin_index.fresh_section("rules", rules_path, stamps)
+    if cached and cached.get("version") == RULES_CACHE_VERSION:
+        return cached["table"]
+
+    raw = rules_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    previous = (plugin_index.section("rules", rules_path) or {}).get("data") or {}
+    if previous.get("version") == RULES_CACHE_VERSION and previous.get("sha256") == digest:
+        table = previous["table"]
+    else:
+        table = validate_rules(json.loads(raw).get("rules", []))
+
+    data = {"version": RULES_CACHE_VERSION, "sha256": digest, "table": table}
+    plugin_index.update_sections({("rules", rules_path): (stamps, data)})
+    return table
+
+
+def build_index(table):
+    """Index triggers by their longest required literal.
+
+    Triggers are compiled lazily on first evaluation, so rules whose
+    literals never appear in a prompt are never compiled. The same goes
+    for the multi-literal scanner (see scan_literals()).
+
+    Returns a dict with:
+      rules     the rule table, in file order
+      patterns  per rule, the list of compiled triggers (None until used)
+      literals  literal -> [(rule index, trigger index), ...]
+      always    [(rule index, trigger index), ...] for triggers with no literal
+      scanner   (compiled trie regex, {literal: literals it starts with}) or None
+    """
+    index = {"rules": table, "patterns": [], "literals": {}, "always": [], "scanner": None}
+    for r, rule in enumerate(table):
+        index["patterns"].append([None] * len(rule["triggers"]))
+        for t, literals in enumerate(rule["literals"]):
+            if literals:
+                key = max(literals, key=len)
+                index["literals"].setdefault(key, []).append((r, t))
+            else:
+                index["always"].append((r, t))
+    return index
+
+
+def _pattern(index, r, t):
+    pattern = index["patterns"][r][t]
+    if pattern is None:
+        pattern = index["patterns"][r][t] = re.compile(index["rules"][r]["triggers"][t])
+    return pattern
+
+
+def _trie_regex(words):
+    """Build a regex matching the longest of `words` starting at a position.
+
+    The alternation is shaped like a trie, so the regex engine walks one
+    character per step instead of trying every word in turn.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True  # a word ends here
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+def build_scanner(table):
+    """Compile a single-pass scanner for every required literal in the table.
+
+    Returns (pattern, prefixes): the pattern matches the longest literal at
+    a position, and prefixes maps it to every literal it starts with (those
+    occur at the same position too). pattern is None if there are no literals.
+    """
+    literals = {lit for rule in table for lits in rule["literals"] for lit in lits}
+    if not literals:
+        return None, {}
+    prefixes = {
+        lit: [lit[:i] for i in range(1, len(lit) + 1) if lit[:i] in literals]
+        for lit in literals
+    }
+    return re.compile(_trie_regex(sorted(literals))), prefixes
+
+
+def scan_literals(prompt_lower, index):
+    """Return the set of required literals occurring in the prompt, in one pass."""
+    if index["scanner"] is None:
+        index["scanner"] = build_scanner(index["rules"])
+    pattern, prefixes = index["scanner"]
+    found = set()
+    if pattern is None:
+        return found
+    pos = 0
+    while True:
+        match = pattern.search(prompt_lower, pos)
+        if not match:
+            return found
+        found.update(prefixes[match.group()])
+        pos = match.start() + 1
+
+
+def candidate_triggers(prompt_lower, index):
+    """Return {rule index: [trigger index, ...]} for triggers whose literals all occur.
+
+    With large rule sets, long prompts (or any prompt once the scanner
+    exists) go through the single-pass scanner, so cost grows with prompt
+    length rather than prompt length x literal count. Otherwise plain
+    substring checks are cheaper.
+    """
+    candidates = {}
+    for r, t in index["always"]:
+        candidates.setdefault(r, []).append(t)
+
+    use_scanner = len(index["literals"]) >= SCANNER_MIN_LITERALS and (
+        index["scanner"] is not None or len(prompt_lower) >= SCANNER_MIN_PROMPT
+    )
+    if use_scanner:
+        found = scan_literals(prompt_lower, index)
+        keys = [lit for lit in found if lit in index["literals"]]
+        present = found.__contains__
+    else:
+        keys = [lit for lit in index["literals"] if lit in prompt_lower]
+        present = prompt_lower.__contains__
+
+    rules = index["rules"]
+    for key in keys:
+        for r, t in index["literals"][key]:
+            if all(present(lit) for lit in rules[r]["literals"][t]):
+                candidates.setdefault(r, []).append(t)
+    return candidates
+
+
+def rank_rules(prompt, index, k=TOP_K):
+    """Return up to k matching rules, most relevant first (k=None for all).
+
+    Candidate rules are visited in order of their best possible score and
+    kept in a bounded min-heap; once the heap is full and the next
+    candidate's upper bound is below the k-th score, the rest are skipped.
+    Ties go to the rule listed first in skill-rules.json.
+    """
+    prompt_lower = prompt.lower()
+    rules = index["rules"]
+    candidates = candidate_triggers(prompt_lower, index)
+    per_trigger_max = 1.0 + SPAN_BONUS
+    order = sorted(
+        candidates.items(),
+        key=lambda item: (-rules[item[0]]["weight"] * len(item[1]) * per_trigger_max, item[0]),
+    )
+
+    heap = []  # (score, -rule index); smallest score, then latest rule, on top
+    for r, triggers in order:
+        weight = rules[r]["weight"]
+        if k is not None and len(heap) == k and weight * len(triggers) * per_trigger_max < heap[0][0]:
+            break
+        score = 0.0
+        for t in triggers:
+            match = _pattern(index, r, t).search(prompt_lower)
+            if match:
+                score += 1.0 + SPAN_BONUS * min(len(match.group()), SPAN_CAP) / SPAN_CAP
+        if not score:
+            continue
+        entry = (score * weight, -r)
+        if k is None or len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    return [rules[-neg_r] for _, neg_r in sorted(heap, reverse=True)]
+
+
+def get_matcher(rules_path=None):
+    """Return the trigger index, reused while skill-rules.json is unchanged.
+
+    A one-shot hook process builds it once; a long-lived process (see
+    hook-daemon.py) keeps it warm across prompts.
+    """
+    rules_path = Path(rules_path) if rules_path else default_rules_path()
     try:
-        hook_input = json.load(sys.stdin)
-    except (json.JSONDecodeError, EOFError):
-        sys.exit(0)  # no input or bad input — pass through silently
+        stamp = plugin_index.file_stamp(rules_path)
+    except OSError:
+        return []
+    cached = _MATCHERS.get(rules_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    index = build_index(load_rule_table(rules_path))
+    _MATCHERS[rules_path] = (stamp, index)
+    return index
+
+
+def iter_prompt_chunks(stream, chunk_size=STDIN_CHUNK_SIZE):
+    """Yield the decoded top-level "prompt" string of a JSON object, in pieces.
 
-    prompt = hook_input.get("prompt", "")
+    Reads `stream` incrementally and never holds more than a chunk of it,
+    skipping every other field. String bodies are located and decoded by
+    the C regex engine and JSON decoder one chunk at a time. Lenient about
+    details json.loads would reject, but raises ValueError for input that
+    is not a JSON object or is truncated.
+    """
+    buf, pos = "", 0
+    depth = 0
+    expect_key = False
+    key = None
+    seen_object = seen_prompt = False
+
+    while True:
+        match = _JSON_STRUCTURE.search(buf, pos)
+        if match is None:
+            if not seen_object and buf[pos:].strip():
+                raise ValueError("input is not a JSON object")
+            buf, pos = stream.read(chunk_size), 0
+            if not buf:
+                break
+            continue
+        char = match.group()
+        if not seen_object and (char != "{" or buf[pos:match.start()].strip()):
+            raise ValueError("input is not a JSON object")
+        pos = match.end()
+
+        if char == '"':
+            if depth == 1 and expect_key:
+                role, key_parts = "key", []
+            elif depth == 1 and key == "prompt" and not seen_prompt:
+                role, seen_prompt = "prompt", True
+            else:
+                role = "skip"
+            while True:
+                body_end = _JSON_STRING_BODY.match(buf, pos).end()
+                if body_end > pos and role != "skip":
+                    decoded = _LENIENT_JSON.decode(f'"{buf[pos:body_end]}"')
+                    if role == "prompt":
+                        yield decoded
+                    else:
+                        key_parts.append(decoded)
+                pos = body_end
+                if buf[pos:pos + 1] == '"':
+                    pos += 1
+                    break
+                if len(buf) - pos < 12:  # possibly an escape cut off by the read
+                    more = stream.read(chunk_size)
+                    if more:
+                        buf, pos = buf[pos:] + more, 0
+                        continue
+                    if pos == len(buf):
+                        raise ValueError("unterminated JSON string")
+                lone = _JSON_LONE_SURROGATE.match(buf, pos)
+                if lone is None:
+                    raise ValueError("invalid JSON string escape")
+                pos = lone.end()
+                if role == "prompt":
+                    yield chr(int(lone.group(1), 16))
+                elif role == "key":
+                    key_parts.append(chr(int(lone.group(1), 16)))
+            if role == "key":
+                key = "".join(key_parts)
+        elif char in "{[":
+            seen_object = True
+            depth += 1
+            expect_key = char == "{" and depth == 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return
+        elif depth == 1 and char == ":":
+            expect_key = False
+        elif depth == 1 and char == ",":
+            expect_key, key = True, None
+
+    if not seen_object or depth:
+        raise ValueError("truncated JSON input")
+
+
+def _collect_instructions(text, instructions):
+    """Append instruction-looking lines of text to instructions, in order.
+
+    A line qualifies if it starts like a request ("please", "can you",
+    "fix", ...) or ends with a question mark, and is not overly long.
+    """
+    line_starts = heapq.merge(
+        # match.start() in "\n" + text is the line start in text
+        (match.start() for match in _INSTRUCTION_START.finditer("\n" + text.lower())),
+        (text.rfind("\n", 0, match.start()) + 1 for match in _QUESTION_END.finditer(text)),
+    )
+    previous = -1
+    for start in line_starts:
+        if len(instructions) >= MAX_INSTRUCTION_LINES:
+            return
+        if start == previous:
+            continue
+        previous = start
+        end = text.find("\n", start)
+        end = len(text) if end == -1 else end
+        if end - start <= INSTRUCTION_LINE_MAX_CHARS:
+            instructions.append(text[start:end])
+
+
+def window_prompt(chunks, window_chars=None, full=None):
+    """Assemble the text to match from prompt pieces, in bounded memory.
+
+    Keeps the first and last window_chars characters plus up to
+    MAX_INSTRUCTION_LINES instruction-looking lines from the part in
+    between. Prompts that fit are returned unchanged; full=True always
+    returns the whole prompt.
+    """
+    window_chars = PROMPT_WINDOW_CHARS if window_chars is None else window_chars
+    full = FULL_PROMPT if full is None else full
+    if full:
+        return "".join(chunks)
+
+    head, head_len = [], 0
+    tail, tail_len = [], 0
+    instructions = []
+    carry = ""  # partial line at the start of the current tail
+    trimmed = False
+    for piece in chunks:
+        if head_len < window_chars:
+            taken = piece[:window_chars - head_len]
+            head.append(taken)
+            head_len += len(taken)
+            piece = piece[len(taken):]
+            if not piece:
+                continue
+        tail.append(piece)
+        tail_len += len(piece)
+        if tail_len > 2 * window_chars:
+            joined = "".join(tail)
+            dropped, kept = joined[:-window_chars], joined[-window_chars:]
+            lines_text = carry + dropped
+            cut = lines_text.rfind("\n")
+            if cut != -1:
+                _collect_instructions(lines_text[:cut], instructions)
+            carry = lines_text[cut + 1:][-INSTRUCTION_LINE_MAX_CHARS - 1:]
+            tail, tail_len = [kept], len(kept)
+            trimmed = True
+
+    if not trimmed:
+        return "".join(head) + "".join(tail)
+    return "\n".join(["".join(head), *instructions, "".join(tail)])
+
+
+def build_output(prompt):
+    """Return the hook output dict for a prompt, or None for no suggestion."""
     if not prompt:
-        sys.exit(0)
+        return None
 
-    rules = load_rules()
-    if not rules:
-        sys.exit(0)
+    index = get_matcher()
+    if not index or not index["rules"]:
+        return None
 
-    matches = match_prompt(prompt, rules)
-    if not matches:
-        sys.exit(0)
+    top_matches = rank_rules(prompt, index)
+    if not top_matches:
+        return None
 
-    # Build suggestion text — suggest top 2 matches max to avoid noise
-    top_matches = matches[:2]
+    # Build suggestion text
     if len(top_matches) == 1:
         skill = top_matches[0]
         context = (
@@ -77,14 +619,39 @@ def main():
             + "\nMention the most relevant one to the user if it fits their request."
         )
 
-    # Output JSON with additionalContext
-    output = {
+    return {
         "hookSpecificOutput": {
             "hookEventName": "UserPromptSubmit",
             "additionalContext": context,
         }
     }
-    json.dump(output, sys.stdout)
+
+
+def run_stream(stream) -> str:
+    """Handle one hook event read from a text stream; returns exact stdout text ("" = silent)."""
+    try:
+        prompt = window_prompt(iter_prompt_chunks(stream))
+    except ValueError:
+        return ""  # no input or bad input — pass through silently
+
+    output = build_output(prompt)
+    if output is None:
+        return ""
+    return json.dumps(output)
+
+
+def run(stdin_text: str) -> str:
+    """Handle one hook event: raw stdin text in, exact stdout text out ("" = silent)."""
+    return run_stream(io.StringIO(stdin_text))
+
+
+def main():
+    if "--batch" in sys.argv[1:]:
+        from hook_batch import batch_main
+
+        batch_main(run, sys.argv[1:])
+        return
+    sys.stdout.write(run_stream(sys.stdin))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+"""
+Benchmark: item throughput, one POST/DELETE per item vs the batch endpoints.
+
+Creates N items through the app (TestClient, so request parsing and
+validation are included) and deletes them again:
+  single   POST /api/items and DELETE /api/items/{id} per item
+  batch    POST and DELETE /api/items:batch, --batch-size items per request
+
+Usage:
+    python benchmarks/bench_batch_create.py [--store memory sqlite] [--items 2000] [--batch-size 1000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from src.api.routes import get_store  # noqa: E402
+from src.main import app  # noqa: E402
+from src.storage import MemoryStore, SQLiteStore  # noqa: E402
+
+
+def single(client, count: int) -> list[str]:
+    ids = [client.post("/api/items", json={"name": f"Item {i}"}).json()["id"] for i in range(count)]
+    for item_id in ids:
+        client.delete(f"/api/items/{item_id}")
+    return ids
+
+
+def batch(client, count: int, size: int) -> list[str]:
+    ids = []
+    for start in range(0, count, size):
+        payload = [{"name": f"Item {i}"} for i in range(start, min(count, start + size))]
+        ids += [r["item"]["id"] for r in client.post("/api/items:batch", json=payload).json()["results"]]
+    for start in range(0, count, size):
+        client.request("DELETE", "/api/items:batch", json=ids[start:start + size])
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", nargs="+", choices=["memory", "sqlite"], default=["memory", "sqlite"])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-batch-") as tmp:
+        for kind in args.store:
+            print(f"{kind}, {args.items:,} items created and deleted")
+            for name, run in (("single", lambda c: single(c, args.items)),
+                              ("batch", lambda c: batch(c, args.items, args.batch_size))):
+                store = MemoryStore() if kind == "memory" else SQLiteStore(Path(tmp) / f"{name}.db")
+                app.dependency_overrides[get_store] = lambda: store
+                client = TestClient(app)
+                start = time.perf_counter()
+                ids = run(client)
+                elapsed = time.perf_counter() - start
+                assert len(set(ids)) == args.items and store.page(0, 1) == ([], None)
+                print(f"  {name:<8}{elapsed:8.2f} s   {2 * args.items / elapsed:12,.0f} items/s")
+                store.close()
+            app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
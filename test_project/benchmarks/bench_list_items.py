@@ -0,0 +1,94 @@
+"""
+Benchmark: GET /api/items, full listing vs one cursor page, per store.
+
+Fills a store with N items and measures, per call:
+  full        building every ItemResponse, as list_items did before paging
+  first page  list_items(limit=100)
+  deep page   list_items(limit=100) from a cursor halfway through
+  with gaps   the deep page again after deleting a random 30% of the items
+
+Usage:
+    python benchmarks/bench_list_items.py [--store memory sqlite] [--sizes 10000 100000 1000000] [--repeat 20]
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import Response  # noqa: E402
+from src.api import routes  # noqa: E402
+from src.storage import MemoryStore, SQLiteStore  # noqa: E402
+from src.storage.sqlite import DELETE_ITEM, INSERT_ITEM  # noqa: E402
+
+
+def sample_items(count: int):
+    for i in range(count):
+        yield {"id": f"{i:08x}", "name": f"Item {i}", "description": "", "created_at": "2026-01-01T00:00:00+00:00"}
+
+
+def fill(kind: str, count: int, directory: Path):
+    """Return a store of the given kind holding count items."""
+    if kind == "memory":
+        store = MemoryStore()
+        for item in sample_items(count):
+            store.add(item)
+        return store
+    path = directory / f"items-{count}.db"
+    store = SQLiteStore(path)
+    with sqlite3.connect(path) as conn:  # one transaction, much faster than one add() per item
+        conn.executemany(INSERT_ITEM, (tuple(item.values()) for item in sample_items(count)))
+    return store
+
+
+def delete_random(store, kind: str, fraction: float):
+    ids = [item["id"] for item in store.page(0, 10**9)[0]]
+    doomed = random.Random(1).sample(ids, int(len(ids) * fraction))
+    if kind == "memory":
+        for item_id in doomed:
+            store.delete(item_id)
+    else:
+        with sqlite3.connect(store.path) as conn:
+            conn.executemany(DELETE_ITEM, ((item_id,) for item_id in doomed))
+
+
+def measure(fn, repeat: int) -> str:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return f"p50 {statistics.median(samples):10.3f} ms   max {samples[-1]:10.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", nargs="+", choices=["memory", "sqlite"], default=["memory", "sqlite"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-items-") as tmp:
+        for kind in args.store:
+            for size in args.sizes:
+                store = fill(kind, size, Path(tmp))
+                page = lambda cursor=None: routes.list_items(Response(), limit=100, cursor=cursor, store=store)  # noqa: E731
+                middle = routes.encode_cursor(store.page(0, size // 2)[1])
+                full = lambda: [routes.ItemResponse(**item) for item in store.page(0, 10**9)[0]]  # noqa: E731
+                print(f"{kind}, {size:,} items")
+                print(f"  {'full':<12}{measure(full, max(1, args.repeat // 10) if size >= 1_000_000 else args.repeat)}")
+                print(f"  {'first page':<12}{measure(page, args.repeat)}")
+                print(f"  {'deep page':<12}{measure(lambda: page(middle), args.repeat)}")
+                delete_random(store, kind, 0.3)
+                print(f"  {'with gaps':<12}{measure(lambda: page(middle), args.repeat)}")
+                store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,30 @@
 """
 API routes for the minimal API.
 """
-from fastapi import APIRouter, HTTPException
+import base64
+import os
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
-from src.utils.helpers import generate_id, format_timestamp
+from src.storage import DuplicateIdError, ItemStore, create_store
+from src.utils.helpers import generate_id, generate_ids, format_timestamp
 
 router = APIRouter()
 
-# In-memory storage for simplicity
-items_db: dict[str, dict] = {}
+# "memory" (default) or "sqlite:///path/to/items.db"; see src/storage
+store: ItemStore = create_store(os.environ.get("ITEMS_STORE", "memory"))
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 10_000
+ID_ATTEMPTS = 5
+MAX_SEQ = 2**63 - 1  # SQLite's INTEGER range
+
+
+def get_store() -> ItemStore:
+    """The item store (a dependency, so tests can swap it)."""
+    return store
 
 
 class ItemCreate(BaseModel):
@@ -23,37 +39,137 @@ class ItemResponse(BaseModel):
     created_at: str
 
 
+class BatchCreated(BaseModel):
+    index: int
+    status: str  # "created"
+    item: ItemResponse
+
+
+class BatchCreateResponse(BaseModel):
+    results: list[BatchCreated]
+
+
+class BatchDeleted(BaseModel):
+    id: str
+    status: str  # "deleted" or "not_found"
+
+
+class BatchDeleteResponse(BaseModel):
+    results: list[BatchDeleted]
+
+
+def encode_cursor(seq: int) -> str:
+    """Encode the sequence number of the last item on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(str(seq).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor from encode_cursor(); raise ValueError if it is not one."""
+    text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    if not text.isdigit() or int(text) > MAX_SEQ:
+        raise ValueError(cursor)
+    return int(text)
+
+
+# The handlers are plain functions: FastAPI runs them on its thread pool, so
+# a store's blocking I/O doesn't hold up the event loop.
+
 @router.get("/items")
-async def list_items() -> list[ItemResponse]:
-    """List all items."""
-    return [ItemResponse(**item) for item in items_db.values()]
+def list_items(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    store: ItemStore = Depends(get_store),
+) -> list[ItemResponse]:
+    """List items in creation order, one page at a time.
+
+    When there are more items, the X-Next-Cursor header holds the cursor for
+    the next page. A cursor stays valid while items are created or deleted.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    items, next_seq = store.page(after, limit)
+    if next_seq is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_seq)
+    return [ItemResponse(**item) for item in items]
 
 
 @router.get("/items/{item_id}")
-async def get_item(item_id: str) -> ItemResponse:
+def get_item(item_id: str, store: ItemStore = Depends(get_store)) -> ItemResponse:
     """Get a specific item by ID."""
-    if item_id not in items_db:
+    item = store.get(item_id)
+    if item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    return ItemResponse(**items_db[item_id])
+    return ItemResponse(**item)
 
 
 @router.post("/items", status_code=201)
-async def create_item(item: ItemCreate) -> ItemResponse:
+def create_item(item: ItemCreate, store: ItemStore = Depends(get_store)) -> ItemResponse:
     """Create a new item."""
-    item_id = generate_id()
-    new_item = {
-        "id": item_id,
-        "name": item.name,
-        "description": item.description,
-        "created_at": format_timestamp()
-    }
-    items_db[item_id] = new_item
+    created_at = format_timestamp()
+    for _ in range(ID_ATTEMPTS):
+        try:
+            new_item = store.add({
+                "id": generate_id(),
+                "name": item.name,
+                "description": item.description,
+                "created_at": created_at
+            })
+            break
+        except DuplicateIdError:
+            continue  # the ID is taken; try a fresh one
+    else:
+        raise HTTPException(status_code=409, detail="Could not allocate a unique item ID")
     return ItemResponse(**new_item)
 
 
 @router.delete("/items/{item_id}", status_code=204)
-async def delete_item(item_id: str):
+def delete_item(item_id: str, store: ItemStore = Depends(get_store)):
     """Delete an item."""
-    if item_id not in items_db:
+    if not store.delete(item_id):
         raise HTTPException(status_code=404, detail="Item not found")
-    del items_db[item_id]
+
+
+@router.post("/items:batch", status_code=201)
+def create_items(
+    items: Annotated[list[ItemCreate], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    store: ItemStore = Depends(get_store),
+) -> BatchCreateResponse:
+    """Create many items at once, all or none.
+
+    The whole array is validated before anything is stored (a bad item
+    fails the batch with 422), and the items share one created_at.
+    """
+    created_at = format_timestamp()
+    new_items = [
+        {"id": item_id, "name": item.name, "description": item.description, "created_at": created_at}
+        for item_id, item in zip(generate_ids(len(items)), items)
+    ]
+    for _ in range(ID_ATTEMPTS):
+        try:
+            stored = store.add_many(new_items)
+            break
+        except DuplicateIdError as e:
+            taken = set(e.ids)
+            fresh = iter(generate_ids(len(taken), exclude={item["id"] for item in new_items}))
+            new_items = [{**item, "id": next(fresh)} if item["id"] in taken else item for item in new_items]
+    else:
+        raise HTTPException(status_code=409, detail="Could not allocate unique item IDs")
+    return {"results": [{"index": index, "status": "created", "item": item} for index, item in enumerate(stored)]}
+
+
+@router.delete("/items:batch")
+def delete_items(
+    item_ids: Annotated[list[str], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    store: ItemStore = Depends(get_store),
+) -> BatchDeleteResponse:
+    """Delete many items at once, in one transaction.
+
+    IDs that don't exist are reported as not_found; the others are deleted.
+    """
+    deleted = store.delete_many(item_ids)
+    return {"results": [
+        {"id": item_id, "status": "deleted" if done else "not_found"} for item_id, done in zip(item_ids, deleted)
+    ]}
@@ -1,13 +1,25 @@
 """
 Minimal FastAPI application for Claude Code learning exercises.
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from src.api import routes
 from src.api.routes import router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the item store on shutdown."""
+    yield
+    routes.store.close()
+
+
 app = FastAPI(
     title="Minimal API",
     description="A simple API for practicing Claude Code features",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(router, prefix="/api")
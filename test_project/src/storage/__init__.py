@@ -0,0 +1,16 @@
+# Storage package
+from src.storage.base import DuplicateIdError, ItemStore
+from src.storage.memory import MemoryStore
+from src.storage.sqlite import SQLiteStore
+
+__all__ = ["DuplicateIdError", "ItemStore", "MemoryStore", "SQLiteStore", "create_store"]
+
+
+def create_store(url: str) -> ItemStore:
+    """Create the store an ITEMS_STORE url names: "memory", or
+    "sqlite:///relative/path.db" / "sqlite:////absolute/path.db"."""
+    if url == "memory":
+        return MemoryStore()
+    if url.startswith("sqlite:///") and len(url) > len("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unknown ITEMS_STORE: {url!r}")
@@ -0,0 +1,54 @@
+"""
+Storage interface for items.
+"""
+from abc import ABC, abstractmethod
+
+
+class DuplicateIdError(Exception):
+    """An add would reuse IDs that are already taken; nothing was stored."""
+
+    def __init__(self, ids: list[str]):
+        super().__init__(f"IDs already taken: {', '.join(ids)}")
+        self.ids = ids
+
+
+class ItemStore(ABC):
+    """Where items live. Items are dicts with id, name, description and
+    created_at; each store also numbers them in creation order ("seq"), which
+    is what list cursors point at."""
+
+    @abstractmethod
+    def add(self, item: dict) -> dict:
+        """Store a new item and return it with its sequence number. Raise
+        DuplicateIdError, storing nothing, if its ID is taken."""
+
+    @abstractmethod
+    def add_many(self, items: list[dict]) -> list[dict]:
+        """Store new items atomically and return them with their sequence
+        numbers, in order. Raise DuplicateIdError, storing none of them, if
+        any ID is taken or repeated."""
+
+    @abstractmethod
+    def get(self, item_id: str) -> dict | None:
+        """Return an item, or None if there is no such item."""
+
+    @abstractmethod
+    def page(self, after: int, limit: int) -> tuple[list[dict], int | None]:
+        """Return up to limit items created after sequence number `after`, and
+        the sequence number to continue from (None on the last page)."""
+
+    @abstractmethod
+    def delete(self, item_id: str) -> bool:
+        """Delete an item; return False if there was no such item."""
+
+    @abstractmethod
+    def delete_many(self, item_ids: list[str]) -> list[bool]:
+        """Delete items atomically; return, per ID, whether it was deleted
+        (False if there was no such item, or it came earlier in the list)."""
+
+    @abstractmethod
+    def clear(self):
+        """Delete every item."""
+
+    def close(self):
+        """Release the store's resources."""
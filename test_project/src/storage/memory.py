@@ -0,0 +1,90 @@
+"""
+In-memory item store: fast, but per process and lost on restart.
+"""
+import bisect
+import itertools
+import threading
+
+from src.storage.base import DuplicateIdError, ItemStore
+
+COMPACT_SLACK = 1024
+
+
+class MemoryStore(ItemStore):
+    """Items in a dict, plus an index of (sequence number, item id) pairs in
+    creation order. Deleted items stay in the index until it is compacted,
+    and page() skips them."""
+
+    def __init__(self):
+        self.items: dict[str, dict] = {}
+        self.order: list[tuple[int, str]] = []
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _compact(self):
+        """Drop deleted items from the index once they outnumber the live ones."""
+        if len(self.order) > 2 * len(self.items) + COMPACT_SLACK:
+            self.order[:] = [
+                (seq, item_id) for seq, item_id in self.order
+                if self.items.get(item_id, {}).get("seq") == seq
+            ]
+
+    def add(self, item: dict) -> dict:
+        with self._lock:
+            if item["id"] in self.items:
+                raise DuplicateIdError([item["id"]])
+            item = {**item, "seq": next(self._sequence)}
+            self.items[item["id"]] = item
+            self.order.append((item["seq"], item["id"]))
+            self._compact()
+        return item
+
+    def add_many(self, items: list[dict]) -> list[dict]:
+        with self._lock:
+            taken, seen = [], set()
+            for item in items:
+                if item["id"] in self.items or item["id"] in seen:
+                    taken.append(item["id"])
+                seen.add(item["id"])
+            if taken:
+                raise DuplicateIdError(taken)
+            added = [{**item, "seq": next(self._sequence)} for item in items]
+            self.items.update((item["id"], item) for item in added)
+            self.order.extend((item["seq"], item["id"]) for item in added)
+            self._compact()
+        return added
+
+    def get(self, item_id: str) -> dict | None:
+        return self.items.get(item_id)
+
+    def page(self, after: int, limit: int) -> tuple[list[dict], int | None]:
+        items = []
+        with self._lock:
+            start = bisect.bisect_right(self.order, after, key=lambda entry: entry[0])
+            for index in range(start, len(self.order)):
+                seq, item_id = self.order[index]
+                item = self.items.get(item_id)
+                if item is None or item["seq"] != seq:
+                    continue  # deleted
+                if len(items) == limit:
+                    return items, items[-1]["seq"]
+                items.append(item)
+        return items, None
+
+    def delete(self, item_id: str) -> bool:
+        with self._lock:
+            if self.items.pop(item_id, None) is None:
+                return False
+            self._compact()
+        return True
+
+    def delete_many(self, item_ids: list[str]) -> list[bool]:
+        with self._lock:
+            deleted = [self.items.pop(item_id, None) is not None for item_id in item_ids]
+            self._compact()
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self.items.clear()
+            self.order.clear()
@@ -0,0 +1,194 @@
+"""
+SQLite item store: durable, and shared by every worker process on the box.
+"""
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from src.storage.base import DuplicateIdError, ItemStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    created_at TEXT NOT NULL
+)
+"""
+# Fixed statements with parameters: each connection prepares them once and
+# reuses them from its statement cache
+INSERT_ITEM = "INSERT INTO items (id, name, description, created_at) VALUES (?, ?, ?, ?)"
+SELECT_ITEM = "SELECT seq, id, name, description, created_at FROM items WHERE id = ?"
+SELECT_PAGE = "SELECT seq, id, name, description, created_at FROM items WHERE seq > ? ORDER BY seq LIMIT ?"
+DELETE_ITEM = "DELETE FROM items WHERE id = ?"
+DELETE_ALL = "DELETE FROM items"
+# Batches pass their IDs as one JSON array, so the statement stays the same for any batch size
+SELECT_EXISTING = "SELECT id FROM items WHERE id IN (SELECT value FROM json_each(?))"
+DELETE_ITEMS = "DELETE FROM items WHERE id IN (SELECT value FROM json_each(?))"
+LAST_SEQ = "SELECT seq FROM sqlite_sequence WHERE name = 'items'"
+COLUMNS = ("seq", "id", "name", "description", "created_at")
+
+DEFAULT_POOL_SIZE = 4
+BUSY_TIMEOUT = 5.0
+
+
+class _Write:
+    """One write waiting for a group commit, and its outcome."""
+
+    def __init__(self, op):
+        self.op = op  # called with the connection; its return value is the result
+        self.finished = False
+        self.result = None
+        self.error = None
+
+
+class SQLiteStore(ItemStore):
+    """Items in a SQLite database in WAL mode.
+
+    Reads take a connection from a pool, so they run alongside each other
+    and alongside writes. Writes go through one connection with group
+    commit: a writer commits everything queued behind the previous commit
+    in one transaction, each write (one statement, or a whole batch) in its
+    own savepoint so one failure doesn't undo the others. Other processes
+    (e.g. uvicorn workers) can open the same file; SQLite serializes their
+    writes.
+    """
+
+    def __init__(self, path, pool_size: int = DEFAULT_POOL_SIZE):
+        self.path = str(path)
+        self._writer = self._connect()
+        self._writer.execute(SCHEMA)
+        self._readers = queue.SimpleQueue()
+        for _ in range(pool_size):
+            self._readers.put(self._connect())
+        self._pending: list[_Write] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at each checkpoint; safe with WAL
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _commit(self, batch: list[_Write]):
+        conn = self._writer
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for write in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    write.result = write.op(conn)
+                except Exception as e:  # e.g. a name SQLite can't encode; fails this write only
+                    conn.execute("ROLLBACK TO write")
+                    write.error = e
+                conn.execute("RELEASE write")
+            conn.execute("COMMIT")
+        except Exception as e:
+            # Nothing in the group was committed: fail every write, and leave
+            # the connection out of the transaction for the next group
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for write in batch:
+                write.error = write.error or e
+        finally:
+            for write in batch:
+                write.finished = True
+
+    def _write(self, op):
+        """Run op(connection) in the next group commit and return its result."""
+        write = _Write(op)
+        with self._pending_lock:
+            self._pending.append(write)
+        with self._write_lock:
+            if not write.finished:  # else a writer before us committed it
+                with self._pending_lock:
+                    batch, self._pending = self._pending, []
+                self._commit(batch)
+        if write.error:
+            raise write.error
+        return write.result
+
+    def add(self, item: dict) -> dict:
+        params = (item["id"], item["name"], item["description"], item["created_at"])
+
+        def insert(conn):
+            try:
+                return conn.execute(INSERT_ITEM, params).lastrowid
+            except sqlite3.IntegrityError:
+                if conn.execute(SELECT_ITEM, (item["id"],)).fetchone():
+                    raise DuplicateIdError([item["id"]]) from None
+                raise
+
+        return {**item, "seq": self._write(insert)}
+
+    def add_many(self, items: list[dict]) -> list[dict]:
+        ids = [item["id"] for item in items]
+
+        def insert(conn):
+            taken, seen = [row[0] for row in conn.execute(SELECT_EXISTING, (json.dumps(ids),))], set()
+            for item_id in ids:
+                if item_id in seen:
+                    taken.append(item_id)
+                seen.add(item_id)
+            if taken:
+                raise DuplicateIdError(taken)
+            conn.executemany(INSERT_ITEM, [
+                (item["id"], item["name"], item["description"], item["created_at"]) for item in items
+            ])
+            # AUTOINCREMENT numbers the rows of one transaction consecutively
+            return conn.execute(LAST_SEQ).fetchone()[0] - len(items) + 1
+
+        first = self._write(insert)
+        return [{**item, "seq": first + index} for index, item in enumerate(items)]
+
+    def get(self, item_id: str) -> dict | None:
+        with self._reader() as conn:
+            row = conn.execute(SELECT_ITEM, (item_id,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def page(self, after: int, limit: int) -> tuple[list[dict], int | None]:
+        with self._reader() as conn:
+            rows = conn.execute(SELECT_PAGE, (after, limit + 1)).fetchall()
+        items = [dict(zip(COLUMNS, row)) for row in rows[:limit]]
+        return items, items[-1]["seq"] if len(rows) > limit else None
+
+    def delete(self, item_id: str) -> bool:
+        return self._write(lambda conn: conn.execute(DELETE_ITEM, (item_id,)).rowcount) > 0
+
+    def delete_many(self, item_ids: list[str]) -> list[bool]:
+        def delete(conn):
+            payload = json.dumps(item_ids)
+            existing = {row[0] for row in conn.execute(SELECT_EXISTING, (payload,))}
+            conn.execute(DELETE_ITEMS, (payload,))
+            return existing
+
+        existing = self._write(delete)
+        deleted = []
+        for item_id in item_ids:
+            deleted.append(item_id in existing)
+            existing.discard(item_id)
+        return deleted
+
+    def clear(self):
+        self._write(lambda conn: conn.execute(DELETE_ALL))
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
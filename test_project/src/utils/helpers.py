@@ -1,6 +1,7 @@
 """
 Utility functions for the minimal API.
 """
+import os
 import uuid
 from datetime import datetime, timezone
 
@@ -10,6 +11,16 @@ def generate_id() -> str:
     return str(uuid.uuid4())[:8]
 
 
+def generate_ids(count: int, exclude=frozenset()) -> list[str]:
+    """Generate count distinct identifiers like generate_id(), none of them in exclude."""
+    ids = set()
+    while len(ids) < count:
+        random_hex = os.urandom(4 * (count - len(ids))).hex()
+        ids.update(random_hex[i:i + 8] for i in range(0, len(random_hex), 8))
+        ids.difference_update(exclude)
+    return list(ids)
+
+
 def format_timestamp() -> str:
     """Return current UTC timestamp in ISO format."""
     return datetime.now(timezone.utc).isoformat()
@@ -4,21 +4,24 @@ Tests for API routes.
 import pytest
 from fastapi.testclient import TestClient
 from src.main import app
-from src.api.routes import items_db
+from src.api.routes import get_store
+from src.storage import MemoryStore, SQLiteStore
 
 
-@pytest.fixture(autouse=True)
-def clear_db():
-    """Clear the in-memory database before each test."""
-    items_db.clear()
-    yield
-    items_db.clear()
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """An empty store of each backend; every test runs against both."""
+    store = MemoryStore() if request.param == "memory" else SQLiteStore(tmp_path / "items.db")
+    yield store
+    store.close()
 
 
 @pytest.fixture
-def client():
-    """Create a test client."""
-    return TestClient(app)
+def client(store):
+    """Create a test client that uses the store."""
+    app.dependency_overrides[get_store] = lambda: store
+    yield TestClient(app)
+    app.dependency_overrides.clear()
 
 
 def test_root_endpoint(client):
@@ -42,6 +45,23 @@ def test_create_item(client):
     assert "created_at" in data
 
 
+def test_create_item_replaces_a_taken_id(client, store, monkeypatch):
+    """Test that a taken ID is regenerated, not overwritten, on both stores."""
+    from src.api import routes
+
+    store.add({"id": "taken001", "name": "Old", "description": "", "created_at": "t"})
+    ids = iter(["taken001", "fresh002"])
+    monkeypatch.setattr(routes, "generate_id", lambda: next(ids))
+
+    response = client.post("/api/items", json={"name": "New"})
+    assert response.status_code == 201
+    assert response.json()["id"] == "fresh002"
+    assert store.get("taken001")["name"] == "Old"
+
+    monkeypatch.setattr(routes, "generate_id", lambda: "taken001")
+    assert client.post("/api/items", json={"name": "New"}).status_code == 409
+
+
 def test_list_items_empty(client):
     """Test listing items when empty."""
     response = client.get("/api/items")
@@ -92,3 +112,167 @@ def test_delete_item_not_found(client):
     """Test deleting a non-existent item."""
     response = client.delete("/api/items/nonexistent")
     assert response.status_code == 404
+
+
+def test_list_items_paginates_in_creation_order(client):
+    """Test walking the list a page at a time with the next cursor."""
+    names = [f"Item {i}" for i in range(5)]
+    for name in names:
+        client.post("/api/items", json={"name": name})
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/items", params=params)
+        assert response.status_code == 200
+        seen.append([item["name"] for item in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [names[0:2], names[2:4], names[4:5]]
+
+
+def test_cursor_survives_creates_and_deletes(client):
+    """Test that a cursor stays valid when items change between pages."""
+    ids = [client.post("/api/items", json={"name": f"Item {i}"}).json()["id"] for i in range(4)]
+    first = client.get("/api/items", params={"limit": 2})
+    cursor = first.headers["X-Next-Cursor"]
+
+    client.delete(f"/api/items/{ids[1]}")  # the last item of the page the cursor points after
+    client.delete(f"/api/items/{ids[2]}")
+    client.post("/api/items", json={"name": "Item 4"})
+
+    response = client.get("/api/items", params={"limit": 2, "cursor": cursor})
+    assert [item["name"] for item in response.json()] == ["Item 3", "Item 4"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_items_rejects_bad_paging_parameters(client):
+    """Test an invalid cursor and out-of-range limits."""
+    from src.api.routes import encode_cursor
+
+    assert client.get("/api/items", params={"cursor": "not a cursor!"}).status_code == 400
+    assert client.get("/api/items", params={"cursor": encode_cursor(2**63)}).status_code == 400
+    assert client.get("/api/items", params={"cursor": encode_cursor(2**63 - 1)}).status_code == 200
+    assert client.get("/api/items", params={"limit": 0}).status_code == 422
+    assert client.get("/api/items", params={"limit": 100_000}).status_code == 422
+
+
+def test_sqlite_store_keeps_items_across_restarts(tmp_path):
+    """Test that a reopened SQLite store has the items and continues their order."""
+    store = SQLiteStore(tmp_path / "items.db")
+    first = store.add({"id": "a", "name": "A", "description": "", "created_at": "t"})
+    store.close()
+
+    store = SQLiteStore(tmp_path / "items.db")
+    second = store.add({"id": "b", "name": "B", "description": "", "created_at": "t"})
+    assert store.get("a")["name"] == "A"
+    assert store.page(0, 10) == ([first, second], None)
+    store.close()
+
+
+def test_sqlite_store_group_commits_concurrent_writes(tmp_path):
+    """Test that writes from many threads all land, and a failed one fails alone."""
+    import threading
+
+    store = SQLiteStore(tmp_path / "items.db")
+    errors = []
+
+    def add(i):
+        try:
+            store.add({"id": f"id-{i % 40}", "name": f"Item {i}", "description": "", "created_at": "t"})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    items, _ = store.page(0, 100)
+    assert len(items) == 40 and len(errors) == 10  # ids 0-9 were used twice
+    assert [item["seq"] for item in items] == sorted(item["seq"] for item in items)
+    store.close()
+
+
+def test_sqlite_store_failed_write_does_not_affect_its_group(tmp_path):
+    """Test that a write failing with a non-SQLite error fails alone in its group commit."""
+    import threading
+    import time
+
+    store = SQLiteStore(tmp_path / "items.db")
+    names = ["good 0", "bad \ud800", "good 1", "good 2"]  # a lone surrogate can't be encoded
+    errors = {}
+
+    def add(name):
+        try:
+            store.add({"id": name, "name": name, "description": "", "created_at": "t"})
+        except Exception as e:
+            errors[name] = e
+
+    with store._write_lock:  # queue every write behind one commit
+        threads = [threading.Thread(target=add, args=(name,)) for name in names]
+        for thread in threads:
+            thread.start()
+        while len(store._pending) < len(names):
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+
+    assert list(errors) == ["bad \ud800"] and isinstance(errors["bad \ud800"], UnicodeEncodeError)
+    assert sorted(item["name"] for item in store.page(0, 10)[0]) == ["good 0", "good 1", "good 2"]
+    store.add({"id": "next", "name": "next", "description": "", "created_at": "t"})
+    assert store.get("next") is not None
+    store.close()
+
+
+def test_batch_create_items(client):
+    """Test creating several items in one request."""
+    response = client.post("/api/items:batch", json=[{"name": "A"}, {"name": "B", "description": "b"}, {"name": "C"}])
+    assert response.status_code == 201
+    results = response.json()["results"]
+    assert [(r["index"], r["status"], r["item"]["name"]) for r in results] == [
+        (0, "created", "A"), (1, "created", "B"), (2, "created", "C"),
+    ]
+    assert len({r["item"]["id"] for r in results}) == 3
+    assert len({r["item"]["created_at"] for r in results}) == 1
+
+    listed = client.get("/api/items").json()
+    assert [item["name"] for item in listed] == ["A", "B", "C"]
+    assert client.get(f"/api/items/{results[1]['item']['id']}").json()["description"] == "b"
+
+
+def test_batch_create_is_all_or_nothing(client):
+    """Test that one invalid item fails the whole batch."""
+    response = client.post("/api/items:batch", json=[{"name": "A"}, {"description": "no name"}])
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:2] == ["body", 1]
+    assert client.get("/api/items").json() == []
+    assert client.post("/api/items:batch", json=[]).status_code == 422
+
+
+def test_batch_create_replaces_taken_ids(client, store, monkeypatch):
+    """Test that IDs that are already taken are regenerated, not overwritten."""
+    from src.api import routes
+
+    store.add({"id": "taken001", "name": "Old", "description": "", "created_at": "t"})
+    real = routes.generate_ids
+    calls = iter([["taken001", "fresh002"]])
+    monkeypatch.setattr(routes, "generate_ids", lambda count, exclude=frozenset(): next(calls, None) or real(count, exclude))
+
+    response = client.post("/api/items:batch", json=[{"name": "A"}, {"name": "B"}])
+    ids = [r["item"]["id"] for r in response.json()["results"]]
+    assert ids[0] != "taken001" and ids[1] == "fresh002"
+    assert store.get("taken001")["name"] == "Old"
+    assert [item["name"] for item in client.get("/api/items").json()] == ["Old", "A", "B"]
+
+
+def test_batch_delete_items(client):
+    """Test deleting several items in one request, with per-ID outcomes."""
+    created = client.post("/api/items:batch", json=[{"name": "A"}, {"name": "B"}, {"name": "C"}]).json()["results"]
+    a, b, c = (r["item"]["id"] for r in created)
+
+    response = client.request("DELETE", "/api/items:batch", json=[a, "missing", c, a])
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "not_found", "deleted", "not_found"]
+    assert [item["id"] for item in client.get("/api/items").json()] == [b]
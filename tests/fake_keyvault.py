@@ -0,0 +1,126 @@
+"""Local fake of Azure Key Vault's secrets API and an App Service identity endpoint.
+
+Serves HTTPS (the Key Vault SDK refuses anything else) with a self-signed
+certificate for 127.0.0.1, written to `ca_bundle`; point REQUESTS_CA_BUNDLE
+at it. GET /secrets/<name> answers the way Key Vault does: a 401 bearer
+challenge without a token, the secret with one. GET /identity hands out
+tokens the way App Service managed identity does, so DefaultAzureCredential
+works against it with IDENTITY_ENDPOINT=<endpoint>/identity and
+IDENTITY_HEADER set. Every reply waits `delay` seconds, standing in for the
+round trip to Azure. Needs `cryptography` (installed with azure-identity).
+"""
+
+import datetime
+import ipaddress
+import json
+import os
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# The SDK only accepts a challenge whose resource is a parent domain of the
+# vault's host (as vault.azure.net is of <name>.vault.azure.net). For
+# 127.0.0.1:<port> that is "0.0.1:<port>", as far as its suffix check goes.
+CHALLENGE = 'Bearer authorization="https://login.microsoftonline.com/fake-tenant", resource="https://0.0.1:{port}"'
+
+
+class FakeVaultHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = urlparse(self.path).path
+        with self.server.lock:
+            self.server.requests.append(path)
+        time.sleep(self.server.delay)
+        if path == "/identity":
+            self._reply(200, {
+                "access_token": "fake-token",
+                "expires_on": str(int(time.time()) + 3600),
+                "token_type": "Bearer",
+            })
+            return
+        name = path.strip("/").split("/")[-1]
+        if not self.headers.get("Authorization"):
+            challenge = CHALLENGE.format(port=self.server.server_address[1])
+            self._reply(401, {"error": {"code": "Unauthorized"}}, {"WWW-Authenticate": challenge})
+        elif path.startswith("/secrets/") and name in self.server.secrets:
+            self._reply(200, {
+                "value": self.server.secrets[name],
+                "id": f"{self.server.endpoint}/secrets/{name}/0123456789abcdef",
+                "attributes": {"enabled": True},
+            })
+        else:
+            self._reply(404, {"error": {"code": "SecretNotFound", "message": name}})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeVault(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, secrets, delay=0.0):
+        super().__init__(("127.0.0.1", 0), FakeVaultHandler)
+        self.secrets = dict(secrets)
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+        self._tmp = tempfile.TemporaryDirectory(prefix="fake-keyvault-")
+        self.ca_bundle = os.path.join(self._tmp.name, "cert.pem")
+        key_file = os.path.join(self._tmp.name, "key.pem")
+        _self_signed_cert(self.ca_bundle, key_file)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.ca_bundle, key_file)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+
+    @property
+    def endpoint(self) -> str:
+        """The value to use as KEY_VAULT_ENDPOINT."""
+        return f"https://127.0.0.1:{self.server_address[1]}"
+
+    def secret_requests(self) -> list:
+        return [path for path in self.requests if path.startswith("/secrets/")]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        self._tmp.cleanup()
+
+
+def _self_signed_cert(cert_file, key_file):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5)).not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    with open(cert_file, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
@@ -0,0 +1,158 @@
+"""Local stub of the OpenAI-compatible chat completions API (stdlib only).
+
+Serves POST .../chat/completions the way Azure OpenAI's /openai/v1/ endpoint
+does, after a fixed delay, so run_analysis.py can be exercised and timed
+offline. The reply echoes the first line of the system prompt. A system
+prompt containing FAIL_MARKER gets a 500 and one containing SLOW_MARKER
+sleeps for slow_delay instead of delay. The first `throttle` requests get
+a 429 with a retry-after-ms header, as when the deployment's quota is used up.
+With "stream": true the reply comes as server-sent events, one word every
+stream_delay seconds; one containing BREAK_MARKER fails after two words.
+Usage counts one token per whitespace-separated word.
+
+Usage (for timing by hand):
+    python tests/stub_openai.py --delay 2
+    AZURE_OPENAI_API_KEY=stub AZURE_OPENAI_ENDPOINT=http://127.0.0.1:<port> \\
+        python scripts/quality-action/run_analysis.py --repo-path . --mode both
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAIL_MARKER = "STUB-FAIL"
+SLOW_MARKER = "STUB-SLOW"
+BREAK_MARKER = "STUB-BREAK"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        system = next((m["content"] for m in body["messages"] if m["role"] == "system"), "")
+        self.server.requests.append(body)
+        with self.server.lock:
+            throttled = self.server.throttle > 0
+            self.server.throttle -= throttled
+        if throttled:
+            self._reply(429, {"error": {"message": "stub rate limit", "type": "rate_limit"}},
+                        {"retry-after-ms": str(self.server.retry_after_ms)})
+            return
+
+        time.sleep(self.server.slow_delay if SLOW_MARKER in system else self.server.delay)
+        if FAIL_MARKER in system or not self.path.endswith("/chat/completions"):
+            self._reply(500, {"error": {"message": "stub failure", "type": "server_error"}})
+            return
+        reply = f"stub reply to: {system.splitlines()[0]}"
+        prompt_tokens = sum(len(m["content"].split()) for m in body["messages"])
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(reply.split()),
+            "total_tokens": prompt_tokens + len(reply.split()),
+        }
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            self._stream(body["model"], reply, BREAK_MARKER in system, usage if include_usage else None)
+            return
+        self._reply(200, {
+            "id": f"chatcmpl-stub-{len(self.server.requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, model, reply, fail=False, usage=None):
+        def event(payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": f"chatcmpl-stub-{len(self.server.requests)}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        words = reply.split(" ")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i, word in enumerate(words):
+                if fail and i == 2:
+                    event({"error": {"message": "stub stream failure", "type": "server_error"}})
+                    return
+                event(chunk({"content": word if i == 0 else f" {word}"}))
+                time.sleep(self.server.stream_delay)
+            event(chunk({}, "stop"))
+            if usage:
+                event({**chunk({}), "choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and hung up
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay=0.0, slow_delay=5.0, port=0, throttle=0, retry_after_ms=200, stream_delay=0.0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.delay = delay
+        self.slow_delay = slow_delay
+        self.stream_delay = stream_delay
+        self.throttle = throttle
+        self.retry_after_ms = retry_after_ms
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        """The value to use as AZURE_OPENAI_ENDPOINT."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds before each reply")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    server = StubServer(args.delay, port=args.port)
+    print(f"AZURE_OPENAI_ENDPOINT={server.endpoint}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Smoke tests for the benchmarks in scripts/benchmarks/.
+
+Each benchmark runs once, as its Usage line says, with the smallest
+sizes its options allow, so a change that breaks one (a new import the
+child processes can't resolve, a renamed function) fails here instead
+of the next time someone measures.
+Run with: pytest tests/test_benchmarks.py
+"""
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts", "benchmarks")
+
+# Script -> arguments small enough for a smoke run
+SMOKE_ARGS = {
+    "bench_batch.py": ["--events", "200", "--workers", "2", "--spawn", "2"],
+    "bench_hook_daemon.py": ["--repeat", "2"],
+    "bench_prompt_window.py": [],
+    "bench_scan_repo.py": ["--node-modules", "100", "--repeat", "1"],
+    "bench_sensitive_paths.py": ["--paths", "200", "--repeat", "2"],
+    "bench_session_start.py": ["--repeat", "2"],
+    "bench_skill_matcher.py": ["--repeat", "1", "--rules", "20"],
+}
+
+
+def test_every_benchmark_has_smoke_args():
+    scripts = {os.path.basename(path) for path in glob.glob(os.path.join(BENCHMARKS_DIR, "bench_*.py"))}
+    assert scripts == set(SMOKE_ARGS)
+
+
+@pytest.mark.parametrize("script", sorted(SMOKE_ARGS))
+def test_benchmark_runs(script, tmp_path):
+    if script == "bench_prompt_window.py" and not os.path.exists("/proc/self/status"):
+        pytest.skip("reads peak RSS from /proc (Linux only)")
+    if script == "bench_hook_daemon.py" and sys.platform == "win32":
+        pytest.skip("the hook daemon needs Unix domain sockets")
+    env = dict(os.environ, CLAUDE_LIBRARY_CACHE_DIR=str(tmp_path / "cache"))
+    result = subprocess.run(
+        [sys.executable, os.path.join(BENCHMARKS_DIR, script), *SMOKE_ARGS[script]],
+        capture_output=True, text=True, env=env, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip()
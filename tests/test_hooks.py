@@ -0,0 +1,512 @@
+"""
+Tests for the plugin hook scripts in scripts/.
+
+The scripts have hyphenated file names, so they are imported by path.
+Run with: pytest tests/test_hooks.py
+"""
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "skill-rules.json")
+
+PROMPTS = [
+    "Can you help me plan how to implement the new caching layer?",
+    "What's the blast radius if I change the auth middleware?",
+    "hello, can you explain what this function does",
+    "Please look for code smells and anti-patterns in this module",
+    "",
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the hooks' caches (the shared plugin index included) out of the user's cache dir."""
+    monkeypatch.setenv("CLAUDE_LIBRARY_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+def load_script(name):
+    path = os.path.join(SCRIPTS_DIR, f"{name}.py")
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def skill_hook():
+    return load_script("skill-activation-hook")
+
+
+def write_rules(path, rules):
+    path.write_text(json.dumps({"rules": rules}), encoding="utf-8")
+    return path
+
+
+def test_ranked_matches_agree_with_reference_loop(skill_hook):
+    rules = skill_hook.load_rules(RULES_PATH)
+    index = skill_hook.build_index(skill_hook.load_rule_table(RULES_PATH))
+    for prompt in PROMPTS:
+        expected = {r["skill"] for r in skill_hook.match_prompt(prompt, rules)}
+        assert {r["skill"] for r in skill_hook.rank_rules(prompt, index, k=None)} == expected
+
+
+def test_scanner_agrees_with_substring_prefilter(skill_hook, monkeypatch):
+    table = skill_hook.load_rule_table(RULES_PATH)
+    long_prompt = "Traceback (most recent call last):\n" * 2000 + "what is the blast radius of this fix?"
+    for prompt in PROMPTS + [long_prompt]:
+        expected = skill_hook.rank_rules(prompt, skill_hook.build_index(table), k=None)
+        monkeypatch.setattr(skill_hook, "SCANNER_MIN_PROMPT", 0)
+        monkeypatch.setattr(skill_hook, "SCANNER_MIN_LITERALS", 0)
+        assert skill_hook.rank_rules(prompt, skill_hook.build_index(table), k=None) == expected
+        monkeypatch.undo()
+
+
+def test_scanner_finds_overlapping_and_prefix_literals(skill_hook, tmp_path):
+    rules_path = write_rules(tmp_path / "skill-rules.json", [
+        {"skill": "a", "triggers": ["code review.*diff"], "description": "A"},
+        {"skill": "b", "triggers": ["code"], "description": "B"},
+        {"skill": "c", "triggers": ["review"], "description": "C"},
+        {"skill": "d", "triggers": ["ode rev"], "description": "D"},
+    ])
+    index = skill_hook.build_index(skill_hook.load_rule_table(rules_path))
+    found = skill_hook.scan_literals("please code review my diff", index)
+    assert found == {"code review", "code", "review", "ode rev", "diff"}
+
+
+@pytest.mark.parametrize("payload", [
+    {"prompt": "plain"},
+    {"session_id": "abc", "cwd": "/x", "prompt": "line one\nline \"two\"\t\\ end"},
+    {"nested": {"prompt": "not this one"}, "list": [{"prompt": "nor this"}], "prompt": "this one"},
+    {"prompt": "unicode é € 😀 and \u0001 control"},
+    {"other": "no prompt here"},
+    {},
+])
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 4096])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_streaming_parser_matches_json_loads(skill_hook, payload, chunk_size, ensure_ascii):
+    text = json.dumps(payload, ensure_ascii=ensure_ascii)
+    pieces = skill_hook.iter_prompt_chunks(io.StringIO(text), chunk_size)
+    assert "".join(pieces) == payload.get("prompt", "")
+
+
+@pytest.mark.parametrize("text", ["", "[]", '"prompt"', "garbage", '{"prompt": "unterminated', '{"a": 1'])
+def test_streaming_parser_rejects_bad_input(skill_hook, text):
+    with pytest.raises(ValueError):
+        "".join(skill_hook.iter_prompt_chunks(io.StringIO(text), 4))
+    assert skill_hook.run(text) == ""
+
+
+def test_window_keeps_head_tail_and_instruction_lines(skill_hook):
+    prompt = (
+        "here is a log\n"
+        + "2024-01-01 INFO worker heartbeat ok\n" * 5000
+        + "Can you tell me what the blast radius is?\n"
+        + "    at com.example.Service.run(Service.java:42)\n" * 5000
+        + "then help me plan how to implement the fix"
+    )
+    pieces = [prompt[i:i + 1000] for i in range(0, len(prompt), 1000)]
+    window = skill_hook.window_prompt(iter(pieces), window_chars=4096, full=False)
+    assert len(window) < 3 * 4096
+    assert window.startswith("here is a log\n")
+    assert window.endswith("then help me plan how to implement the fix")
+    assert "Can you tell me what the blast radius is?" in window.split("\n")
+    assert skill_hook.window_prompt(iter(pieces), window_chars=4096, full=True) == prompt
+    assert skill_hook.window_prompt(iter(["short prompt"]), window_chars=4096, full=False) == "short prompt"
+
+
+def test_large_prompt_suggestions(skill_hook):
+    trace = '  File "/srv/app/handlers.py", line 214, in dispatch\n' * 40000
+    output = skill_hook.run(json.dumps({"prompt": "Why does this crash?\n" + trace + "what is the blast radius?"}))
+    assert "safe-changes-impact-check" in json.loads(output)["hookSpecificOutput"]["additionalContext"]
+
+
+def test_rank_prefers_more_hits_and_weight(skill_hook, tmp_path):
+    rules_path = write_rules(tmp_path / "skill-rules.json", [
+        {"skill": "first", "triggers": ["review"], "description": "1"},
+        {"skill": "many", "triggers": ["review", "diff", "pull request"], "description": "2"},
+        {"skill": "heavy", "triggers": ["diff"], "description": "3", "weight": 5},
+        {"skill": "none", "triggers": ["unrelated"], "description": "4"},
+    ])
+    index = skill_hook.build_index(skill_hook.load_rule_table(rules_path))
+    prompt = "Please review the diff in this pull request"
+    assert [r["skill"] for r in skill_hook.rank_rules(prompt, index)] == ["heavy", "many"]
+    assert [r["skill"] for r in skill_hook.rank_rules(prompt, index, k=None)] == ["heavy", "many", "first"]
+
+
+def test_rank_ties_keep_file_order(skill_hook, tmp_path):
+    rules_path = write_rules(tmp_path / "skill-rules.json", [
+        {"skill": s, "triggers": ["same"], "description": s} for s in ("a", "b", "c")
+    ])
+    index = skill_hook.build_index(skill_hook.load_rule_table(rules_path))
+    assert [r["skill"] for r in skill_hook.rank_rules("same thing", index)] == ["a", "b"]
+
+
+def test_early_exit_matches_exhaustive_ranking(skill_hook, tmp_path):
+    words = ["plan", "implement", "review", "code", "test", "safe", "refactor", "debug"]
+    rules = [
+        {"skill": f"s{i}", "triggers": [words[i % 8], f"{words[(i * 3) % 8]}.*{words[(i * 5) % 8]}"],
+         "description": "", "weight": 1 + (i % 4) / 2}
+        for i in range(40)
+    ]
+    index = skill_hook.build_index(skill_hook.load_rule_table(write_rules(tmp_path / "r.json", rules)))
+    for prompt in ["plan then implement", "review code and test it", "debug the refactor safely"]:
+        full = skill_hook.rank_rules(prompt, index, k=None)
+        assert skill_hook.rank_rules(prompt, index, k=3) == full[:3]
+
+
+@pytest.mark.parametrize("trigger, literals", [
+    ("blast radius", ["blast radius"]),
+    ("plan.*implement", ["plan", "implement"]),
+    ("anti.?pattern", ["anti", "pattern"]),
+    ("foo\\.bar", ["foo.bar"]),
+    ("[^]abc]de", ["de"]),
+    ("x{2}yz", ["yz"]),
+    ("a|b", []),
+    ("(?i)How", []),
+    ("\\x41pi key", ["Api key"]),
+    ("caf\\u00e9 menu", ["caf\u00e9 menu"]),
+    ("\\U0001F600 smile", ["\U0001F600 smile"]),
+    ("tab\\011sep", ["tab\tsep"]),
+    ("nul\\0x", ["nul\0x"]),
+    ("x\\x41?yz", ["x", "yz"]),
+    ("\\N{BULLET} point", [" point"]),
+])
+def test_extract_literals(skill_hook, trigger, literals):
+    assert skill_hook.extract_literals(trigger) == literals
+    pattern = re.compile(trigger)
+    for text in ("Api key", "caf\u00e9 menu", "\U0001F600 smile", "tab\tsep", "nul\0x", "xyz", "\u2022 point"):
+        if pattern.search(text):  # a text the trigger matches has every literal
+            assert all(literal in text for literal in literals), text
+
+
+def test_rule_table_is_served_from_cache(skill_hook, tmp_path):
+    rules_path = write_rules(tmp_path / "skill-rules.json", [
+        {"skill": "a", "triggers": ["alpha"], "description": "A"},
+    ])
+    assert skill_hook.load_rule_table(rules_path)[0]["skill"] == "a"
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == [skill_hook.plugin_index.index_path().name]
+
+    # Same stamp: the indexed table wins even if the index was edited.
+    section = skill_hook.plugin_index.section("rules", rules_path)
+    section["data"]["table"][0]["skill"] = "from-cache"
+    skill_hook.plugin_index.update_sections({("rules", rules_path): (section["sources"], section["data"])})
+    skill_hook.plugin_index._LOADED.clear()
+    assert skill_hook.load_rule_table(rules_path)[0]["skill"] == "from-cache"
+
+
+def test_rule_table_survives_touch_without_revalidating(skill_hook, tmp_path, monkeypatch):
+    rules_path = write_rules(tmp_path / "skill-rules.json", [
+        {"skill": "a", "triggers": ["alpha"], "description": "A"},
+    ])
+    skill_hook.load_rule_table(rules_path)
+    os.utime(rules_path, ns=(0, 1))
+    monkeypatch.setattr(skill_hook, "validate_rules", lambda rules: pytest.fail("revalidated"))
+    assert skill_hook.load_rule_table(rules_path)[0]["skill"] == "a"
+    assert skill_hook.plugin_index.section("rules", rules_path)["sources"][str(rules_path)][0] == 1
+
+
+def test_rule_table_cache_invalidated_on_change(skill_hook, tmp_path):
+    rules_path = write_rules(tmp_path / "skill-rules.json", [
+        {"skill": "a", "triggers": ["alpha"], "description": "A"},
+    ])
+    skill_hook.load_rule_table(rules_path)
+    write_rules(rules_path, [
+        {"skill": "b", "triggers": ["beta"], "description": "B"},
+        {"skill": "c", "triggers": ["gamma"], "description": "C"},
+    ])
+    assert [r["skill"] for r in skill_hook.load_rule_table(rules_path)] == ["b", "c"]
+
+
+def test_plugin_index_drops_gone_and_oldest_sections(tmp_path, monkeypatch):
+    import plugin_index
+
+    monkeypatch.setattr(plugin_index, "MAX_SECTIONS", 3)
+    for name in ("gone", "a", "b"):
+        (tmp_path / name).mkdir()
+        plugin_index.update_sections({("rules", tmp_path / name / "rules.json"): ({}, name)})
+    (tmp_path / "gone").rmdir()
+    plugin_index.update_sections({("rules", tmp_path / "a" / "rules.json"): ({}, "a2")})
+    assert [data["data"] for data in plugin_index.load_index().values()] == ["b", "a2"]
+
+    for name in ("c", "d"):
+        (tmp_path / name).mkdir()
+        plugin_index.update_sections({("rules", tmp_path / name / "rules.json"): ({}, name)})
+    assert [data["data"] for data in plugin_index.load_index().values()] == ["a2", "c", "d"]
+
+
+def test_invalid_triggers_are_dropped(skill_hook, tmp_path):
+    rules_path = write_rules(tmp_path / "skill-rules.json", [
+        {"skill": "a", "triggers": ["(unclosed", "alpha"], "description": "A"},
+        {"skill": "b", "triggers": ["[bad"], "description": "B"},
+    ])
+    table = skill_hook.load_rule_table(rules_path)
+    assert [(r["skill"], r["triggers"]) for r in table] == [("a", ["alpha"])]
+
+
+@pytest.fixture
+def sensitive_hook():
+    return load_script("sensitive-file-hook")
+
+
+SENSITIVE_PATHS = [
+    "src/auth/settings.py",
+    "db/migrations/0001_schema.sql",
+    "lib/keyring/api_keys.py",
+    "app/CryptoHash.py",
+    "config/.env.production",
+    "src/components/button.tsx",
+    "docs/authors.md",
+    "",
+]
+
+
+@pytest.mark.parametrize("path, categories", [
+    ("src/auth/settings.py", [0, 1]),
+    ("services/AuthService.ts", [0]),
+    ("lib/RBACPolicy.java", [0]),
+    ("config/.env.production", [1]),
+    ("deploy/prod.env", [1]),
+    ("db/migrations/0001_init.sql", [2]),
+    ("api_keys.py", [3]),
+    ("certs/server.pem", [3]),
+    ("utils/crypto_utils.py", [4]),
+    ("lib/hashes.go", [4]),
+    ("src/keyvault.py", [3]),
+    ("infra/Vault.tf", [3]),
+    ("src/aclrules.py", [0]),
+    ("src/dbschemas.py", [2]),
+    ("api/SchemaRegistry.java", [2]),
+    ("src/monkey_patch.py", []),
+    ("keyboard/layout.ts", []),
+    ("lib/hashmap.go", []),
+    ("docs/AUTHORS.md", []),
+    ("src/tokenizer.py", []),
+])
+def test_classifier_matches_path_components(sensitive_hook, path, categories):
+    classifier = sensitive_hook.build_classifier(sensitive_hook.PATTERNS)
+    assert sensitive_hook.classify(path, classifier) == categories
+
+
+def test_classifier_globs_and_regex_fallback(sensitive_hook):
+    patterns = [
+        {"tokens": ["deploy/**/*.yaml", "/charts/*/values.yaml"], "guidance": "Deployment manifest."},
+        {"tokens": ["id_rsa*.pub", "*.tfvars"], "guidance": "Key or infra material."},
+        {"regex": r"\.pem|id_rsa", "guidance": "Private key material."},
+        {"regex": r"(?:^|/)secrets?/", "guidance": "Secrets directory."},
+    ]
+    classifier = sensitive_hook.build_classifier(patterns)
+    assert sensitive_hook.classify("ops/deploy/prod/eu/app.yaml", classifier) == [0]
+    assert sensitive_hook.classify("deploy/app.yaml", classifier) == [0]
+    assert sensitive_hook.classify("mydeploy/app.yaml", classifier) == []
+    assert sensitive_hook.classify("charts/api/values.yaml", classifier) == [0]
+    assert sensitive_hook.classify("charts/api/dev/values.yaml", classifier) == []
+    assert sensitive_hook.classify("home/.ssh/id_rsa_work.pub", classifier) == [1, 2]
+    assert sensitive_hook.classify("infra/prod.tfvars", classifier) == [1]
+    assert sensitive_hook.classify("certs/server.pem", classifier) == [2]
+    assert sensitive_hook.classify("app/secrets/db.yaml", classifier) == [3]
+
+
+def test_regex_patterns_agree_with_per_pattern_search(sensitive_hook):
+    patterns = [
+        {"regex": r"auth|permission|acl|rbac", "guidance": "a"},
+        {"regex": r"config|settings|\.env", "guidance": "b"},
+        {"regex": r"secret|credential|token|key|password|cert", "guidance": "c"},
+        {"regex": r"deploy/.*\.ya?ml$", "guidance": "d"},
+    ]
+    classifier = sensitive_hook.build_classifier(patterns)
+    for path in SENSITIVE_PATHS + ["deploy/prod/app.yaml", "lib/keyring/passwordkey.py", "settingsauthkey"]:
+        expected = [i for i, p in enumerate(patterns) if re.search(p["regex"], path.lower())]
+        assert sensitive_hook.classify(path, classifier) == expected
+
+
+def test_patterns_file_extends_and_drops_invalid(sensitive_hook, tmp_path):
+    path = tmp_path / "sensitive-file-patterns.json"
+    path.write_text(json.dumps({"patterns": [
+        {"regex": r"terraform|\.tfvars", "guidance": "Infrastructure state."},
+        {"regex": "([unclosed", "guidance": "bad regex"},
+        {"regex": "(?P<name>x)", "guidance": "named group"},
+        {"regex": "vault"},
+    ]}), encoding="utf-8")
+    patterns = sensitive_hook.load_patterns(path)
+    assert patterns[:-1] == sensitive_hook.PATTERNS
+    assert patterns[-1]["guidance"] == "Infrastructure state."
+    classifier = sensitive_hook.get_classifier(path)
+    assert sensitive_hook.classify("infra/prod.tfvars", classifier) == [len(patterns) - 1]
+
+
+def test_verdict_cache_persists_and_is_bounded(sensitive_hook, tmp_path, monkeypatch):
+    monkeypatch.setattr(sensitive_hook, "VERDICT_CACHE_SIZE", 4)
+    (tmp_path / ".claude").mkdir()
+    cache_file = tmp_path / ".claude" / "cache" / "sensitive-file-verdicts.json"
+
+    def event(path):
+        return json.dumps({"cwd": str(tmp_path), "tool_input": {"file_path": path}})
+
+    for path in SENSITIVE_PATHS[:6]:
+        expected = sensitive_hook.build_output(path)
+        assert sensitive_hook.run(event(path)) == (json.dumps(expected) if expected else "")
+    cached = json.loads(cache_file.read_text(encoding="utf-8"))
+    assert list(cached["entries"]) == SENSITIVE_PATHS[2:6]
+
+    # A fresh process is served from the file without classifying
+    sensitive_hook._VERDICTS.clear()
+    monkeypatch.setattr(sensitive_hook, "classify", lambda *args: pytest.fail("cache miss"))
+    assert "SENSITIVE FILE GUIDANCE" in sensitive_hook.run(event("app/CryptoHash.py"))
+
+
+def test_verdict_cache_invalidated_when_patterns_change(sensitive_hook, tmp_path, monkeypatch):
+    (tmp_path / ".claude").mkdir()
+    event = json.dumps({"cwd": str(tmp_path), "tool_input": {"file_path": "infra/main.tfvars"}})
+    assert sensitive_hook.run(event) == ""
+    patterns_path = tmp_path / "sensitive-file-patterns.json"
+    patterns_path.write_text(json.dumps({"patterns": [{"regex": "tfvars", "guidance": "Infra."}]}), encoding="utf-8")
+    monkeypatch.setattr(sensitive_hook, "default_patterns_path", lambda: patterns_path)
+    assert "Infra." in sensitive_hook.run(event)
+
+
+@pytest.fixture
+def session_hook():
+    return load_script("session-start-hook")
+
+
+def make_skills(root, skills):
+    for name, body in skills.items():
+        skill_dir = root / "skills" / name
+        skill_dir.mkdir(parents=True)
+        if body is not None:
+            (skill_dir / "SKILL.md").write_text(body, encoding="utf-8")
+    return root
+
+
+def test_scan_skills_reports_issues(session_hook, tmp_path):
+    root = make_skills(tmp_path / "plugin", {
+        "good-skill": "---\nname: good-skill\n---\nbody",
+        "no-frontmatter": "# Title\n",
+        "bad_name": "---\n",
+        "empty-dir": None,
+    })
+    names, issues = session_hook.scan_skills(root)
+    assert names == ["bad_name", "good-skill", "no-frontmatter"]
+    assert issues == [
+        "Underscore in directory name: bad_name (use hyphens)",
+        "Missing SKILL.md in empty-dir",
+        "Missing YAML frontmatter in no-frontmatter",
+    ]
+    assert session_hook.scan_skills(tmp_path / "missing") == ([], [])
+
+
+def test_scan_skills_rereads_only_changed_files(session_hook, tmp_path, monkeypatch):
+    root = make_skills(tmp_path / "plugin", {f"skill-{i}": "---\n" for i in range(5)})
+    first = session_hook.build_output(root)
+
+    reads = []
+    real = session_hook.read_skill
+    monkeypatch.setattr(session_hook, "read_skill", lambda path, full: reads.append(path) or real(path, full))
+    assert session_hook.build_output(root) == first
+    assert reads == []
+
+    changed = root / "skills" / "skill-3" / "SKILL.md"
+    changed.write_text("no frontmatter any more\n", encoding="utf-8")
+    names, issues = session_hook.scan_skills(root)
+    assert reads == [str(changed)]
+    assert issues == ["Missing YAML frontmatter in skill-3"]
+
+
+def test_build_plugin_index_records_frontmatter_and_hashes():
+    builder = load_script("build-plugin-index")
+    sections = builder.build()
+    root = builder.plugin_index.PLUGIN_ROOT
+    assert {kind for kind, _ in sections} == {"rules", "sensitive", "skills"}
+
+    skills = sections[("skills", str(root / "skills"))]["data"]
+    for name, skill in skills.items():
+        raw = (root / "skills" / name / "SKILL.md").read_bytes()
+        assert skill["sha256"] == hashlib.sha256(raw).hexdigest()
+        assert skill["frontmatter"]["name"] == name
+
+    # The hooks serve their sections from the prebuilt index unchanged.
+    session_hook = load_script("session-start-hook")
+    session_hook.scan_skills(root)
+    assert builder.plugin_index.load_index(root) is sections
+
+
+@pytest.mark.parametrize("hook, events", [
+    ("sensitive-file-hook", [{"tool_input": {"file_path": p}} for p in SENSITIVE_PATHS]),
+    ("skill-activation-hook", [{"prompt": p} for p in PROMPTS]),
+])
+@pytest.mark.parametrize("extra_args", [[], ["--workers", "2", "--chunk-size", "3"]])
+def test_batch_mode_matches_single_events(hook, events, extra_args):
+    script = os.path.join(SCRIPTS_DIR, f"{hook}.py")
+    lines = [json.dumps(e) for e in events] + ["not json", "[1, 2]"]
+    stdin = "\n".join(lines[:3] + [""] + lines[3:]) + "\n"  # blank lines are skipped
+    result = subprocess.run(
+        [sys.executable, script, "--batch", *extra_args],
+        input=stdin, capture_output=True, text=True, check=True,
+    )
+    module = load_script(hook)
+    expected = [(module.run(line) or "{}") for line in lines]
+    assert result.stdout.splitlines() == expected
+    assert any(line != "{}" for line in expected)
+
+
+@pytest.mark.parametrize("hook, payload", [
+    ("skill-activation-hook", '{"prompt": "help me plan how to implement this"}'),
+    ("skill-activation-hook", '{"prompt": "hello"}'),
+    ("sensitive-file-hook", '{"tool_input": {"file_path": "src/auth/settings.py"}}'),
+    ("session-start-hook", '{"source": "startup"}'),
+    ("session-start-hook", "not json"),
+])
+def test_daemon_output_is_byte_identical(hook, payload, tmp_path, monkeypatch):
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix domain sockets not available")
+    monkeypatch.setenv("CLAUDE_LIBRARY_HOOKD_SOCKET", str(tmp_path / "hookd.sock"))
+    daemon = load_script("hook-daemon")
+    server = daemon.HookServer(daemon.client.socket_path(), idle_timeout=60)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        expected = load_script(hook).run(payload)
+        body, _ = daemon.client.forward(hook, io.BytesIO(payload.encode("utf-8")))
+        assert body == expected.encode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_client_only_talks_to_its_own_daemon(tmp_path, monkeypatch):
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix domain sockets not available")
+    monkeypatch.setenv("CLAUDE_LIBRARY_HOOKD_SOCKET", str(tmp_path / "hookd.sock"))
+    daemon = load_script("hook-daemon")
+    server = daemon.HookServer(daemon.client.socket_path(), idle_timeout=60)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert os.stat(tmp_path / "hookd.sock").st_mode & 0o777 == 0o600
+        assert daemon.client.forward("sensitive-file-hook", io.BytesIO(b"{}"))[0] is not None
+        uid = os.getuid()
+        monkeypatch.setattr(daemon.client.os, "getuid", lambda: uid + 1)  # as if another user made it
+        assert daemon.client.forward("sensitive-file-hook", io.BytesIO(b"{}")) == (None, b"")
+        assert not daemon.is_running(daemon.client.socket_path())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_client_reports_failure_when_daemon_missing(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLAUDE_LIBRARY_HOOKD_SOCKET", str(tmp_path / "missing.sock"))
+    client = load_script("hook-client")
+    assert client.forward("sensitive-file-hook", io.BytesIO(b"{}")) == (None, b"")
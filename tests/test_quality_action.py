@@ -0,0 +1,768 @@
+"""Tests for scripts/quality-action/run_analysis.py against a local stub server."""
+
+import importlib.util
+import json
+import os
+import random
+import string
+import subprocess
+import threading
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_keyvault import FakeVault  # noqa: E402
+from stub_openai import BREAK_MARKER, FAIL_MARKER, SLOW_MARKER, StubServer  # noqa: E402
+
+ACTION_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts", "quality-action")
+sys.path.insert(0, ACTION_DIR)
+
+
+@pytest.fixture(scope="module")
+def analysis():
+    pytest.importorskip("openai")
+    pytest.importorskip("azure.identity")
+    spec = importlib.util.spec_from_file_location("run_analysis", os.path.join(ACTION_DIR, "run_analysis.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with StubServer(delay=0.3) as server:
+        monkeypatch.delenv("KEY_VAULT_ENDPOINT", raising=False)
+        monkeypatch.setenv("AZURE_OPENAI_API_KEY", "stub")
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", server.endpoint)
+        yield server
+
+
+def test_analyses_run_concurrently_in_report_order(analysis, stub):
+    client = analysis.get_client()
+    start = time.perf_counter()
+    sections = analysis.run_analyses(client, "gpt-5.2", ["upgrade", "strategic"], "context")
+    elapsed = time.perf_counter() - start
+
+    assert [s.split("\n")[2] for s in sections] == ["### Upgrade Analysis", "### Strategic Analysis"]
+    assert "stub reply to: You are a dependency upgrade advisor" in sections[0]
+    assert "stub reply to: You are a strategic technical advisor" in sections[1]
+    assert len(stub.requests) == 2
+    assert elapsed < 0.55  # one round-trip, not two
+
+
+def test_concurrency_limit_serializes(analysis, stub):
+    start = time.perf_counter()
+    analysis.run_analyses(analysis.get_client(), "gpt-5.2", ["upgrade", "strategic"], "context", concurrency=1)
+    assert time.perf_counter() - start >= 0.6
+
+
+def test_failures_and_timeouts_become_error_sections(analysis, stub, monkeypatch):
+    monkeypatch.setitem(analysis.ANALYSES, "broken", ("Broken Analysis", f"{FAIL_MARKER} prompt"))
+    monkeypatch.setitem(analysis.ANALYSES, "slow", ("Slow Analysis", f"{SLOW_MARKER} prompt"))
+    from openai import OpenAI
+
+    client = OpenAI(api_key="stub", base_url=f"{stub.endpoint}/openai/v1/", max_retries=0)
+
+    sections = analysis.run_analyses(client, "gpt-5.2", ["slow", "upgrade", "broken"], "context", timeout=1)
+    assert [s.split("\n")[2] for s in sections] == ["### Slow Analysis", "### Upgrade Analysis", "### Broken Analysis"]
+    assert "> Error:" in sections[0] and "timed out" in sections[0].lower()
+    assert "stub reply to:" in sections[1]
+    assert "> Error:" in sections[2]
+
+
+def test_streamed_analysis_times_out_as_a_whole(analysis):
+    from openai import OpenAI
+
+    with StubServer(stream_delay=0.3) as stub:  # each chunk well within the timeout, the stream not
+        client = OpenAI(api_key="stub", base_url=f"{stub.endpoint}/openai/v1/", max_retries=0)
+        stream = analysis.ReportStream()
+        start = time.perf_counter()
+        sections = analysis.run_analyses(client, "gpt-5.2", ["upgrade"], "context", timeout=0.5, stream=stream)
+        elapsed = time.perf_counter() - start
+        stream.close()
+
+    assert elapsed < 1.5
+    assert "> Error: Request timed out. (the output above is incomplete)" in sections[0]
+
+
+def test_streamed_reply_holds_its_scheduler_slot(analysis):
+    from openai import OpenAI
+
+    scheduler = analysis.RequestScheduler(max_in_flight=1)
+    arrivals = {"upgrade": [], "strategic": []}
+    with StubServer(stream_delay=0.05) as stub:
+        client = OpenAI(api_key="stub", base_url=f"{stub.endpoint}/openai/v1/", max_retries=0)
+
+        def run_one(name):
+            on_delta = lambda text: arrivals[name].append(time.monotonic())  # noqa: E731
+            analysis.call_llm(client, "gpt-5.2", analysis.ANALYSES[name][1], "context", scheduler=scheduler, on_delta=on_delta)
+
+        workers = [threading.Thread(target=run_one, args=(name,)) for name in arrivals]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    first, second = sorted(arrivals.values(), key=min)
+    assert len(first) > 1 and second
+    assert max(first) < min(second)  # the second stream starts after the first one ends
+    assert scheduler.summary()["requests"] == 2
+
+
+def run_action(stub, tmp_path, *args):
+    env = {
+        **os.environ,
+        "AZURE_OPENAI_API_KEY": "stub",
+        "AZURE_OPENAI_ENDPOINT": stub.endpoint,
+        "QUALITY_CACHE_DIR": str(tmp_path / "llm-cache"),
+    }
+    env.pop("KEY_VAULT_ENDPOINT", None)
+    return subprocess.run(
+        [sys.executable, os.path.join(ACTION_DIR, "run_analysis.py"), "--repo-path", str(tmp_path / "repo"), *args],
+        capture_output=True, text=True, env=env, check=True,
+    )
+
+
+def test_unchanged_repo_is_served_from_cache(analysis, stub, tmp_path):
+    (tmp_path / "repo").mkdir()
+    (tmp_path / "repo" / "requirements.txt").write_text("requests==2.0\n", encoding="utf-8")
+    first = run_action(stub, tmp_path, "--mode", "both")
+    assert len(stub.requests) == 2
+    assert "0 hit(s), 2 miss(es)" in first.stderr
+
+    second = run_action(stub, tmp_path, "--mode", "both")
+    assert len(stub.requests) == 2
+    assert second.stdout == first.stdout
+    assert "2 hit(s), 0 miss(es)" in second.stderr
+    assert "Connecting to Azure OpenAI" not in second.stderr
+
+    (tmp_path / "repo" / "requirements.txt").write_text("requests==2.1\n", encoding="utf-8")
+    run_action(stub, tmp_path, "--mode", "upgrade")
+    assert len(stub.requests) == 3
+
+    run_action(stub, tmp_path, "--mode", "upgrade", "--refresh")
+    run_action(stub, tmp_path, "--mode", "upgrade", "--no-cache")
+    assert len(stub.requests) == 5
+
+
+def test_response_cache_ttl_and_size_eviction(analysis, tmp_path):
+    cache = analysis.ResponseCache(tmp_path, ttl=60, max_bytes=10**6)
+    requests = [analysis.llm_request("gpt-5.2", "system", f"repo {i}") for i in range(3)]
+    for i, request in enumerate(requests):
+        cache.put(request, "x" * 200)
+        os.utime(cache._path(cache.key(request)), (time.time() - 10 + i, time.time() - 10 + i))
+    assert cache.get(requests[0]) == "x" * 200  # touching it makes it most recent
+
+    sizes = [cache._path(cache.key(r)).stat().st_size for r in requests]
+    cache.max_bytes = sizes[0] + sizes[2]
+    cache.prune()
+    assert [cache.contains(r) for r in requests] == [True, False, True]
+
+    cache.ttl = -1
+    assert cache.get(requests[0]) is None
+    cache.prune()
+    assert list(tmp_path.glob("*/*.json")) == []
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def make_tree(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return root
+
+
+def test_walk_files_matches_sorted_rglob_order(tmp_path):
+    from repo_walk import walk_files
+
+    root = make_tree(tmp_path, {
+        "a.py": "", "a/x.py": "", "a-b/y.py": "", "b/c/d.go": "", "b/c.rs": "", "B.ts": "", "z/.hidden.py": "",
+    })
+    expected = [str(p.relative_to(root)) for p in sorted(root.rglob("*")) if p.is_file()]
+    assert [rel for rel, _ in walk_files(root)] == expected
+
+
+def test_walk_files_prunes_skip_dirs_and_ignore_files(tmp_path):
+    from repo_walk import walk_files
+
+    root = make_tree(tmp_path, {
+        ".gitignore": "# build output\n/build/\n*.log\n!keep.log\ndocs/**/*.tmp\n",
+        ".claudeignore": "secrets\n",
+        "node_modules/pkg/index.js": "",
+        "build/out.py": "",
+        "src/build/gen.py": "",
+        "src/app.log": "",
+        "src/keep.log": "",
+        "src/secrets/key.py": "",
+        "src/.gitignore": "generated_*.py\n!generated_ok.py\n",
+        "src/generated_a.py": "",
+        "src/generated_ok.py": "",
+        "docs/a/b/c.tmp": "",
+        "docs/c.tmp": "",
+        "lib/secrets": "a file, not a dir",
+    })
+    files = [rel for rel, _ in walk_files(root, {"node_modules"})]
+    assert files == [
+        ".claudeignore", ".gitignore", "src/.gitignore", "src/build/gen.py", "src/generated_ok.py", "src/keep.log",
+    ]
+
+
+def test_scan_sources_prunes_and_ranks(analysis, tmp_path, monkeypatch):
+    import repo_walk
+
+    root = make_tree(tmp_path, {
+        "app/models.py": "class User: pass\n",
+        "app/views.py": "from app.models import User\n",
+        "app/main.py": "from app import views\nfrom app.models import User\n",
+        "app/zz_unused.py": "x = 1\n",
+        "tests/test_models.py": "from app.models import User\n",
+        "web/index.ts": "import { api } from './api';\n",
+        "web/api.ts": "export const api = 1;\n",
+        "node_modules/dep/index.js": "",
+        "build/gen.py": "",
+        ".gitignore": "build/\n",
+    })
+    listed = []
+    real = repo_walk._sorted_entries
+    monkeypatch.setattr(repo_walk, "_sorted_entries", lambda d: listed.append(d) or real(d))
+
+    blocks, paths = analysis.scan_sources(root)
+    assert not any("node_modules" in d or "build" in d for d in listed)
+    ranked = [b["path"] for b in sorted(blocks, key=lambda b: -b["priority"])]
+    assert ranked[:2] == ["app/main.py", "web/index.ts"]
+    assert ranked.index("app/models.py") < ranked.index("app/zz_unused.py")
+    assert ranked[-1] == "tests/test_models.py"
+    assert "imported by 3 file(s)" in next(b for b in blocks if b["path"] == "app/models.py")["reasons"]
+    assert "imported by 1 file(s)" in next(b for b in blocks if b["path"] == "web/api.ts")["reasons"]
+
+
+@pytest.mark.parametrize("budget", [200, 1_000, 4_000, 12_000])
+def test_packed_context_never_exceeds_budget(analysis, tmp_path, budget):
+    import context_packer
+
+    files = {"README.md": "Intro paragraph with words.\n" * 2000, "requirements.txt": "pkg==1.0\n" * 500}
+    files.update({f"src/pkg{i % 7}/mod{i}.py": f"def f{i}(x):\n    return x * {i}  # {'y' * i}\n" * 150 for i in range(60)})
+    root = make_tree(tmp_path, files)
+
+    text, layout = context_packer.pack_context(analysis.collect_blocks(root), budget, {"src/pkg3/mod10.py"})
+    assert context_packer.estimate_tokens(text) <= int(budget * context_packer.ESTIMATE_MARGIN)
+    assert layout["used"] == context_packer.estimate_tokens(text)
+    assert sum(entry["tokens"] for entry in layout["blocks"]) <= budget
+    if budget >= 4_000:
+        paths = [entry["path"] for entry in layout["blocks"]]
+        assert {"README.md", "requirements.txt", None} <= set(paths)
+        assert any(entry["truncated"] for entry in layout["blocks"])
+        assert "recently changed" in next(e for e in layout["blocks"] if e["path"] == "src/pkg3/mod10.py")["reasons"]
+        assert layout["skipped"]
+
+
+@pytest.mark.parametrize("budget", [1_000, 4_000, 12_000])
+def test_packed_context_fits_by_an_independent_count(analysis, tmp_path, budget):
+    import context_packer
+
+    letters = random.Random(budget)
+
+    def word(n):
+        return "".join(letters.choice(string.ascii_letters) for _ in range(n))
+
+    files = {"README.md": "\n".join(" ".join(word(16) for _ in range(6)) for _ in range(2000))}  # random letters
+    files.update({  # identifier-heavy
+        f"src/pkg{i % 7}/mod{i}.py": "".join(f"def {word(40)}({word(24)}, {word(24)}):\n    pass\n" for _ in range(50))
+        for i in range(60)
+    })
+    root = make_tree(tmp_path, files)
+
+    text, _ = context_packer.pack_context(analysis.collect_blocks(root), budget)
+    assert len(text) / 4 <= budget  # about four characters per token, however the estimate counts them
+    assert len(text) / 4 > budget / 2  # and the budget is still put to use
+
+
+def git(root, *args):
+    subprocess.run(
+        ["git", "-C", str(root), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    root = make_tree(tmp_path / "repo", {
+        "requirements.txt": "requests==2.0\n",
+        "README.md": "# Demo\n",
+        "src/app.py": "print('app')\n",
+        "src/util/helpers.py": "def helper(): pass\n",
+        "tests/test_app.py": "def test(): pass\n",
+        "zz/late.py": "x = 1\n",
+    })
+    git(root, "init", "-q")
+    git(root, "add", "-A")
+    git(root, "commit", "-qm", "init")
+    return root
+
+
+def test_incremental_scan_rebuilds_only_affected_sections(analysis, git_repo, tmp_path, monkeypatch):
+    manifests = tmp_path / "scans"
+    context, changes = analysis.scan_repo_incremental(git_repo, manifests)
+    assert context == analysis.collect_blocks(git_repo)
+    assert changes is None
+
+    calls = []
+    for name in ("scan_dependencies", "scan_context_files", "scan_structure", "scan_sources"):
+        real = getattr(analysis, name)
+        monkeypatch.setattr(analysis, name, lambda repo, *rest, real=real, name=name: calls.append(name) or real(repo, *rest))
+
+    again, changes = analysis.scan_repo_incremental(git_repo, manifests)
+    assert (again, calls) == (context, [])
+    assert changes.startswith("no changes since the last scan")
+
+    (git_repo / "requirements.txt").write_text("requests==2.1\n", encoding="utf-8")
+    git(git_repo, "commit", "-qam", "bump")
+    context, changes = analysis.scan_repo_incremental(git_repo, manifests)
+    assert calls == ["scan_dependencies"]
+    assert "requests | ==2.1 | 2.1" in context[0]["text"]
+    assert changes.startswith("1 area(s) changed since the last scan") and changes.endswith(": `requirements.txt`")
+
+    calls.clear()
+    (git_repo / "src" / "util" / "helpers.py").write_text("def helper(): return 2\n", encoding="utf-8")
+    (git_repo / "docs").mkdir()
+    (git_repo / "docs" / "guide.md").write_text("guide\n", encoding="utf-8")
+    context, changes = analysis.scan_repo_incremental(git_repo, manifests)
+    assert sorted(calls) == ["scan_sources", "scan_structure"]
+    assert changes.endswith(": `docs/`, `src/`")
+
+    git(git_repo, "add", "-A")
+    git(git_repo, "commit", "-qm", "docs")
+    analysis.scan_repo_incremental(git_repo, manifests)
+    calls.clear()
+    package_snapshot = {"pypi": {"requests": {"latest": "2.1"}}}
+    context, _ = analysis.scan_repo_incremental(git_repo, manifests, package_snapshot=package_snapshot)
+    assert calls == ["scan_dependencies"]
+    assert context[0]["text"] == "1 dependencies, 1 up to date or within range (omitted)\nname | spec | pinned | group | latest | status"
+    monkeypatch.undo()
+    assert context == analysis.collect_blocks(git_repo, snapshot=package_snapshot)
+
+
+def test_incremental_scan_ignores_skipped_directories(analysis, git_repo, tmp_path, monkeypatch):
+    analysis.scan_repo_incremental(git_repo, tmp_path / "scans")
+    # The workflow checks the action out inside the repo it analyzes
+    make_tree(git_repo, {"_quality-action/scripts/quality-action/run_analysis.py": "x = 1\n", "src/node_modules/m.js": ""})
+
+    for name in ("scan_dependencies", "scan_context_files", "scan_structure", "scan_sources"):
+        monkeypatch.setattr(analysis, name, lambda repo, *rest, name=name: pytest.fail(f"{name} rebuilt"))
+    _, changes = analysis.scan_repo_incremental(git_repo, tmp_path / "scans")
+    assert changes.startswith("no changes since the last scan")
+
+
+def test_incremental_scan_ignores_changes_after_the_candidates(analysis, git_repo, tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis, "MAX_SOURCE_CANDIDATES", 10)
+    make_tree(git_repo, {f"src/m{i:02}.py": "x = 1\n" for i in range(12)})
+    git(git_repo, "add", "-A")
+    git(git_repo, "commit", "-qm", "more")
+    analysis.scan_repo_incremental(git_repo, tmp_path / "scans")
+
+    monkeypatch.setattr(analysis, "scan_sources", lambda repo, *rest: pytest.fail("resampled"))
+    (git_repo / "zz" / "late.py").write_text("x = 2\n", encoding="utf-8")
+    context, changes = analysis.scan_repo_incremental(git_repo, tmp_path / "scans")
+    assert changes.endswith(": `zz/`")
+
+
+def test_dependency_manifests_parse_into_rows():
+    from dependency_table import parse_manifest
+
+    requirements = "# pinned\nRequests[socks]==2.31.0 ; python_version >= '3.8'\nflask>=2.0,<3  # web\n-r dev.txt\nnumpy\n"
+    pyproject = """
+[project]
+dependencies = ["pydantic~=2.5", "Typing_Extensions==4.9.0"]
+[project.optional-dependencies]
+docs = ["mkdocs>=1.5"]
+[tool.poetry.dependencies]
+python = "^3.11"
+httpx = "0.27.0"
+rich = {version = "^13.0", optional = true}
+mylib = {git = "https://example.com/mylib.git"}
+[tool.poetry.group.dev.dependencies]
+pytest = "^8.0"
+"""
+    package_json = '{"dependencies": {"react": "^18.2.0", "left-pad": "1.3.0"}, "devDependencies": {"vite": "latest"}}'
+
+    def summary(path, text):
+        return [(r["name"], r["spec"], r["pinned"], r["group"]) for r in parse_manifest(path, text)]
+
+    assert summary("requirements.txt", requirements) == [
+        ("requests", "==2.31.0", "2.31.0", "main"), ("flask", ">=2.0,<3", None, "main"), ("numpy", "", None, "main"),
+    ]
+    assert summary("api/pyproject.toml", pyproject) == [
+        ("pydantic", "~=2.5", None, "main"), ("typing-extensions", "==4.9.0", "4.9.0", "main"),
+        ("mkdocs", ">=1.5", None, "docs"), ("httpx", "0.27.0", "0.27.0", "main"), ("rich", "^13.0", None, "main"),
+        ("mylib", "git https://example.com/mylib.git", None, "main"), ("pytest", "^8.0", None, "dev"),
+    ]
+    assert summary("package.json", package_json) == [
+        ("react", "^18.2.0", None, "main"), ("left-pad", "1.3.0", "1.3.0", "main"), ("vite", "latest", None, "dev"),
+    ]
+    assert parse_manifest("Cargo.toml", "[dependencies]\n") is None
+    with pytest.raises(ValueError):
+        parse_manifest("package.json", "{not json")
+
+
+@pytest.mark.parametrize("path, text", [
+    ("package.json", '{"dependencies": ["left-pad"]}'),
+    ("package.json", '["left-pad"]'),
+    ("package.json", '{"dependencies": {"react": {"version": "18"}}}'),
+    ("pyproject.toml", 'project = "x"'),
+    ("pyproject.toml", '[project]\ndependencies = "requests>=2"'),
+    ("pyproject.toml", '[project]\ndependencies = [2]'),
+    ("pyproject.toml", '[project.optional-dependencies]\ndocs = "mkdocs"'),
+    ("pyproject.toml", '[tool.poetry]\ndependencies = ["httpx"]'),
+    ("pyproject.toml", '[tool.poetry.dependencies]\nhttpx = 1'),
+    ("pyproject.toml", '[tool.poetry.group]\ndev = "x"'),
+])
+def test_malformed_manifest_shapes_raise_value_error(path, text):
+    from dependency_table import parse_manifest
+
+    with pytest.raises(ValueError):
+        parse_manifest(path, text)
+
+
+def test_malformed_manifest_goes_in_as_written(analysis, stub, tmp_path):
+    make_tree(tmp_path / "repo", {"package.json": '{"dependencies": ["left-pad"]}'})
+    run_action(stub, tmp_path, "--mode", "upgrade")
+    assert '{"dependencies": ["left-pad"]}' in stub.requests[0]["messages"][1]["content"]
+
+
+def test_package_snapshot_leaves_out_current_packages(analysis, stub, tmp_path):
+    from dependency_table import assess
+
+    snapshot = {
+        "pypi": {
+            "requests": {"latest": "2.32.3"}, "flask": {"latest": "3.0.3"}, "django": {"latest": "5.1"},
+            "pydantic": {"latest": "2.9.2"}, "idna": {"latest": "3.10"}, "six": {"latest": "1.16.0", "note": "py2 shim"},
+        },
+        "npm": {"react": {"latest": "18.3.1"}, "vue": {"latest": "3.5.0"}},
+    }
+    rows = {
+        "requests": ("==2.31.0", "2.31.0"), "flask": (">=2.0,<3", None), "django": ("==5.1", "5.1"),
+        "pydantic": ("~=2.5", None), "idna": ("==2.10", "2.10"), "six": ("", None), "numpy": ("", None),
+    }
+    statuses = {
+        name: assess({"name": name, "spec": spec, "pinned": pinned, "ecosystem": "pypi"}, snapshot)[0]
+        for name, (spec, pinned) in rows.items()
+    }
+    assert statuses == {
+        "requests": "outdated (minor)", "flask": "held back by <3", "django": "current", "pydantic": "ok",
+        "idna": "outdated (major)", "six": "note: py2 shim", "numpy": "unknown",
+    }
+    assert assess({"name": "react", "spec": "^18.2.0", "pinned": None, "ecosystem": "npm"}, snapshot)[0] == "ok"
+    assert assess({"name": "vue", "spec": "~2.7.0", "pinned": None, "ecosystem": "npm"}, snapshot)[0] == "held back by ~2.7.0"
+
+    make_tree(tmp_path / "repo", {
+        "requirements.txt": "".join(f"{name}{spec}\n" for name, (spec, _) in rows.items()),
+        "web/package.json": json.dumps({"dependencies": {"react": "^18.2.0", "vue": "~2.7.0"}}),
+        "web/setup.py": "setup(name='legacy')\n",
+    })
+    (tmp_path / "packages.json").write_text(json.dumps(snapshot), encoding="utf-8")
+    run_action(stub, tmp_path, "--mode", "upgrade", "--package-snapshot", str(tmp_path / "packages.json"))
+    prompt = stub.requests[0]["messages"][1]["content"]
+    assert "7 dependencies, 2 up to date or within range (omitted)" in prompt
+    assert "flask | >=2.0,<3 | - | main | 3.0.3 | held back by <3" in prompt
+    assert "django" not in prompt and "pydantic" not in prompt and "react" not in prompt
+    assert "vue | ~2.7.0 | - | main | 3.5.0 | held back by ~2.7.0" in prompt
+    assert "setup(name='legacy')" in prompt  # formats it doesn't parse go in as written
+
+
+def test_source_outlines_keep_structure_not_bodies():
+    from source_outline import outline
+
+    python = '''"""Item routes.
+
+More detail.
+"""
+import os
+from fastapi import APIRouter
+
+router = APIRouter(prefix="/items")
+
+
+class Item(BaseModel):
+    name: str
+    price: float = 0.0
+
+    def total(self, qty: int = 1) -> float:
+        return self.price * qty
+
+
+@router.get("/{item_id}")
+async def get_item(item_id: int) -> Item:
+    value = os.environ.get("X")
+    return Item(name=value)
+
+
+if __name__ == "__main__":
+    print("hi")
+'''
+    assert outline(python, ".py").splitlines() == [
+        '"""Item routes."""',
+        "import os",
+        "from fastapi import APIRouter",
+        "router = APIRouter(prefix='/items')",
+        "class Item(BaseModel):",
+        "    name: str",
+        "    price: float = 0.0",
+        "    def total(self, qty: int=1) -> float",
+        "@router.get('/{item_id}')",
+        "async def get_item(item_id: int) -> Item",
+        "if __name__ == '__main__': ...",
+    ]
+    assert outline("from app import models\ndef broken(:\n    pass\n", ".py") == "from app import models\ndef broken("
+
+    typescript = "import { a,\n  b } from './x';\nexport class Store {\n  async save(item: Item): Promise<void> {\n    if (x) {\n"
+    assert outline(typescript, ".ts").splitlines() == [
+        "import { a,", "  b } from './x';", "export class Store", "  async save(item: Item): Promise<void>",
+    ]
+    go = 'package main\n\nimport (\n\t"fmt"\n)\n\nfunc Run(n int) error {\n\treturn nil\n}\n'
+    assert outline(go, ".go").splitlines() == ["package main", "import (", '\t"fmt"', ")", "func Run(n int) error"]
+    rust = "use std::io;\n#[derive(Debug)]\npub struct Item {\n    id: u32,\n}\nimpl Item {\n    pub fn new() -> Self {\n"
+    assert outline(rust, ".rs").splitlines() == [
+        "use std::io;", "#[derive(Debug)]", "pub struct Item", "impl Item", "    pub fn new() -> Self",
+    ]
+    assert outline("print('a')\nprint('b')\n", ".py") == "print('a')\nprint('b')\n"  # nothing to outline
+
+
+def test_outlines_are_computed_on_a_pool_and_cached(analysis, stub, tmp_path):
+    from source_outline import POOL_MIN_FILES, outline, outline_files
+
+    files = [(f"pkg/m{i}.py", f"def f{i}(x: int) -> int:\n    return x * {i}\n") for i in range(POOL_MIN_FILES)]
+    cache = analysis.ResponseCache(tmp_path / "outlines", ttl=60, max_bytes=10**6)
+    expected = [outline(text, ".py") for _, text in files]
+    assert outline_files(files, cache, workers=2) == expected
+    assert outline_files(files, cache, workers=2) == expected
+    assert (cache.hits, cache.misses) == (POOL_MIN_FILES, POOL_MIN_FILES)
+
+    make_tree(tmp_path / "repo", {"requirements.txt": "requests==2.0\n", "src/app.py": "def main() -> None:\n    pass\n"})
+    first = run_action(stub, tmp_path, "--mode", "strategic", "--full-scan")
+    assert "Outlines: 0 cached, 1 computed" in first.stderr
+    assert "### src/app.py\n```\ndef main() -> None\n```" in stub.requests[0]["messages"][1]["content"]
+    second = run_action(stub, tmp_path, "--mode", "strategic", "--full-scan")
+    assert "Outlines: 1 cached, 0 computed" in second.stderr
+
+
+def test_split_packages_groups_blocks_by_package(analysis, tmp_path):
+    make_tree(tmp_path, {
+        "requirements.txt": "requests==2.0\n",
+        "README.md": "# Demo\n",
+        "app.py": "print('app')\n",
+        "services/api/main.py": "print('api')\n",
+        "services/worker/main.py": "print('worker')\n",
+        "web/index.js": "console.log(1)\n",
+        "web/package.json": "{}\n",
+    })
+    from context_packer import split_packages
+
+    shared, chunks = split_packages(analysis.collect_blocks(tmp_path))
+    assert list(chunks) == ["(root)", "services/api", "services/worker", "web"]
+    assert [b["path"] for b in shared] == ["requirements.txt", "README.md", None]
+    assert [b["path"] for b in chunks["(root)"]] == ["app.py"]
+    assert [b["path"] for b in chunks["services/api"]] == ["services/api/main.py"]
+    assert [b["path"] for b in chunks["web"]] == ["web/package.json", "web/index.js"]
+    flat = analysis.collect_blocks(make_tree(tmp_path / "flat", {"README.md": "# Flat\n"}))
+    assert split_packages(flat) == ([], {"(root)": flat})
+
+
+def test_map_reduce_remaps_only_changed_packages(analysis, stub, tmp_path):
+    make_tree(tmp_path / "repo", {
+        "requirements.txt": "requests==2.0\n",
+        "README.md": "# Demo\n",
+        "services/api/main.py": "print('api')\n",
+        "services/worker/main.py": "print('worker')\n",
+        "web/index.js": "console.log(1)\n",
+    })
+    first = run_action(stub, tmp_path, "--mode", "strategic", "--strategy", "map-reduce")
+    assert "map-reduce over 3 package(s)" in first.stdout
+    assert len(stub.requests) == 4
+    maps, reduce = stub.requests[:3], stub.requests[3]
+    assert all("print('worker')" not in r["messages"][1]["content"] for r in maps if "`web`" in r["messages"][0]["content"])
+    assert not any("# Demo" in r["messages"][1]["content"] for r in maps)
+    merged = reduce["messages"][1]["content"]
+    assert "# Demo" in merged and "requests | ==2.0" in merged
+    assert [line for line in merged.splitlines() if line.startswith("## Package")] == [
+        "## Package `services/api`", "## Package `services/worker`", "## Package `web`",
+    ]
+
+    (tmp_path / "repo" / "web" / "index.js").write_text("console.log(2)\n", encoding="utf-8")
+    second = run_action(stub, tmp_path, "--mode", "strategic", "--strategy", "map-reduce")
+    assert len(stub.requests) == 5
+    assert "`web`" in stub.requests[4]["messages"][0]["content"]
+    assert "3 hit(s), 1 miss(es)" in second.stderr
+    assert second.stdout == first.stdout
+
+    (tmp_path / "repo" / "README.md").write_text("# Demo, now documented\n", encoding="utf-8")
+    third = run_action(stub, tmp_path, "--mode", "strategic", "--strategy", "map-reduce")
+    assert len(stub.requests) == 6  # the reduce only: no package was re-mapped
+    assert "# Demo, now documented" in stub.requests[5]["messages"][1]["content"]
+    assert "3 hit(s), 1 miss(es)" in third.stderr
+
+
+def test_fleet_isolates_failures_and_shares_the_rate_limit(analysis, tmp_path):
+    for repo in ("one/app", "two/app"):
+        make_tree(tmp_path / repo, {"requirements.txt": f"{repo.split('/')[0]}==1.0\n"})
+    manifest = tmp_path / "fleet.txt"
+    manifest.write_text("# repos\none/app\ntwo/app\nmissing\n", encoding="utf-8")
+
+    with StubServer(throttle=2, retry_after_ms=300) as stub:
+        env = {**os.environ, "AZURE_OPENAI_API_KEY": "stub", "AZURE_OPENAI_ENDPOINT": stub.endpoint,
+               "QUALITY_CACHE_DIR": str(tmp_path / "llm-cache")}
+        env.pop("KEY_VAULT_ENDPOINT", None)
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, os.path.join(ACTION_DIR, "run_analysis.py"), "--fleet", str(manifest),
+             "--output-dir", str(tmp_path / "out"), "--mode", "upgrade", "--scan-workers", "2"],
+            capture_output=True, text=True, env=env,
+        )
+        elapsed = time.perf_counter() - start
+
+    assert result.returncode == 1, result.stderr
+    assert len(stub.requests) == 4  # 2 throttled, then one per repo
+    assert elapsed >= 0.3
+    assert result.stderr.count("Connecting to Azure OpenAI") == 1
+    assert "LLM requests: 4 sent, 2 retried (2 rate limited)" in result.stderr
+    for name in ("app", "app-2"):
+        assert "stub reply to: You are a dependency upgrade advisor" in (tmp_path / "out" / f"{name}.md").read_text()
+    summary = (tmp_path / "out" / "fleet-summary.md").read_text()
+    assert "**Repos**: 3 (1 failed)" in summary
+    assert "| `app` | ok | [app.md](app.md) |" in summary
+    assert "| `missing` | failed: " in summary
+    metrics = json.loads((tmp_path / "out" / "fleet-metrics.json").read_text())
+    assert metrics["llm"]["rate_limited"] == 2
+    assert metrics["repos"]["app"]["scan"]["files"] == 1
+    assert metrics["repos"]["missing"]["status"].startswith("failed")
+
+
+VAULT_SECRETS = {"AZURE-OPENAI-API-KEY": "vault-key", "AZURE-OPENAI-CHAT-ENDPOINT": "http://127.0.0.1:9"}
+
+
+class FakeCredential:
+    def get_token(self, *scopes, **kwargs):
+        from azure.core.credentials import AccessToken
+
+        return AccessToken("fake-token", int(time.time()) + 3600)
+
+
+def test_secrets_are_fetched_concurrently_and_cached_encrypted(analysis, tmp_path, monkeypatch):
+    import secrets_provider
+
+    monkeypatch.setattr(secrets_provider, "_memory", {})
+    with FakeVault(VAULT_SECRETS, delay=0.5) as vault:
+        monkeypatch.setenv("REQUESTS_CA_BUNDLE", vault.ca_bundle)
+        start = time.perf_counter()
+        secrets, source = secrets_provider.get_secrets(vault.endpoint, tmp_path, "key", FakeCredential())
+        elapsed = time.perf_counter() - start
+        assert (secrets, source) == (VAULT_SECRETS, "vault")
+        fetched = len(vault.secret_requests())
+        assert elapsed < 1.4  # one after the other: challenge, then two fetches, 1.5 s
+
+        assert secrets_provider.get_secrets(vault.endpoint, tmp_path, "key")[1] == "memory"
+        stored = secrets_provider.secrets_file(tmp_path, vault.endpoint).read_bytes()
+        assert b"vault-key" not in stored
+
+        monkeypatch.setattr(secrets_provider, "_memory", {})
+        assert secrets_provider.get_secrets(vault.endpoint, tmp_path, "key") == (VAULT_SECRETS, "disk")
+        assert len(vault.secret_requests()) == fetched
+
+        monkeypatch.setattr(secrets_provider, "_memory", {})
+        assert secrets_provider.get_secrets(vault.endpoint, tmp_path, "other", FakeCredential())[1] == "vault"
+        assert len(vault.secret_requests()) > fetched
+
+
+def test_key_vault_run_reuses_cached_secrets(analysis, stub, tmp_path, monkeypatch):
+    (tmp_path / "repo").mkdir()
+    (tmp_path / "repo" / "requirements.txt").write_text("requests==2.0\n", encoding="utf-8")
+    with FakeVault({**VAULT_SECRETS, "AZURE-OPENAI-CHAT-ENDPOINT": stub.endpoint}) as vault:
+        for name in ("AZURE_CLIENT_ID", "AZURE_TENANT_ID", "AZURE_CLIENT_SECRET", "AZURE_OPENAI_API_KEY"):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv("KEY_VAULT_ENDPOINT", vault.endpoint)
+        monkeypatch.setenv("IDENTITY_ENDPOINT", f"{vault.endpoint}/identity")
+        monkeypatch.setenv("IDENTITY_HEADER", "fake")
+        monkeypatch.setenv("QUALITY_SECRETS_KEY", "test-key")
+        monkeypatch.setenv("REQUESTS_CA_BUNDLE", vault.ca_bundle)
+        monkeypatch.setenv("QUALITY_CACHE_DIR", str(tmp_path / "llm-cache"))
+        command = [sys.executable, os.path.join(ACTION_DIR, "run_analysis.py"), "--repo-path", str(tmp_path / "repo"),
+                   "--mode", "upgrade", "--no-cache"]
+
+        first = subprocess.run(command, capture_output=True, text=True, check=True)
+        assert "Credentials: from vault" in first.stderr
+        fetched = len(vault.requests)
+        second = subprocess.run(command, capture_output=True, text=True, check=True)
+        assert "Credentials: from disk" in second.stderr
+        assert len(vault.requests) == fetched
+    assert len(stub.requests) == 2
+    assert "stub reply to:" in second.stdout
+
+
+def test_get_client_is_shared_per_endpoint(analysis, stub):
+    assert analysis.get_client() is analysis.get_client()
+
+
+def test_report_streams_in_order_and_keeps_partial_output(analysis, monkeypatch, tmp_path):
+    monkeypatch.setitem(analysis.ANALYSES, "broken", ("Broken Analysis", f"{BREAK_MARKER} prompt"))
+    monkeypatch.setitem(analysis.ANALYSES, "slow", ("Slow Analysis", f"{SLOW_MARKER} prompt"))
+    from openai import OpenAI
+
+    output = tmp_path / "report.md"
+    partial = tmp_path / "report.md.partial"
+    with StubServer(delay=0.1, stream_delay=0.05) as stub:
+        client = OpenAI(api_key="stub", base_url=f"{stub.endpoint}/openai/v1/", max_retries=0)
+        stream = analysis.ReportStream(output)
+        stream.write("## Report\n")
+        sections = []
+        worker = threading.Thread(target=lambda: sections.extend(analysis.run_analyses(
+            client, "gpt-5.2", ["upgrade", "broken", "slow"], "context", timeout=1.5, stream=stream,
+        )))
+        start = time.perf_counter()
+        worker.start()
+        while "stub reply" not in partial.read_text(encoding="utf-8"):
+            time.sleep(0.01)
+        first_byte = time.perf_counter() - start
+        worker.join()
+        total = time.perf_counter() - start
+        assert not output.exists()
+        report = stream.close()
+
+    assert first_byte < 0.5 < 1.5 <= total  # the upgrade section shows up before the slow one times out
+    assert not partial.exists()
+    assert output.read_text(encoding="utf-8") == report == "\n".join(["## Report\n", *sections])
+    assert "stub reply to: You are a dependency upgrade advisor" in sections[0]
+    assert "stub reply" in sections[1] and "(the output above is incomplete)" in sections[1]
+    assert "> Error:" in sections[2] and "timed out" in sections[2].lower()
+
+
+def test_interrupted_report_is_finalized_with_what_arrived(analysis, tmp_path):
+    stream = analysis.ReportStream(tmp_path / "report.md")
+    stream.write("## Report\n")
+    first, second = stream.section(), stream.section()
+    stream.write("second, held back", second)
+    stream.write("first, in progress", first)
+    assert (tmp_path / "report.md.partial").read_text(encoding="utf-8") == "## Report\n\nfirst, in progress"
+    stream.close(incomplete="KeyboardInterrupt")
+    assert (tmp_path / "report.md").read_text(encoding="utf-8") == (
+        "## Report\n\nfirst, in progress\nsecond, held back\n> Report incomplete: KeyboardInterrupt\n"
+    )
+
+
+def test_metrics_file_and_scan_profile(analysis, stub, tmp_path):
+    make_tree(tmp_path / "repo", {"requirements.txt": "requests==2.0\n", "src/app.py": "print('app')\n"})
+    output, profile = tmp_path / "report.md", tmp_path / "scan.prof"
+    run_action(stub, tmp_path, "--mode", "both", "--output", str(output), "--profile", str(profile))
+    metrics = json.loads((tmp_path / "report.metrics.json").read_text())
+    assert set(metrics["phases"]) == {"scan", "auth", "analysis", "total"}
+    assert metrics["scan"]["files"] == 2 and metrics["scan"]["bytes"] == len("requests==2.0\nprint('app')\n")
+    assert metrics["llm"]["requests"] == 2 and metrics["llm"]["cache_misses"] == 2
+    assert metrics["llm"]["prompt_tokens"] > metrics["llm"]["completion_tokens"] > 0
+    assert metrics["analysis_errors"] == 0
+    assert profile.stat().st_size > 0
+
+    run_action(stub, tmp_path, "--mode", "both", "--output", str(output))
+    metrics = json.loads((tmp_path / "report.metrics.json").read_text())
+    assert "auth" not in metrics["phases"]  # served from cache, never connected
+    assert metrics["llm"]["requests"] == 0 and metrics["llm"]["cache_hits"] == 2